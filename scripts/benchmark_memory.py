@@ -0,0 +1,79 @@
+"""Peak memory of decompose() and of a transform chain, copying vs in place.
+
+Each case runs in a fresh process on a synthetic surface with holes. The
+reported peak is the highest resident set size reached during the case,
+above the resident size before it, in units of the surface's own size.
+Linux only: the peak is read from /proc and reset before each case.
+
+Usage: python scripts/benchmark_memory.py [size]
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+
+from surface_analysis import Surface, Transforms
+from surface_analysis.io import generate_synthetic, with_holes
+
+
+def chain() -> tuple[object, ...]:
+    return (
+        Transforms.Interpolation.Linear(local=True),
+        Transforms.Projection.Polynomial(degree=2),
+        Transforms.Filtering.Gaussian(cutoff=0.025),
+    )
+
+
+CASES: dict[str, Callable[[Surface], object]] = {
+    "decompose, all layers": lambda s: s.decompose(
+        lambda_c=0.8, lambda_s=0.0025
+    ).materialize(),
+    "decompose, roughness": lambda s: (
+        s.decompose(lambda_c=0.8, lambda_s=0.0025).roughness
+    ),
+    "apply chain": lambda s: s.apply(*chain()),
+    "apply chain, in place": lambda s: s.apply(*chain(), inplace=True),
+}
+
+
+def status_kib(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def run_case(name: str, size: int) -> tuple[float, float]:
+    # Warm up on a small map, so lazily loaded code does not count
+    CASES[name](with_holes(generate_synthetic(nx=256, ny=256), n_holes=64))
+    surface = with_holes(generate_synthetic(nx=size, ny=size), n_holes=size)
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")  # reset the peak resident set size
+    baseline = status_kib("VmRSS")
+    start = time.perf_counter()
+    result = CASES[name](surface)
+    seconds = time.perf_counter() - start
+    grown = (status_kib("VmHWM") - baseline) * 1024
+    del result
+    return seconds, grown / surface.z.nbytes
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    print(f"Surface: {size} x {size}, {size * size * 8 / 1e6:.0f} MB")
+    print()
+    print(f"{'case':<26}{'time':>8}{'peak':>10}")
+    context = multiprocessing.get_context("spawn")
+    for name in CASES:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            seconds, peak = pool.submit(run_case, name, size).result()
+        print(f"{name:<26}{seconds:>7.2f}s{peak:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
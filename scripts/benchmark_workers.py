@@ -0,0 +1,70 @@
+"""Thread scaling of decompose() and the parallel transforms.
+
+Times each stage on a synthetic surface for an increasing number of
+workers and prints the speed-up over one worker. Only single-CPU runs have
+been recorded so far, so the multi-core speed-up is unmeasured.
+
+Usage: python scripts/benchmark_workers.py [size] [max_workers]
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from collections.abc import Callable
+
+from surface_analysis import Transforms
+from surface_analysis.io import generate_synthetic, with_holes
+
+
+def best_of(func: Callable[[], object], repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    counts = [w for w in (1, 2, 4, 8, 16, 32) if w <= max_workers]
+
+    surf = with_holes(generate_synthetic(nx=size, ny=size), n_holes=size)
+    filled = surf.apply(Transforms.Interpolation.Linear(local=True))
+    print(f"Surface: {size} x {size}, {surf.nan_count} NaN, {os.cpu_count()} CPUs")
+
+    stages: dict[str, Callable[[int], object]] = {
+        "Linear": lambda w: Transforms.Interpolation.Linear(
+            workers=w, local=True
+        ).transform(surf),
+        "Nearest": lambda w: Transforms.Interpolation.Nearest(workers=w).transform(
+            surf
+        ),
+        "Polynomial": lambda w: Transforms.Projection.Polynomial(
+            degree=2, workers=w
+        ).transform(filled),
+        "Gaussian spatial": lambda w: Transforms.Filtering.Gaussian(
+            cutoff=0.025, workers=w
+        ).transform(filled),
+        "Gaussian fft": lambda w: Transforms.Filtering.Gaussian(
+            cutoff=0.8, workers=w
+        ).transform(filled),
+        # The default global Linear fill is single-threaded; Nearest is not
+        "decompose": lambda w: surf.decompose(
+            lambda_c=0.8, lambda_s=0.025, interpolation="nearest", workers=w
+        ),
+    }
+
+    print()
+    print(f"{'stage':<18}{'1 worker':>10}" + "".join(f"{f'x{w}':>8}" for w in counts))
+    for name, run in stages.items():
+        times = [best_of(lambda w=w, run=run: run(w)) for w in counts]
+        speedups = "".join(f"{times[0] / t:>7.2f}x" for t in times)
+        print(f"{name:<18}{times[0]:>9.2f}s{speedups}")
+
+
+if __name__ == "__main__":
+    main()
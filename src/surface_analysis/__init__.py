@@ -2,12 +2,14 @@ from __future__ import annotations
 
 from surface_analysis.abbott_firestone import AbbottFirestone
 from surface_analysis.decomposition import Decomposition
+from surface_analysis.pipeline import Pipeline
 from surface_analysis.surface import Surface
 from surface_analysis.transforms import Transformation, Transforms
 
 __all__ = [
     "AbbottFirestone",
     "Decomposition",
+    "Pipeline",
     "Surface",
     "Transformation",
     "Transforms",
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+
+
+def check_workers(workers: int) -> None:
+    if workers < 1:
+        raise ValueError(f"workers must be >= 1, got {workers}")
+
+
+def blocks(n: int, parts: int) -> list[slice]:
+    """Split ``range(n)`` into at most ``parts`` contiguous, near-equal slices."""
+    parts = max(1, min(parts, n))
+    bounds = [n * i // parts for i in range(parts + 1)]
+    return [slice(bounds[i], bounds[i + 1]) for i in range(parts)]
+
+
+def run_threaded[T, R](
+    func: Callable[[T], R], items: Iterable[T], workers: int
+) -> list[R]:
+    """``[func(item) for item in items]``, on a thread pool when workers > 1.
+
+    The heavy lifting in the callers (scipy.ndimage, pocketfft, lfilter,
+    griddata, BLAS) releases the GIL, so threads run it concurrently.
+    """
+    items = items if isinstance(items, Sequence) else list(items)
+    if workers > 1 and len(items) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(func, items))
+    return [func(item) for item in items]
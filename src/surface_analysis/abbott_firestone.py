@@ -1,13 +1,120 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Literal
 
 import numpy as np
 from numpy.typing import NDArray
 
+CurveMethod = Literal["histogram", "exact"]
 
-def _argclosest(array: NDArray, value: float) -> int:
-    return int(np.argmin(np.abs(array - value)))
+
+def _closest_ascending(array: NDArray, value: float) -> int:
+    """Index of the element of an ascending array closest to ``value``.
+
+    Equivalent to ``argmin(abs(array - value))``, including its preference
+    for the first of several equally close elements, in O(log n).
+    """
+    n = array.size
+    j = int(np.searchsorted(array, value, side="left"))
+    if j == 0:
+        return 0
+    if j < n and array[j] - value < value - array[j - 1]:
+        return j
+    # The element below may be repeated; argmin returns its first occurrence.
+    return int(np.searchsorted(array, array[j - 1], side="left"))
+
+
+def _ratio_ranks(n: int, ratios: NDArray) -> NDArray[np.intp]:
+    """1-based rank, counted from the highest value, at each material ratio."""
+    k = np.ceil(np.asarray(ratios, dtype=np.float64) / 100.0 * n).astype(np.intp)
+    return np.clip(k, 1, n)
+
+
+@dataclass
+class HeightSketch:
+    """Mergeable, bounded-memory summary of a height distribution.
+
+    Heights are kept as weighted centroids sorted by value. Whenever more
+    than ``2 * capacity`` centroids accumulate, neighbours are merged into
+    ``capacity`` groups of equal total weight, so the material ratio of any
+    centroid is off by at most about ``100 / capacity`` % per compaction.
+    Sketches built from separate tiles can be merged, which lets the
+    material ratio curve of a surface larger than memory be built tile by
+    tile.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of centroids kept after each compaction.
+    """
+
+    capacity: int = 10_000
+    values: NDArray[np.float64] = field(default_factory=lambda: np.empty(0))
+    weights: NDArray[np.float64] = field(default_factory=lambda: np.empty(0))
+    min: float = np.inf
+    max: float = -np.inf
+
+    def __post_init__(self) -> None:
+        if self.capacity < 1:
+            raise ValueError("capacity must be >= 1")
+
+    @property
+    def count(self) -> float:
+        """Number of height values summarised."""
+        return float(self.weights.sum())
+
+    def update(self, z: NDArray[np.floating]) -> HeightSketch:
+        """Add the finite values of a height map or tile. Returns ``self``."""
+        z = np.asarray(z, dtype=np.float64).ravel()
+        valid = np.sort(z[np.isfinite(z)])
+        n = valid.size
+        if n == 0:
+            return self
+        self.min = min(self.min, float(valid[0]))
+        self.max = max(self.max, float(valid[-1]))
+        if n > self.capacity:
+            # Summarise a large tile on its own first: with unit weights the
+            # equal-weight groups are plain runs of consecutive ranks.
+            bounds = np.flatnonzero(
+                np.diff(np.arange(n) * self.capacity // n, prepend=-1)
+            )
+            weights = np.diff(np.append(bounds, n)).astype(np.float64)
+            values = np.add.reduceat(valid, bounds) / weights
+        else:
+            values, weights = valid, np.ones(n)
+        self.values = np.concatenate((self.values, values))
+        self.weights = np.concatenate((self.weights, weights))
+        if self.values.size > 2 * self.capacity:
+            self._compress()
+        return self
+
+    def merge(self, other: HeightSketch) -> HeightSketch:
+        """Return a new sketch summarising both ``self`` and ``other``."""
+        merged = HeightSketch(
+            capacity=min(self.capacity, other.capacity),
+            values=np.concatenate((self.values, other.values)),
+            weights=np.concatenate((self.weights, other.weights)),
+            min=min(self.min, other.min),
+            max=max(self.max, other.max),
+        )
+        if merged.values.size > 2 * merged.capacity:
+            merged._compress()
+        return merged
+
+    def _compress(self) -> None:
+        order = np.argsort(self.values, kind="stable")
+        values = self.values[order]
+        weights = self.weights[order]
+        # Group centroids by the rank at which they start, in `capacity`
+        # bins of equal weight; group ids are non-decreasing after the sort.
+        start = np.cumsum(weights) - weights
+        group = np.floor(start * (self.capacity / weights.sum())).astype(np.intp)
+        bounds = np.flatnonzero(np.diff(group, prepend=-1))
+        merged_weights = np.add.reduceat(weights, bounds)
+        self.values = np.add.reduceat(values * weights, bounds) / merged_weights
+        self.weights = merged_weights
 
 
 @dataclass
@@ -29,9 +136,26 @@ class AbbottFirestone:
     _eq_slope: float | None = None
     _eq_intercept: float | None = None
 
+    # --- Lookup tables, built once on first query ---
+    _height_asc: NDArray[np.float64] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _ratio_asc: NDArray[np.float64] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _cum_material: NDArray[np.float64] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _cum_void: NDArray[np.float64] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
     @classmethod
     def from_surface(
-        cls, z: NDArray[np.float64], n_bins: int = 10_000
+        cls,
+        z: NDArray[np.floating],
+        n_bins: int = 10_000,
+        method: CurveMethod = "histogram",
     ) -> AbbottFirestone:
         """Build the material ratio curve from a height map.
 
@@ -40,17 +164,50 @@ class AbbottFirestone:
         z : NDArray
             2D height map. NaN values are excluded.
         n_bins : int
-            Number of histogram bins.
+            Number of histogram bins, or of material ratio samples.
+        method : {"histogram", "exact"}
+            See :meth:`from_values`.
+        """
+        return cls.from_values(z[np.isfinite(z)], n_bins=n_bins, method=method)
+
+    @classmethod
+    def from_values(
+        cls,
+        valid: NDArray[np.floating],
+        n_bins: int = 10_000,
+        method: CurveMethod = "histogram",
+    ) -> AbbottFirestone:
+        """Build the material ratio curve from the finite heights of a surface.
+
+        Parameters
+        ----------
+        valid : NDArray
+            1D array of finite height values.
+        n_bins : int
+            Number of histogram bins, or of material ratio samples.
+        method : {"histogram", "exact"}
+            ``"histogram"`` bins the heights evenly over [min, max]; a single
+            spike then squeezes the core into a few bins. ``"exact"`` sorts
+            a copy of the heights and samples the curve at ``n_bins`` evenly
+            spaced material ratios plus the highest point, each height being
+            an exact order statistic. Every height is kept when there are fewer values
+            than ``n_bins``.
         """
-        valid = z[np.isfinite(z)]
         if valid.size == 0:
             raise ValueError("Cannot compute Abbott-Firestone: no valid points")
+        if method == "exact":
+            return cls._from_sorted(np.sort(valid), n_bins)
+        if method != "histogram":
+            raise ValueError(
+                f"Unknown method {method!r}, expected 'histogram' or 'exact'"
+            )
 
         z_min, z_max = float(np.min(valid)), float(np.max(valid))
         counts, bin_edges = np.histogram(valid, bins=n_bins, range=(z_min, z_max))
 
         # Material ratio curve: cumulate from highest to lowest
         # bin_centers from high to low
+        bin_edges = bin_edges.astype(np.float64, copy=False)
         bin_centers = 0.5 * (bin_edges[:-1] + bin_edges[1:])
         height = bin_centers[::-1]
         cumulative = np.cumsum(counts[::-1])
@@ -58,6 +215,115 @@ class AbbottFirestone:
 
         return cls(height=height, material_ratio=material_ratio)
 
+    @classmethod
+    def _from_sorted(
+        cls, ascending: NDArray[np.floating], n_bins: int
+    ) -> AbbottFirestone:
+        n = ascending.size
+        if n <= n_bins:
+            rank = np.arange(1, n + 1)
+        else:
+            # Rank 1 keeps the highest peak on the curve.
+            ratios = np.arange(n_bins + 1) * (100.0 / n_bins)
+            rank = np.unique(_ratio_ranks(n, ratios))
+        material_ratio = rank.astype(np.float64) * (100.0 / n)
+        height = ascending[n - rank].astype(np.float64, copy=False)
+        return cls(height=height, material_ratio=material_ratio)
+
+    @classmethod
+    def from_sketch(cls, sketch: HeightSketch) -> AbbottFirestone:
+        """Build the material ratio curve from a :class:`HeightSketch`.
+
+        Each centroid is placed at the material ratio of its middle rank.
+        The exact extremes are added as end points, so peak and valley
+        areas still reach the highest and lowest heights.
+        """
+        total = sketch.count
+        if total == 0:
+            raise ValueError("Cannot compute Abbott-Firestone: no valid points")
+        order = np.argsort(sketch.values, kind="stable")[::-1]
+        height = sketch.values[order]
+        weights = sketch.weights[order]
+        ratio = (np.cumsum(weights) - 0.5 * (weights - 1.0)) * (100.0 / total)
+        if sketch.max > height[0]:
+            height = np.concatenate(([sketch.max], height))
+            ratio = np.concatenate(([100.0 / total], ratio))
+        if sketch.min < height[-1]:
+            height = np.concatenate((height, [sketch.min]))
+            ratio = np.concatenate((ratio, [100.0]))
+        return cls(height=height, material_ratio=ratio)
+
+    @classmethod
+    def from_tiles(
+        cls, tiles: Iterable[NDArray[np.floating]], capacity: int = 10_000
+    ) -> AbbottFirestone:
+        """Build the material ratio curve one height tile at a time.
+
+        Only one tile and a sketch of at most ``2 * capacity`` centroids are
+        held in memory; see :class:`HeightSketch` for the accuracy bound.
+        Maps with fewer than ``2 * capacity`` finite values are exact.
+
+        Parameters
+        ----------
+        tiles : iterable of NDArray
+            Height tiles (any shape). NaN values are excluded.
+        capacity : int
+            Sketch size.
+        """
+        sketch = HeightSketch(capacity=capacity)
+        for tile in tiles:
+            sketch.update(tile)
+        return cls.from_sketch(sketch)
+
+    # --- Lookup tables ---
+
+    def _build_tables(self) -> None:
+        """Precompute the tables behind every Smc/Smr and volume query.
+
+        ``_cum_material[k]`` is the area under the material ratio curve
+        between the highest height and ``height[k]`` (trapezoidal rule), and
+        ``_cum_void[k]`` the same for the void ratio ``100 - material_ratio``.
+        Any partial integral is then a difference of two table entries.
+        """
+        if self._cum_material is not None:
+            return
+        mr = self.material_ratio
+        h = self.height
+        dh = h[:-1] - h[1:]  # positive: height is descending
+        self._height_asc = np.ascontiguousarray(h[::-1])
+        self._ratio_asc = np.ascontiguousarray(mr[::-1])
+        self._cum_material = np.concatenate(
+            ([0.0], np.cumsum(0.5 * (mr[:-1] + mr[1:]) * dh))
+        )
+        self._cum_void = np.concatenate(
+            ([0.0], np.cumsum((100.0 - 0.5 * (mr[:-1] + mr[1:])) * dh))
+        )
+
+    def _height_index(self, c: float) -> int:
+        """Index of the curve height closest to ``c``."""
+        self._build_tables()
+        assert self._height_asc is not None
+        n = self.height.size
+        # On ties, the first index in descending order is the last ascending.
+        j = int(np.searchsorted(self._height_asc, c, side="left"))
+        if j == 0:
+            return n - 1
+        if j == n or c - self._height_asc[j - 1] < self._height_asc[j] - c:
+            return n - j
+        return n - 1 - j
+
+    def _material_area(self, idx: int) -> float:
+        """Area under the material ratio curve above ``height[idx]``."""
+        self._build_tables()
+        assert self._cum_material is not None
+        return float(self._cum_material[idx])
+
+    def _void_area(self, idx: int) -> float:
+        """Area under the void ratio curve below ``height[idx]``."""
+        self._build_tables()
+        assert self._cum_void is not None
+        return float(self._cum_void[-1] - self._cum_void[idx])
+
     # --- Interpolation helpers ---
 
     def Smc(self, mr: float) -> float:
@@ -66,8 +332,10 @@ class AbbottFirestone:
 
     def Smr(self, c: float) -> float:
         """Material ratio at given height."""
-        # height is descending, so flip for np.interp (needs ascending x)
-        return float(np.interp(c, self.height[::-1], self.material_ratio[::-1]))
+        # np.interp needs ascending x; use the precomputed ascending copies
+        self._build_tables()
+        assert self._height_asc is not None and self._ratio_asc is not None
+        return float(np.interp(c, self._height_asc, self._ratio_asc))
 
     # --- Equivalent line (ISO 13565-2) ---
 
@@ -78,21 +346,14 @@ class AbbottFirestone:
         mr = self.material_ratio
         h = self.height
 
-        best_slope = -np.inf
-        best_start_idx = 0
-        best_end_idx = 0
-
-        # Step 1: find the 40% window with minimum secant slope
-        for i in range(len(mr)):
-            if mr[i] > 60.0:
-                break
-            mr_end = mr[i] + 40.0
-            h_end = self.Smc(mr_end)
-            slope = (h_end - h[i]) / 40.0
-            if slope > best_slope:
-                best_slope = slope
-                best_start_idx = i
-                best_end_idx = _argclosest(mr, mr_end)
+        # Step 1: find the 40% window with minimum secant slope. Every window
+        # starting at or below 60% is evaluated in one interpolation; argmax
+        # keeps the first of equal slopes, like a strict running maximum.
+        n_start = max(int(np.searchsorted(mr, 60.0, side="right")), 1)
+        mr_end = mr[:n_start] + 40.0
+        slopes = (np.interp(mr_end, mr, h) - h[:n_start]) / 40.0
+        best_start_idx = int(np.argmax(slopes))
+        best_end_idx = _closest_ascending(mr, float(mr_end[best_start_idx]))
 
         # Step 2: fit a regression line through the curve within that window
         mr_window = mr[best_start_idx : best_end_idx + 1]
@@ -122,14 +383,9 @@ class AbbottFirestone:
         if smr1 <= 0:
             return 0.0
 
-        idx_upper = _argclosest(self.height, y_upper)
         # Area A1: integrate material_ratio from top to y_upper
-        area = np.abs(
-            np.trapezoid(
-                self.material_ratio[: idx_upper + 1], x=self.height[: idx_upper + 1]
-            )
-        )
-        return float(2.0 * area / smr1)
+        area = self._material_area(self._height_index(y_upper))
+        return 2.0 * area / smr1
 
     @property
     def Svk(self) -> float:
@@ -141,14 +397,9 @@ class AbbottFirestone:
         if base <= 0:
             return 0.0
 
-        idx_lower = _argclosest(self.height, y_lower)
         # Area A2: integrate (100 - material_ratio) from y_lower to bottom
-        area = np.abs(
-            np.trapezoid(
-                100.0 - self.material_ratio[idx_lower:], x=self.height[idx_lower:]
-            )
-        )
-        return float(2.0 * area / base)
+        area = self._void_area(self._height_index(y_lower))
+        return 2.0 * area / base
 
     @property
     def Smr1(self) -> float:
@@ -167,21 +418,11 @@ class AbbottFirestone:
 
     def _Vm(self, mr: float) -> float:
         """Material volume above Smc(mr)."""
-        idx = _argclosest(self.height, self.Smc(mr))
-        return float(
-            np.abs(
-                np.trapezoid(self.material_ratio[: idx + 1], x=self.height[: idx + 1])
-            )
-            / 100.0
-        )
+        return self._material_area(self._height_index(self.Smc(mr))) / 100.0
 
     def _Vv(self, mr: float) -> float:
         """Void volume below Smc(mr)."""
-        idx = _argclosest(self.height, self.Smc(mr))
-        return float(
-            np.abs(np.trapezoid(100.0 - self.material_ratio[idx:], x=self.height[idx:]))
-            / 100.0
-        )
+        return self._void_area(self._height_index(self.Smc(mr))) / 100.0
 
     @property
     def Vmp(self) -> float:
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import multiprocessing
+import time
+import traceback
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+from surface_analysis.io import expand_files
+from surface_analysis.surface import Surface
+
+if TYPE_CHECKING:
+    from surface_analysis.transforms.projection import Polynomial
+
+Layer = Literal["primary", "waviness", "roughness", "micro_roughness"]
+
+
+@dataclass(frozen=True)
+class DecompositionSpec:
+    """What to compute for each file of a batch.
+
+    Parameters
+    ----------
+    form, lambda_c, lambda_s, interpolation
+        Passed to ``Surface.decompose``.
+    layers : tuple of str
+        Layers whose ISO 25178 parameters are extracted. ``micro_roughness``
+        is skipped when ``lambda_s`` is None.
+    """
+
+    form: Literal["plane", "polynomial"] | Polynomial = "polynomial"
+    lambda_c: float = 0.8
+    lambda_s: float | None = None
+    interpolation: Literal["linear", "nearest", "laplace", "biharmonic"] = "linear"
+    layers: tuple[Layer, ...] = ("waviness", "roughness", "micro_roughness")
+
+    def run(self, surface: Surface) -> dict[str, dict[str, float]]:
+        """Decompose a surface and return the parameters of each layer."""
+        dec = surface.decompose(
+            form=self.form,
+            lambda_c=self.lambda_c,
+            lambda_s=self.lambda_s,
+            interpolation=self.interpolation,
+        )
+        results: dict[str, dict[str, float]] = {}
+        for name in self.layers:
+            layer = getattr(dec, name)
+            if layer is not None:
+                results[name] = layer.parameters()
+        return results
+
+
+@dataclass(frozen=True)
+class FileResult:
+    """Outcome of one file: its parameters per layer, or the error it raised."""
+
+    path: Path
+    parameters: dict[str, dict[str, float]] = field(default_factory=dict)
+    error: str | None = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchProgress:
+    """Live counters of a running batch."""
+
+    total: int
+    done: int = 0
+    failed: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the batch started."""
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Files finished per second so far."""
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def remaining(self) -> float:
+        """Estimated seconds left at the current throughput."""
+        rate = self.throughput
+        return (self.total - self.done) / rate if rate > 0 else float("inf")
+
+    def __str__(self) -> str:
+        return (
+            f"{self.done}/{self.total} files ({self.failed} failed), "
+            f"{self.throughput:.2f} files/s"
+        )
+
+
+def load_surface(path: str | Path) -> Surface:
+    """Load a ``.datx`` measurement or an HDF5 file written by ``save_hdf5``."""
+    from surface_analysis.io import load_datx, load_hdf5
+
+    path = Path(path)
+    if path.suffix.lower() in (".h5", ".hdf5"):
+        return load_hdf5(str(path))
+    return load_datx(str(path))
+
+
+def analyze_file(path: str | Path, spec: DecompositionSpec) -> FileResult:
+    """Load, decompose and extract parameters for one file.
+
+    Any exception is captured in the result instead of being raised, so a
+    bad file never stops a batch.
+    """
+    start = time.perf_counter()
+    try:
+        parameters = spec.run(load_surface(path))
+    except Exception:  # noqa: BLE001 - any failure is reported per file
+        return FileResult(
+            path=Path(path),
+            error=traceback.format_exc(),
+            seconds=time.perf_counter() - start,
+        )
+    return FileResult(
+        path=Path(path), parameters=parameters, seconds=time.perf_counter() - start
+    )
+
+
+class Batch:
+    """Analyze many measurement files on a process pool.
+
+    Iterating yields a ``FileResult`` per file as soon as it finishes (not
+    in input order). At most ``max_in_flight`` files are submitted at a
+    time, so memory is bounded by that many surfaces being processed at
+    once, however long the file list. Files that raise, or whose worker
+    process dies (e.g. killed for running out of memory), yield a failed
+    result and the batch carries on. When a worker dies, the other files
+    in flight are rerun one at a time, so only a file that kills its
+    worker on its own is reported as failed.
+
+    Parameters
+    ----------
+    files : str, Path or iterable of paths
+        A directory (all ``.datx`` files in it), a glob pattern such as
+        ``"tubes/*.datx"``, or an explicit list of ``.datx`` / HDF5 files.
+    spec : DecompositionSpec
+        Decomposition applied to every file.
+    workers : int
+        Number of worker processes. With 1, files are processed in the
+        calling process.
+    max_in_flight : int or None
+        Maximum number of files submitted at once; defaults to ``workers``.
+
+    Examples
+    --------
+    >>> batch = Batch("tubes/*.datx", DecompositionSpec(lambda_s=0.025), workers=8)
+    >>> for result in batch:
+    ...     print(batch.progress, result.path.name, result.ok)
+    """
+
+    def __init__(
+        self,
+        files: str | Path | Iterable[str | Path],
+        spec: DecompositionSpec | None = None,
+        workers: int = 1,
+        max_in_flight: int | None = None,
+    ) -> None:
+        from surface_analysis._parallel import check_workers
+
+        check_workers(workers)
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be >= 1, got {max_in_flight}")
+        self.files = expand_files(files)
+        self.spec = DecompositionSpec() if spec is None else spec
+        self.workers = workers
+        self.max_in_flight = workers if max_in_flight is None else max_in_flight
+        self.progress = BatchProgress(total=len(self.files))
+
+    def _record(self, result: FileResult) -> FileResult:
+        self.progress.done += 1
+        if not result.ok:
+            self.progress.failed += 1
+        return result
+
+    def __iter__(self) -> Iterator[FileResult]:
+        self.progress = BatchProgress(total=len(self.files))
+        if self.workers == 1:
+            for path in self.files:
+                yield self._record(analyze_file(path, self.spec))
+            return
+
+        pending = iter(self.files)
+        # Files that were in flight when a worker died: any of them may
+        # have caused it, so each is rerun alone before being blamed.
+        suspects: deque[Path] = deque()
+        in_flight: dict[Future[FileResult], Path] = {}
+        context = _pool_context()
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        try:
+            while True:
+                if suspects:
+                    if not in_flight:
+                        suspect = suspects.popleft()
+                        future = pool.submit(analyze_file, suspect, self.spec)
+                        in_flight[future] = suspect
+                else:
+                    while len(in_flight) < self.max_in_flight:
+                        queued = next(pending, None)
+                        if queued is None:
+                            break
+                        future = pool.submit(analyze_file, queued, self.spec)
+                        in_flight[future] = queued
+                if not in_flight:
+                    return
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                alone = len(in_flight) == 1
+                broken = False
+                for future in finished:
+                    path = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        if not alone:
+                            suspects.append(path)
+                            continue
+                        result = FileResult(
+                            path=path, error="Worker process terminated abruptly"
+                        )
+                    yield self._record(result)
+                if broken:
+                    # The pool is unusable once a worker dies: keep what
+                    # finished before the crash, rerun the rest on a fresh pool
+                    wait(in_flight)
+                    for future, path in in_flight.items():
+                        if future.exception() is None:
+                            yield self._record(future.result())
+                        else:
+                            suspects.append(path)
+                    in_flight.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=context
+                    )
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    """Start method for worker pools.
+
+    Forking a process that runs threads (the filters' thread pools, h5py)
+    can deadlock the child, so fork is avoided.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
+def run_batch(
+    files: str | Path | Iterable[str | Path],
+    spec: DecompositionSpec | None = None,
+    workers: int = 1,
+    max_in_flight: int | None = None,
+) -> list[FileResult]:
+    """Run a whole ``Batch`` and return the results in input order."""
+    batch = Batch(files, spec, workers=workers, max_in_flight=max_in_flight)
+    order = {path: i for i, path in enumerate(batch.files)}
+    return sorted(batch, key=lambda result: order[result.path])
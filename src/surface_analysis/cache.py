@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+import h5py
+import numpy as np
+
+from surface_analysis.surface import Surface
+
+if TYPE_CHECKING:
+    from surface_analysis.decomposition import Decomposition
+    from surface_analysis.transforms.projection import Polynomial, PolynomialFit
+
+_LAYERS = ("form", "primary", "waviness", "roughness", "micro_roughness")
+
+# Cache consulted by Surface.decompose(); None (the default) disables caching
+_cache: DiskCache | None = None
+
+
+@functools.cache
+def _package_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("surface-analysis")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Hits and misses of a ``DiskCache`` in this process, and its size."""
+
+    hits: int
+    misses: int
+    entries: int
+    nbytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.hits} hits, {self.misses} misses ({self.hit_rate:.0%}), "
+            f"{self.entries} entries, {self.nbytes / 1e6:.1f} MB"
+        )
+
+
+class DiskCache:
+    """Decompositions stored on disk, reused across runs.
+
+    An entry holds every layer of a decomposition (compressed, chunked
+    HDF5), the parameters of each layer and the form fit. It is keyed by
+    the content of the input heights (with their grid and dtype), the
+    package version and the decomposition arguments, so re-loading the same
+    measurement and decomposing it the same way is a hit, while any change
+    to the data, the code version or the arguments is a miss.
+
+    On a miss every layer and its parameters are computed and written,
+    which costs more than a plain ``decompose()``. When the entries exceed
+    ``max_bytes``, the least recently used ones are deleted.
+
+    Parameters
+    ----------
+    directory : str or Path
+        Where entries are stored; created if missing.
+    max_bytes : int
+        Maximum total size of the entries on disk.
+    compression : {"gzip", "lzf"} or None
+        HDF5 filter for the layers. gzip (level 1, byte-shuffled) is
+        readable everywhere; lzf writes about twice as fast but needs h5py;
+        None writes fastest and stores about 30 % more.
+
+    Examples
+    --------
+    >>> set_cache(DiskCache("~/.cache/surface-analysis"))
+    >>> dec = Surface.from_datx("measurement.datx").decompose(lambda_c=0.8)
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int = 10 * 1024**3,
+        compression: Literal["gzip", "lzf"] | None = "gzip",
+    ) -> None:
+        if max_bytes < 0:
+            raise ValueError(f"max_bytes must be non-negative, got {max_bytes}")
+        if compression not in ("gzip", "lzf", None):
+            raise ValueError(
+                f"Compression must be 'gzip', 'lzf' or None, got {compression!r}"
+            )
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.hits = 0
+        self.misses = 0
+
+    def _entries(self) -> list[Path]:
+        return list(self.directory.glob("*.h5"))
+
+    @property
+    def stats(self) -> CacheStats:
+        sizes = [_size(path) for path in self._entries()]
+        return CacheStats(self.hits, self.misses, len(sizes), sum(sizes))
+
+    def clear(self) -> None:
+        """Delete every entry."""
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+
+    def key(
+        self,
+        surface: Surface,
+        form: str | Polynomial = "polynomial",
+        lambda_c: float = 0.8,
+        lambda_s: float | None = None,
+        interpolation: str = "linear",
+    ) -> str:
+        """Name of the entry for ``surface.decompose(...)`` with these arguments."""
+        from surface_analysis.decomposition import _resolve_form, _resolve_interpolation
+        from surface_analysis.pipeline import fingerprint, transform_key
+
+        spec = (
+            transform_key(_resolve_interpolation(interpolation)),
+            transform_key(_resolve_form(form)),
+            float(lambda_c),
+            None if lambda_s is None else float(lambda_s),
+        )
+        key = repr((_package_version(), fingerprint(surface), spec))
+        return hashlib.blake2b(key.encode(), digest_size=20).hexdigest()
+
+    def decompose(
+        self,
+        surface: Surface,
+        form: Literal["plane", "polynomial"] | Polynomial = "polynomial",
+        lambda_c: float = 0.8,
+        lambda_s: float | None = None,
+        interpolation: Literal["linear", "nearest", "laplace", "biharmonic"] = "linear",
+        workers: int = 1,
+    ) -> Decomposition:
+        """``surface.decompose(...)``, read from the cache when possible."""
+        from surface_analysis.decomposition import Decomposition
+
+        try:
+            key: str | None = self.key(surface, form, lambda_c, lambda_s, interpolation)
+        except TypeError:
+            # A form model without a stable key cannot be cached
+            key = None
+        if key is not None:
+            dec = self.load(key)
+            if dec is not None:
+                self.hits += 1
+                return dec
+            self.misses += 1
+        dec = Decomposition.from_surface(
+            surface,
+            form=form,
+            lambda_c=lambda_c,
+            lambda_s=lambda_s,
+            interpolation=interpolation,
+            workers=workers,
+        )
+        if key is not None:
+            self.store(key, dec)
+        return dec
+
+    def load(self, key: str) -> Decomposition | None:
+        """The decomposition stored under ``key``, or None.
+
+        Layers come back with their parameters already computed. An
+        unreadable entry is deleted and reported as missing.
+        """
+        from surface_analysis.decomposition import Decomposition
+
+        path = self.directory / f"{key}.h5"
+        try:
+            with h5py.File(path, "r") as f:
+                layers = {name: _read_layer(f[name]) for name in _LAYERS if name in f}
+                form_fit = _read_form_fit(f["form_fit"]) if "form_fit" in f else None
+                lambda_s = f.attrs["lambda_s"]
+                dec = Decomposition.from_layers(
+                    form=layers["form"],
+                    waviness=layers["waviness"],
+                    roughness=layers["roughness"],
+                    micro_roughness=layers.get("micro_roughness"),
+                    primary=layers["primary"],
+                    lambda_c=float(f.attrs["lambda_c"]),
+                    lambda_s=None if np.isnan(lambda_s) else float(lambda_s),
+                    form_fit=form_fit,
+                )
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError):
+            # Truncated or corrupt entry (HDF5 or parameters JSON)
+            path.unlink(missing_ok=True)
+            return None
+        # Mark as recently used for eviction
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        return dec
+
+    def store(self, key: str, dec: Decomposition) -> None:
+        """Write every layer of ``dec`` and its parameters under ``key``.
+
+        The entry is written to a temporary file and renamed, so concurrent
+        readers never see a partial entry.
+        """
+        dec.materialize()
+        path = self.directory / f"{key}.h5"
+        # Unique per call: threads of one process may store the same key
+        tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        try:
+            with h5py.File(tmp, "w") as f:
+                f.attrs["lambda_c"] = dec.lambda_c
+                f.attrs["lambda_s"] = np.nan if dec.lambda_s is None else dec.lambda_s
+                f.attrs["version"] = _package_version()
+                for name in _LAYERS:
+                    layer = getattr(dec, name)
+                    if layer is not None:
+                        _write_layer(f, name, layer, self.compression)
+                if dec.form_fit is not None:
+                    _write_form_fit(f.create_group("form_fit"), dec.form_fit)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def __repr__(self) -> str:
+        return f"DiskCache({str(self.directory)!r}, {self.stats})"
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _write_layer(
+    f: h5py.File, name: str, layer: Surface, compression: str | None
+) -> None:
+    ds = f.create_dataset(
+        name,
+        data=layer.z,
+        chunks=True,
+        compression=compression,
+        compression_opts=1 if compression == "gzip" else None,
+        shuffle=compression is not None,
+    )
+    ds.attrs["step_x"] = layer.step_x
+    ds.attrs["step_y"] = layer.step_y
+    ds.attrs["x0"] = layer.x0
+    ds.attrs["y0"] = layer.y0
+    ds.attrs["parameters"] = json.dumps(layer.parameters())
+
+
+def _read_layer(ds: h5py.Dataset) -> Surface:
+    z = np.empty(ds.shape, dtype=ds.dtype)
+    ds.read_direct(z)
+    layer = Surface(
+        z=z,
+        step_x=float(ds.attrs["step_x"]),
+        step_y=float(ds.attrs["step_y"]),
+        x0=float(ds.attrs["x0"]),
+        y0=float(ds.attrs["y0"]),
+    )
+    layer._cache["parameters"] = json.loads(ds.attrs["parameters"])
+    return layer
+
+
+def _write_form_fit(group: h5py.Group, fit: PolynomialFit) -> None:
+    group["coefficients"] = fit.coefficients
+    group["standard_error"] = fit.standard_error
+    group.attrs["degree"] = fit.degree
+    group.attrs["x_domain"] = fit.x_domain
+    group.attrs["y_domain"] = fit.y_domain
+    group.attrs["residual_rms"] = fit.residual_rms
+    group.attrs["n_points"] = fit.n_points
+    group.attrs["fit_stride"] = fit.fit_stride
+
+
+def _read_form_fit(group: h5py.Group) -> PolynomialFit:
+    from surface_analysis.transforms.projection import PolynomialFit
+
+    x_domain, y_domain = group.attrs["x_domain"], group.attrs["y_domain"]
+    return PolynomialFit(
+        coefficients=group["coefficients"][...],
+        degree=int(group.attrs["degree"]),
+        x_domain=(float(x_domain[0]), float(x_domain[1])),
+        y_domain=(float(y_domain[0]), float(y_domain[1])),
+        standard_error=group["standard_error"][...],
+        residual_rms=float(group.attrs["residual_rms"]),
+        n_points=int(group.attrs["n_points"]),
+        fit_stride=int(group.attrs["fit_stride"]),
+    )
+
+
+def get_cache() -> DiskCache | None:
+    """The cache ``Surface.decompose()`` reads and writes, if any."""
+    return _cache
+
+
+def set_cache(cache: DiskCache | None) -> None:
+    """Make ``Surface.decompose()`` use a disk cache; None disables it."""
+    global _cache
+    _cache = cache
+
+
+@contextmanager
+def use_cache(cache: DiskCache | None) -> Iterator[DiskCache | None]:
+    """Temporarily change the cache used by ``Surface.decompose()``.
+
+    Examples
+    --------
+    >>> with use_cache(DiskCache("cache/")) as cache:
+    ...     dec = Surface.from_datx("measurement.datx").decompose(lambda_c=0.8)
+    >>> print(cache.stats)
+    """
+    previous = get_cache()
+    set_cache(cache)
+    try:
+        yield cache
+    finally:
+        set_cache(previous)
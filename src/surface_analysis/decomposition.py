@@ -1,18 +1,314 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Callable
 from typing import TYPE_CHECKING
 
+import numpy as np
+
 if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+    from surface_analysis.shared import SharedDecomposition
     from surface_analysis.surface import Surface
+    from surface_analysis.transforms._base import Transformation
+    from surface_analysis.transforms.projection import Polynomial, PolynomialFit
+
+_LAYERS = ("form", "primary", "waviness", "roughness", "micro_roughness")
 
 
-@dataclass
 class Decomposition:
-    form: Surface
-    waviness: Surface
-    roughness: Surface
-    micro_roughness: Surface | None
-    primary: Surface
-    lambda_c: float
-    lambda_s: float | None
+    """Form, primary, waviness, roughness and micro-roughness of a surface.
+
+    Returned by ``Surface.decompose()``, which fills the NaN, fits the form
+    and subtracts it up front. Each layer is then computed the first time it
+    is accessed and kept, so a run that reads only the roughness skips the
+    form and micro-roughness layers, and one that reads only the waviness or
+    the micro-roughness skips a Gaussian filter. Layers carry the NaN mask of
+    the measured surface.
+
+    ``release()`` drops layers, or the intermediates they are computed from,
+    to free memory; ``materialize()`` computes every layer at once.
+
+    Attributes
+    ----------
+    lambda_c : float
+        Cutoff wavelength (mm) separating waviness from roughness.
+    lambda_s : float or None
+        Cutoff wavelength (mm) separating roughness from micro-roughness.
+    form_fit : PolynomialFit or None
+        The fitted form model.
+    """
+
+    def __init__(
+        self,
+        primary: Surface | None,
+        lambda_c: float,
+        lambda_s: float | None,
+        form_fit: PolynomialFit | None = None,
+        nan_mask: NDArray[np.bool_] | None = None,
+        workers: int = 1,
+    ) -> None:
+        # ``primary`` is the filled primary surface: the lowpass filters run
+        # on it, and ``nan_mask`` is only applied to the layers handed out.
+        self.lambda_c = lambda_c
+        self.lambda_s = lambda_s
+        self.form_fit = form_fit
+        self._primary_filled = primary
+        self._nan_mask = nan_mask
+        self._workers = workers
+        self._lowpass_s: Surface | None = None
+        self._layers: dict[str, Surface] = {}
+
+    @classmethod
+    def from_surface(
+        cls,
+        surface: Surface,
+        form: str | Polynomial = "polynomial",
+        lambda_c: float = 0.8,
+        lambda_s: float | None = None,
+        interpolation: str = "linear",
+        workers: int = 1,
+    ) -> Decomposition:
+        """Fill, fit the form and derive the primary surface; see ``decompose``."""
+        from surface_analysis._parallel import check_workers
+
+        check_workers(workers)
+        interp = _resolve_interpolation(interpolation, workers)
+        form_model = _resolve_form(form)
+
+        # Preprocessing — fill NaN for filtering, but remember original mask.
+        # The copy is the only full-size allocation: the fill and the form
+        # removal then work in place.
+        nan_mask = np.isnan(surface.z)
+        primary = surface.copy().apply(interp, inplace=True)
+        form_fit = _remove_form(primary, form_model, workers)
+        return cls(
+            primary,
+            lambda_c=lambda_c,
+            lambda_s=lambda_s,
+            form_fit=form_fit,
+            nan_mask=nan_mask if nan_mask.any() else None,
+            workers=workers,
+        )
+
+    @classmethod
+    def from_layers(
+        cls,
+        form: Surface,
+        waviness: Surface,
+        roughness: Surface,
+        micro_roughness: Surface | None,
+        primary: Surface,
+        lambda_c: float,
+        lambda_s: float | None,
+        form_fit: PolynomialFit | None = None,
+    ) -> Decomposition:
+        """Wrap layers computed elsewhere, e.g. views of shared memory."""
+        dec = cls(None, lambda_c=lambda_c, lambda_s=lambda_s, form_fit=form_fit)
+        dec._layers = {
+            "form": form,
+            "primary": primary,
+            "waviness": waviness,
+            "roughness": roughness,
+        }
+        if micro_roughness is not None:
+            dec._layers["micro_roughness"] = micro_roughness
+        return dec
+
+    # --- Layers ---
+
+    @property
+    def form(self) -> Surface:
+        """The fitted form, evaluated on the grid."""
+        return self._layer("form", self._compute_form)
+
+    @property
+    def primary(self) -> Surface:
+        """The surface with its form removed."""
+        return self._layer("primary", lambda: self._masked(self._primary().copy()))
+
+    @property
+    def waviness(self) -> Surface:
+        """Wavelengths above ``lambda_c``."""
+        return self._layer("waviness", lambda: self._lowpass(self.lambda_c))
+
+    @property
+    def roughness(self) -> Surface:
+        """Wavelengths between ``lambda_s`` (or the sampling) and ``lambda_c``."""
+        return self._layer("roughness", self._compute_roughness)
+
+    @property
+    def micro_roughness(self) -> Surface | None:
+        """Wavelengths below ``lambda_s``; None without ``lambda_s``."""
+        if self.lambda_s is None:
+            return None
+        return self._layer("micro_roughness", self._compute_micro_roughness)
+
+    def _layer(self, name: str, compute: Callable[[], Surface]) -> Surface:
+        try:
+            return self._layers[name]
+        except KeyError:
+            layer = self._layers[name] = compute()
+            return layer
+
+    def _primary(self) -> Surface:
+        if self._primary_filled is None:
+            raise ValueError(
+                "The decomposition's intermediates were released; "
+                "call materialize() before release() to keep every layer"
+            )
+        return self._primary_filled
+
+    def _masked(self, surface: Surface) -> Surface:
+        """Restore the measured NaN mask on a freshly computed layer.
+
+        Interpolation is for filtering only: interpolated pixels must not
+        influence ISO parameter computation.
+        """
+        if self._nan_mask is not None:
+            surface.z[self._nan_mask] = np.nan
+            surface.invalidate()
+        return surface
+
+    def _lowpass(self, cutoff: float) -> Surface:
+        from surface_analysis.transforms.filtering import lowpass_bank
+
+        (lowpass,) = lowpass_bank(self._primary(), [cutoff], workers=self._workers)
+        return self._masked(lowpass)
+
+    def _compute_form(self) -> Surface:
+        if self.form_fit is None:
+            raise ValueError("The decomposition has no form fit to evaluate")
+        primary = self._primary()
+        z = self.form_fit.evaluate(primary.x, primary.y, dtype=primary.z.dtype)
+        return self._masked(primary.with_heights(z))
+
+    # Band-pass layers subtract a masked lowpass, so they inherit its NaN.
+
+    def _compute_roughness(self) -> Surface:
+        if self.lambda_s is None:
+            return self._primary() - self.waviness
+        if "micro_roughness" not in self._layers:
+            return self._lowpass_s_layer() - self.waviness
+        # Last use of the lambda_s lowpass: turn its buffer into the layer
+        roughness = self._take_lowpass_s()
+        roughness -= self.waviness
+        return roughness
+
+    def _compute_micro_roughness(self) -> Surface:
+        if "roughness" not in self._layers:
+            return self._primary() - self._lowpass_s_layer()
+        micro_roughness = self._take_lowpass_s()
+        np.subtract(self._primary().z, micro_roughness.z, out=micro_roughness.z)
+        micro_roughness.invalidate()
+        return micro_roughness
+
+    def _lowpass_s_layer(self) -> Surface:
+        assert self.lambda_s is not None
+        if self._lowpass_s is None:
+            self._lowpass_s = self._lowpass(self.lambda_s)
+        return self._lowpass_s
+
+    def _take_lowpass_s(self) -> Surface:
+        lowpass_s = self._lowpass_s_layer()
+        self._lowpass_s = None
+        return lowpass_s
+
+    # --- Memory ---
+
+    @property
+    def computed(self) -> tuple[str, ...]:
+        """Names of the layers computed so far."""
+        return tuple(name for name in _LAYERS if name in self._layers)
+
+    def materialize(self) -> Decomposition:
+        """Compute every layer, then release the intermediates.
+
+        Returns the decomposition itself, e.g.
+        ``surface.decompose(lambda_c=0.8).materialize()``.
+        """
+        for name in ("form", "waviness", "roughness", "micro_roughness"):
+            getattr(self, name)
+        self._lowpass_s = None
+        primary = self._primary_filled
+        if (
+            "primary" not in self._layers
+            and primary is not None
+            and primary.z.flags.writeable
+        ):
+            # Last consumer of the filled primary: mask it in place, no copy
+            self._layers["primary"] = self._masked(primary)
+        _ = self.primary
+        self.release()
+        return self
+
+    def release(self, *layers: str) -> None:
+        """Free memory held by the decomposition.
+
+        Parameters
+        ----------
+        *layers : str
+            Layers to drop; they are recomputed if accessed again. Without
+            names, drop the intermediates instead (the filled primary
+            surface and the ``lambda_s`` lowpass): layers computed so far
+            stay available, the others can no longer be computed.
+        """
+        for name in layers:
+            if name not in _LAYERS:
+                raise ValueError(f"Unknown layer {name!r}, expected one of {_LAYERS}")
+            self._layers.pop(name, None)
+        if not layers:
+            self._primary_filled = None
+            self._lowpass_s = None
+
+    def share(self) -> SharedDecomposition:
+        """Copy every layer into shared memory for zero-copy worker access."""
+        from surface_analysis.shared import SharedDecomposition
+
+        return SharedDecomposition.from_decomposition(self)
+
+    def __repr__(self) -> str:
+        return (
+            f"Decomposition(lambda_c={self.lambda_c}, lambda_s={self.lambda_s}, "
+            f"computed={list(self.computed)})"
+        )
+
+
+def _resolve_interpolation(interpolation: str, workers: int = 1) -> Transformation:
+    """NaN-filling transform for a ``decompose(interpolation=...)`` name."""
+    from surface_analysis.transforms.interpolation import Inpaint, Linear, Nearest
+
+    interp_map: dict[str, Transformation] = {
+        "linear": Linear(workers=workers),
+        "nearest": Nearest(workers=workers),
+        "laplace": Inpaint(method="laplace"),
+        "biharmonic": Inpaint(method="biharmonic"),
+    }
+    if interpolation not in interp_map:
+        raise ValueError(
+            f"Unknown interpolation {interpolation!r}, "
+            f"expected one of {list(interp_map)}"
+        )
+    return interp_map[interpolation]
+
+
+def _resolve_form(form: str | Polynomial) -> Polynomial:
+    """Polynomial form model for a ``decompose(form=...)`` argument."""
+    from surface_analysis.transforms.projection import Polynomial
+
+    form_map = {"plane": Polynomial(degree=1), "polynomial": Polynomial(degree=2)}
+    if isinstance(form, Polynomial):
+        return form
+    if form in form_map:
+        return form_map[form]
+    raise ValueError(f"Unknown form {form!r}, expected one of {list(form_map)}")
+
+
+def _remove_form(
+    filled: Surface, form_model: Polynomial, workers: int = 1
+) -> PolynomialFit:
+    """F-operator: fit the form of a filled surface and subtract it in place."""
+    form_fit = form_model.fit(filled, workers=max(workers, form_model.workers))
+    form_fit.subtract_from(filled.z, filled.x, filled.y)
+    filled.invalidate()
+    return form_fit
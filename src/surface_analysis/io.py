@@ -1,36 +1,279 @@
 from __future__ import annotations
 
+import glob
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Self
+
 import h5py
 import numpy as np
+from numpy.typing import DTypeLike, NDArray
 from scipy.ndimage import gaussian_filter
 
-from surface_analysis.surface import Surface
+from surface_analysis.precision import get_default_dtype, resolve_dtype
+from surface_analysis.surface import Surface, _check_region, _region_grid
+
+# Heights in .datx files are in nm, lateral converters in m; surfaces are in mm
+_NM_TO_MM = 1e-6
+_M_TO_MM = 1e3
+# Raw values above this are invalid pixels, whatever the "No Data" attribute
+_DATX_INVALID_ABOVE = 1e20
+# Target size of the row blocks converted at a time by the eager loader
+_BLOCK_BYTES = 16 << 20
+
+
+def _datx_dataset(f: h5py.File) -> h5py.Dataset:
+    """The height dataset of an open .datx file."""
+    surface_group = f["Data/Surface"]
+    return surface_group[next(iter(surface_group))]
+
+
+def _datx_steps(ds: h5py.Dataset) -> tuple[float, float]:
+    """Pixel spacing (mm) from the converter attributes (stored in meters)."""
+    step_x_m = ds.attrs["X Converter"][0][2][1]
+    step_y_m = ds.attrs["Y Converter"][0][2][1]
+    return float(step_x_m * _M_TO_MM), float(step_y_m * _M_TO_MM)
+
+
+def _datx_nodata(ds: h5py.Dataset) -> float:
+    return float(ds.attrs.get("No Data", [np.inf])[0])
+
+
+def _convert_datx(z: NDArray[np.floating], nodata: float) -> None:
+    """Mask invalid raw values as NaN and convert nm to mm, in place."""
+    z[np.isclose(z, nodata) | (z > _DATX_INVALID_ABOVE)] = np.nan
+    z *= _NM_TO_MM
+
+
+def _row_blocks(ds: h5py.Dataset, n_rows: int, itemsize: int) -> list[slice]:
+    """Row ranges of about ``_BLOCK_BYTES`` each, aligned on the HDF5 chunks."""
+    row_bytes = max(ds.shape[1], 1) * itemsize
+    rows = max(1, _BLOCK_BYTES // row_bytes)
+    if ds.chunks is not None:
+        chunk_rows = ds.chunks[0]
+        rows = max(chunk_rows, rows // chunk_rows * chunk_rows)
+    return [slice(r, min(r + rows, n_rows)) for r in range(0, n_rows, rows)]
+
 
+def _read_datx(
+    ds: h5py.Dataset,
+    rows: slice = slice(None),
+    cols: slice = slice(None),
+    dtype: DTypeLike | None = None,
+) -> NDArray[np.floating]:
+    """Read and convert a hyperslab of a .datx height dataset.
 
-def load_datx(path: str) -> Surface:
+    Raw values are converted to ``dtype`` by HDF5 straight into the output
+    array, one row block at a time, and masked and scaled in place: the
+    only full-size allocation is the result.
+    """
+    nodata = _datx_nodata(ds)
+    row_idx = range(*rows.indices(ds.shape[0]))
+    col_idx = range(*cols.indices(ds.shape[1]))
+    z = np.empty((len(row_idx), len(col_idx)), dtype=resolve_dtype(dtype))
+    if z.size == 0:
+        return z
+    for block in _row_blocks(ds, z.shape[0], z.itemsize):
+        source = (
+            slice(row_idx[block][0], row_idx[block][-1] + 1, row_idx.step),
+            slice(col_idx[0], col_idx[-1] + 1, col_idx.step),
+        )
+        ds.read_direct(z, source_sel=source, dest_sel=(block, slice(None)))
+        _convert_datx(z[block], nodata)
+    return z
+
+
+def load_datx(path: str, dtype: DTypeLike | None = None) -> Surface:
+    """Read a Zygo .datx measurement (heights in mm, NaN for invalid pixels).
+
+    Heights are stored in ``dtype``, by default the precision policy's
+    (see ``surface_analysis.precision``).
+    """
     with h5py.File(path, "r") as f:
-        surface_group = f["Data/Surface"]
-        key = list(surface_group.keys())[0]
-        ds = surface_group[key]
+        ds = _datx_dataset(f)
+        step_x, step_y = _datx_steps(ds)
+        z = _read_datx(ds, dtype=dtype)
+    return Surface(z=z, step_x=step_x, step_y=step_y)
+
+
+class DatxReader:
+    """Lazy access to a .datx measurement, reading regions on demand.
+
+    Keeps the file open and reads only the requested hyperslab, converted
+    to mm with NaN for invalid pixels, like ``load_datx``. Close it (or use
+    it as a context manager) to release the file. Regions are read in
+    ``dtype``, by default the precision policy's.
+
+    Examples
+    --------
+    >>> with Surface.from_datx("measurement.datx", lazy=True) as datx:
+    ...     corner = datx[:512, :512]  # Surface of the top-left 512 x 512 pixels
+    ...     full = datx.read()
+    """
+
+    def __init__(self, path: str, dtype: DTypeLike | None = None) -> None:
+        self.path = path
+        self.height_dtype = resolve_dtype(dtype)
+        self._file = h5py.File(path, "r")
+        self._ds = _datx_dataset(self._file)
+        self.step_x, self.step_y = _datx_steps(self._ds)
+        self.nodata = _datx_nodata(self._ds)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self._ds.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Dtype of the raw heights stored in the file."""
+        return self._ds.dtype
+
+    def __getitem__(self, key: tuple[slice, slice]) -> Surface:
+        """Read the region ``[rows, cols]`` as a surface.
+
+        Strided slices decimate the grid and scale the steps accordingly;
+        the origin is the position of the first pixel read.
+        """
+        rows, cols = _check_region(key)
+        return Surface(
+            z=_read_datx(self._ds, rows, cols, self.height_dtype),
+            **_region_grid(rows, cols, self.shape, self.step_x, self.step_y),
+        )
 
-        z_raw = ds[()].astype(np.float64)
+    def read(self) -> Surface:
+        """Read the whole measurement."""
+        return self[:, :]
 
-        # Spatial steps from converter attributes (stored in meters)
-        step_x_m = ds.attrs["X Converter"][0][2][1]
-        step_y_m = ds.attrs["Y Converter"][0][2][1]
+    def close(self) -> None:
+        self._file.close()
 
-        # No-data sentinel
-        nodata = ds.attrs.get("No Data", [np.inf])[0]
+    def __enter__(self) -> Self:
+        return self
 
-    # Mask invalid values
-    z_raw[np.isclose(z_raw, nodata) | (z_raw > 1e20)] = np.nan
+    def __exit__(self, *exc: object) -> None:
+        self.close()
 
-    # Convert: raw is in nm, we store in mm
-    z_mm = z_raw * 1e-6
-    step_x_mm = float(step_x_m * 1e3)
-    step_y_mm = float(step_y_m * 1e3)
+    def __repr__(self) -> str:
+        ny, nx = self.shape
+        return (
+            f"DatxReader({self.path!r}, {nx}x{ny}, "
+            f"step=({self.step_x:.4f}, {self.step_y:.4f}) mm)"
+        )
 
-    return Surface(z=z_mm, step_x=step_x_mm, step_y=step_y_mm)
+
+@dataclass(frozen=True)
+class DatxInfo:
+    """Header of a .datx file: what ``load_datx`` would return, minus pixels.
+
+    ``error`` holds the reason a file could not be read (all other fields
+    are then empty); check ``ok`` before planning with it.
+    """
+
+    path: Path
+    shape: tuple[int, int] = (0, 0)
+    step_x: float = float("nan")  # mm
+    step_y: float = float("nan")  # mm
+    nodata: float = float("nan")
+    dtype: str = ""  # raw dtype stored in the file
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the loaded height map, in the default precision."""
+        return self.shape[0] * self.shape[1] * get_default_dtype().itemsize
+
+    @classmethod
+    def read(cls, path: str | Path) -> DatxInfo:
+        """Read one file's header; errors are recorded, not raised."""
+        try:
+            with h5py.File(path, "r") as f:
+                ds = _datx_dataset(f)
+                step_x, step_y = _datx_steps(ds)
+                return cls(
+                    path=Path(path),
+                    shape=ds.shape,
+                    step_x=step_x,
+                    step_y=step_y,
+                    nodata=_datx_nodata(ds),
+                    dtype=ds.dtype.str,
+                )
+        except Exception as exc:  # noqa: BLE001 - reported per file
+            return cls(path=Path(path), error=f"{type(exc).__name__}: {exc}")
+
+
+def expand_files(files: str | Path | Iterable[str | Path]) -> list[Path]:
+    """Resolve a directory (its ``.datx`` files), a glob pattern or a list."""
+    if isinstance(files, (str, Path)):
+        if Path(files).is_dir():
+            return sorted(Path(files).glob("*.datx"))
+        return [Path(p) for p in sorted(glob.glob(str(files)))]
+    return [Path(p) for p in files]
+
+
+def scan_datx(
+    paths: str | Path | Iterable[str | Path], workers: int = 8
+) -> list[DatxInfo]:
+    """Read the headers of many .datx files without loading any heights.
+
+    Only the ``Data/Surface`` dataset's shape, dtype and its converter and
+    ``No Data`` attributes are read, so a file costs about a millisecond
+    whatever its size. Unreadable files are reported through
+    ``DatxInfo.error``.
+
+    Parameters
+    ----------
+    paths : str, Path or iterable of paths
+        A directory (all ``.datx`` files in it), a glob pattern or a list.
+    workers : int
+        Files opened concurrently, to overlap file-system latency (network
+        shares); the header parsing itself is serialized by h5py.
+
+    Returns
+    -------
+    list of DatxInfo
+        One per file, in the order of ``paths``.
+    """
+    from surface_analysis._parallel import check_workers, run_threaded
+
+    check_workers(workers)
+    return run_threaded(DatxInfo.read, expand_files(paths), workers)
+
+
+def save_hdf5(surface: Surface, path: str, dataset: str = "z") -> None:
+    """Write a surface to an HDF5 file as a chunked dataset.
+
+    Heights are stored in mm, with the pixel spacing (mm) in the dataset
+    attributes ``step_x`` and ``step_y``. Read back with ``load_hdf5``, or
+    tile by tile with ``surface_analysis.tiled.decompose_tiled``.
+    """
+    with h5py.File(path, "a") as f:
+        if dataset in f:
+            del f[dataset]
+        ds = f.create_dataset(dataset, data=surface.z, chunks=True)
+        ds.attrs["step_x"] = surface.step_x
+        ds.attrs["step_y"] = surface.step_y
+        ds.attrs["x0"] = surface.x0
+        ds.attrs["y0"] = surface.y0
+
+
+def load_hdf5(path: str, dataset: str = "z", dtype: DTypeLike | None = None) -> Surface:
+    """Read a surface written by ``save_hdf5``, in ``dtype`` (default policy)."""
+    with h5py.File(path, "r") as f:
+        ds = f[dataset]
+        z = np.empty(ds.shape, dtype=resolve_dtype(dtype))
+        ds.read_direct(z)
+        return Surface(
+            z=z,
+            step_x=float(ds.attrs["step_x"]),
+            step_y=float(ds.attrs["step_y"]),
+            x0=float(ds.attrs.get("x0", 0.0)),
+            y0=float(ds.attrs.get("y0", 0.0)),
+        )
 
 
 def generate_synthetic(
@@ -43,6 +286,7 @@ def generate_synthetic(
     roughness_rms: float = 0.0003,  # 0.3 µm in mm
     noise_rms: float = 0.00005,  # 0.05 µm in mm
     seed: int | None = 42,
+    dtype: DTypeLike | None = None,
 ) -> Surface:
     rng = np.random.default_rng(seed)
 
@@ -68,4 +312,21 @@ def generate_synthetic(
 
     z = form + waviness + roughness + noise
 
-    return Surface(z=z, step_x=step, step_y=step)
+    return Surface(
+        z=z.astype(resolve_dtype(dtype), copy=False), step_x=step, step_y=step
+    )
+
+
+def with_holes(surface: Surface, n_holes: int, seed: int | None = 0) -> Surface:
+    """Copy of ``surface`` with ``n_holes`` random rectangular NaN holes.
+
+    Holes are 1-7 rows by 1-39 columns, like measurement dropouts, and may
+    overlap.
+    """
+    rng = np.random.default_rng(seed)
+    z = surface.z.copy()
+    ny, nx = z.shape
+    for _ in range(n_holes):
+        r, c = rng.integers(0, max(ny - 8, 1)), rng.integers(0, max(nx - 40, 1))
+        z[r : r + rng.integers(1, 8), c : c + rng.integers(1, 40)] = np.nan
+    return surface.with_heights(z)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import NDArray
+
+# Heights widened to float64 per chunk when accumulating float32 moments
+_ACCUMULATE_CHUNK = 1 << 16
+
+
+def _central_sums(dev: NDArray[np.float64]) -> tuple[float, float, float, float]:
+    """Sums of |dev|, dev^2, dev^3 and dev^4; ``dev`` is overwritten."""
+    # One squared buffer backs every power; dot products reduce without
+    # further temporaries.
+    dev_sq = dev * dev
+    s2 = float(np.sum(dev_sq))
+    s3 = float(np.dot(dev_sq, dev))
+    s4 = float(np.dot(dev_sq, dev_sq))
+    abs_sum = float(np.sum(np.abs(dev, out=dev)))
+    return abs_sum, s2, s3, s4
+
+
+@dataclass(frozen=True)
+class HeightMoments:
+    """Statistics of the height distribution behind the ISO 25178-2 parameters.
+
+    All values are computed together from a single deviation buffer, so the
+    height parameters (Sa, Sq, Sp, Sv, Sz, Ssk, Sku) share one pass over the
+    finite pixels instead of re-masking the height map for each of them.
+
+    Parameters
+    ----------
+    n : int
+        Number of finite height values.
+    mean, min, max : float
+        Mean, minimum and maximum height.
+    mad : float
+        Mean absolute deviation from the mean (Sa).
+    m2, m3, m4 : float
+        Second, third and fourth central moments.
+    """
+
+    n: int
+    mean: float
+    min: float
+    max: float
+    mad: float
+    m2: float
+    m3: float
+    m4: float
+
+    @classmethod
+    def from_values(cls, values: NDArray[np.floating]) -> HeightMoments:
+        """Compute moments of a 1D array of finite height values."""
+        n = values.size
+        if n == 0:
+            nan = float("nan")
+            return cls(n=0, mean=nan, min=nan, max=nan, mad=nan, m2=nan, m3=nan, m4=nan)
+
+        mean = float(np.mean(values, dtype=np.float64))
+        if values.dtype == np.float64:
+            abs_sum, s2, s3, s4 = _central_sums(
+                np.subtract(values, mean, dtype=np.float64)
+            )
+        else:
+            # Narrower heights are widened a chunk at a time, so the sums
+            # accumulate in float64 without a full-size float64 copy.
+            totals = np.zeros(4)
+            for start in range(0, n, _ACCUMULATE_CHUNK):
+                dev = values[start : start + _ACCUMULATE_CHUNK].astype(np.float64)
+                dev -= mean
+                totals += _central_sums(dev)
+            abs_sum, s2, s3, s4 = (float(total) for total in totals)
+        m2, m3, m4, mad = s2 / n, s3 / n, s4 / n, abs_sum / n
+
+        return cls(
+            n=n,
+            mean=mean,
+            min=float(np.min(values)),
+            max=float(np.max(values)),
+            mad=mad,
+            m2=m2,
+            m3=m3,
+            m4=m4,
+        )
+
+    # --- ISO 25178-2 height parameters ---
+
+    @property
+    def Sa(self) -> float:
+        return self.mad
+
+    @property
+    def Sq(self) -> float:
+        return float(np.sqrt(self.m2))
+
+    @property
+    def Sp(self) -> float:
+        return self.max - self.mean
+
+    @property
+    def Sv(self) -> float:
+        return self.mean - self.min
+
+    @property
+    def Sz(self) -> float:
+        return self.max - self.min
+
+    @property
+    def Ssk(self) -> float:
+        sq = self.Sq
+        if sq == 0:
+            return 0.0
+        return self.m3 / sq**3
+
+    @property
+    def Sku(self) -> float:
+        sq = self.Sq
+        if sq == 0:
+            return 0.0
+        return self.m4 / sq**4
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import enum
+import hashlib
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import TYPE_CHECKING, Any, Literal
+
+import numpy as np
+
+from surface_analysis.transforms._base import Transformation
+
+if TYPE_CHECKING:
+    from surface_analysis.decomposition import Decomposition
+    from surface_analysis.surface import Surface
+    from surface_analysis.transforms.projection import Polynomial
+
+# Attributes that change how a transform runs, not what it returns
+_RUNTIME_ATTRIBUTES = frozenset({"workers"})
+
+
+def fingerprint(surface: Surface) -> tuple[Hashable, ...]:
+    """Key identifying a surface by its grid and the content of its heights.
+
+    Two surfaces with the same shape, dtype, steps, origin and height bytes
+    share a fingerprint; any change to a pixel gives a new one. A strided
+    region is hashed through a contiguous copy.
+    """
+    grid = (surface.step_x, surface.step_y, surface.x0, surface.y0)
+    return (*_array_key(surface.z), *grid)
+
+
+def _array_key(a: np.ndarray) -> tuple[Hashable, ...]:
+    z = np.ascontiguousarray(a)
+    digest = hashlib.blake2b(z.data, digest_size=16).hexdigest()
+    return (z.shape, z.dtype.str, digest)
+
+
+def transform_key(transform: Transformation) -> tuple[Hashable, ...]:
+    """Key identifying a transform by its class and parameters.
+
+    Parameters are the instance attributes, except the thread count, which
+    does not change the result. Arrays are keyed by their content; other
+    values must be scalars, strings, enums, transforms or containers of
+    them.
+
+    Raises
+    ------
+    TypeError
+        If an attribute has no stable key (e.g. a callable or an arbitrary
+        object, whose repr may embed its address).
+    """
+    params = tuple(
+        sorted(
+            (name, _param_key(value))
+            for name, value in vars(transform).items()
+            if name not in _RUNTIME_ATTRIBUTES
+        )
+    )
+    cls = type(transform)
+    return (cls.__module__, cls.__qualname__, params)
+
+
+def _param_key(value: object) -> Hashable:
+    if value is None or isinstance(
+        value, (bool, int, float, complex, str, bytes, np.generic, enum.Enum)
+    ):
+        return repr(value)
+    if isinstance(value, np.ndarray):
+        return ("ndarray", *_array_key(value))
+    if isinstance(value, (tuple, list, frozenset, set)):
+        items = [_param_key(v) for v in value]
+        if isinstance(value, (frozenset, set)):
+            items.sort(key=repr)
+        return (type(value).__name__, *items)
+    if isinstance(value, dict):
+        return ("dict", *sorted((repr(k), _param_key(v)) for k, v in value.items()))
+    if isinstance(value, Transformation) and hasattr(value, "__dict__"):
+        return transform_key(value)
+    raise TypeError(
+        f"Cannot build a cache key from {type(value).__qualname__} parameter {value!r}"
+    )
+
+
+class Pipeline(Transformation):
+    """A chain of transforms that memoizes its intermediate surfaces.
+
+    Each intermediate is cached under the fingerprint of the input surface
+    and the parameters of every transform applied so far, so running the
+    pipeline again on the same heights, or a longer chain sharing its first
+    steps, reuses the work already done. ``decompose()`` caches the NaN
+    fill and the form removal the same way: sweeping the cutoffs costs one
+    interpolation and one form fit.
+
+    Cached surfaces are read-only; ``copy()`` one before modifying it. The
+    least recently used entries are evicted to keep the cache within
+    ``memory_budget`` bytes. A transform with a parameter that has no
+    stable key (see ``transform_key``), and every step after it, runs
+    without caching.
+
+    Parameters
+    ----------
+    *transforms : Transformation
+        The chain run by ``transform()`` (and ``surface.apply(pipeline)``).
+    memory_budget : int
+        Maximum number of bytes of cached heights.
+
+    Examples
+    --------
+    >>> pipeline = Pipeline(memory_budget=2 * 1024**3)
+    >>> for lambda_c in (0.25, 0.8, 2.5):
+    ...     dec = pipeline.decompose(surface, lambda_c=lambda_c)
+    """
+
+    def __init__(
+        self, *transforms: Transformation, memory_budget: int = 1024**3
+    ) -> None:
+        if memory_budget < 0:
+            raise ValueError(f"Memory budget must be non-negative, got {memory_budget}")
+        self.transforms = transforms
+        self.memory_budget = memory_budget
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[object, int]] = OrderedDict()
+        self._nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of heights currently cached."""
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        self._entries.clear()
+        self._nbytes = 0
+
+    def transform(self, surface: Surface) -> Surface:
+        return self.apply(surface, *self.transforms)
+
+    def apply(self, surface: Surface, *transforms: Transformation) -> Surface:
+        """Apply transforms in order, reusing cached intermediates.
+
+        Results that went into the cache are read-only.
+        """
+        return self._chain(surface, transforms)[1]
+
+    def _chain(
+        self, surface: Surface, transforms: tuple[Transformation, ...]
+    ) -> tuple[Hashable | None, Surface]:
+        key: Hashable = fingerprint(surface)
+        result = surface
+        for i, t in enumerate(transforms):
+            try:
+                key = (key, transform_key(t))
+            except TypeError:
+                return None, result.apply(*transforms[i:])
+            cached = self._get(key)
+            if cached is None:
+                cached = result.apply(t)
+                # A transform with nothing to do returns its input, which
+                # belongs to the caller and costs nothing to recompute
+                if cached is not result:
+                    self._put(key, cached, cached)
+            result = cached
+        return key, result
+
+    def decompose(
+        self,
+        surface: Surface,
+        form: Literal["plane", "polynomial"] | Polynomial = "polynomial",
+        lambda_c: float = 0.8,
+        lambda_s: float | None = None,
+        interpolation: Literal["linear", "nearest", "laplace", "biharmonic"] = "linear",
+        workers: int = 1,
+    ) -> Decomposition:
+        """``surface.decompose(...)``, with the fill and form removal cached.
+
+        Only the Gaussian filters run again when just the cutoffs change.
+        """
+        from surface_analysis._parallel import check_workers
+        from surface_analysis.decomposition import (
+            Decomposition,
+            _remove_form,
+            _resolve_form,
+            _resolve_interpolation,
+        )
+
+        check_workers(workers)
+        interp = _resolve_interpolation(interpolation, workers)
+        form_model = _resolve_form(form)
+
+        key, filled = self._chain(surface, (interp,))
+        key = (key, transform_key(form_model))
+        cached = self._get(key)
+        if cached is None:
+            primary = filled.copy()
+            cached = primary, _remove_form(primary, form_model, workers)
+            self._put(key, cached, primary)
+        primary, form_fit = cached
+        nan_mask = np.isnan(surface.z)
+        return Decomposition(
+            primary,
+            lambda_c=lambda_c,
+            lambda_s=lambda_s,
+            form_fit=form_fit,
+            nan_mask=nan_mask if nan_mask.any() else None,
+            workers=workers,
+        )
+
+    def _get(self, key: Hashable) -> Any:
+        try:
+            value, _ = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _put(self, key: Hashable, value: object, heights: Surface) -> None:
+        nbytes = heights.z.nbytes
+        if nbytes > self.memory_budget:
+            return
+        # Entries are shared by every caller: refuse in-place changes
+        heights.z.flags.writeable = False
+        self._entries[key] = (value, nbytes)
+        self._nbytes += nbytes
+        while self._nbytes > self.memory_budget:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._nbytes -= evicted
+
+    def __repr__(self) -> str:
+        return (
+            f"Pipeline({len(self.transforms)} transforms, {len(self)} cached, "
+            f"{self._nbytes / 1e6:.1f}/{self.memory_budget / 1e6:.1f} MB, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import numpy as np
+from numpy.typing import DTypeLike
+
+_SUPPORTED = (np.dtype(np.float32), np.dtype(np.float64))
+
+# Dtype of new height maps. Loaders and factories take a per-call ``dtype``
+# overriding it; transforms and decompose() keep the dtype of their input.
+# Reductions (moments, material ratio, form least squares) accumulate in
+# float64 whatever the storage dtype.
+_default_dtype = np.dtype(np.float64)
+
+
+def _check(dtype: DTypeLike) -> np.dtype:
+    resolved = np.dtype(dtype)
+    if resolved not in _SUPPORTED:
+        raise ValueError(
+            f"Unsupported height dtype {resolved}, expected float32 or float64"
+        )
+    return resolved
+
+
+def get_default_dtype() -> np.dtype:
+    """The dtype new height maps are stored in."""
+    return _default_dtype
+
+
+def set_default_dtype(dtype: DTypeLike) -> None:
+    """Set the dtype new height maps are stored in (float32 or float64)."""
+    global _default_dtype
+    _default_dtype = _check(dtype)
+
+
+@contextmanager
+def default_dtype(dtype: DTypeLike) -> Iterator[None]:
+    """Temporarily change the default height dtype.
+
+    Examples
+    --------
+    >>> with default_dtype(np.float32):
+    ...     surface = Surface.from_datx("measurement.datx")
+    """
+    previous = get_default_dtype()
+    set_default_dtype(dtype)
+    try:
+        yield
+    finally:
+        set_default_dtype(previous)
+
+
+def resolve_dtype(dtype: DTypeLike | None) -> np.dtype:
+    """A per-call ``dtype`` argument, or the default when it is None."""
+    return get_default_dtype() if dtype is None else _check(dtype)
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import sys
+import threading
+from dataclasses import dataclass, field
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING, Any, Self
+
+import numpy as np
+from numpy.typing import DTypeLike
+
+from surface_analysis.surface import Surface
+
+if TYPE_CHECKING:
+    from surface_analysis.decomposition import Decomposition
+    from surface_analysis.transforms.projection import PolynomialFit
+
+_LAYERS = ("form", "waviness", "roughness", "micro_roughness", "primary")
+
+_ATTACH_LOCK = threading.Lock()
+
+
+def _open_segment(name: str) -> SharedMemory:
+    """Attach to an existing segment without taking part in its cleanup.
+
+    Before Python 3.13 every attach registers the segment with the
+    process's resource tracker, which unlinks it (and warns about a leak)
+    when that process exits, even though the creator still owns it.
+    Registration is suppressed for the duration of the attach.
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    with _ATTACH_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+@dataclass(frozen=True)
+class SharedSurfaceRef:
+    """Everything a process needs to attach to a shared surface.
+
+    A few dozen bytes to pickle, whatever the size of the height map.
+    """
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+    step_x: float
+    step_y: float
+    x0: float = 0.0
+    y0: float = 0.0
+
+    def attach(self) -> SharedSurface:
+        """Map the segment into this process, without copying."""
+        return SharedSurface(_open_segment(self.name), self, owner=False)
+
+
+class SharedSurface:
+    """A ``Surface`` whose height map lives in a shared memory segment.
+
+    Worker processes attach to the segment by name and see the same pixels
+    without copying: writes from either side are visible to the other.
+    Pickling a ``SharedSurface`` (e.g. passing it to a
+    ``ProcessPoolExecutor``) sends only its ``SharedSurfaceRef``; the
+    receiving process attaches on unpickling.
+
+    The segment's lifetime is explicit. Every process calls ``close()`` when
+    done with its mapping; the creating process also calls ``unlink()`` to
+    free the memory once no process needs it any more. Using the owner as a
+    context manager does both.
+
+    Parameters
+    ----------
+    shm : SharedMemory
+        The mapped segment.
+    ref : SharedSurfaceRef
+        Layout of the height map in the segment.
+    owner : bool
+        Whether this object created the segment (and unlinks it on exit).
+    """
+
+    def __init__(self, shm: SharedMemory, ref: SharedSurfaceRef, owner: bool) -> None:
+        self._shm = shm
+        self.ref = ref
+        self.owner = owner
+        # frombuffer holds a buffer export on the mapping (np.ndarray(buffer=)
+        # does not), so close() refuses to unmap under a live view.
+        assert shm.buf is not None
+        count = int(np.prod(ref.shape))
+        z = np.frombuffer(shm.buf, dtype=ref.dtype, count=count).reshape(ref.shape)
+        self._surface: Surface | None = Surface(
+            z=z, step_x=ref.step_x, step_y=ref.step_y, x0=ref.x0, y0=ref.y0
+        )
+
+    @classmethod
+    def empty(
+        cls,
+        shape: tuple[int, ...],
+        step_x: float,
+        step_y: float,
+        dtype: DTypeLike = np.float64,
+        x0: float = 0.0,
+        y0: float = 0.0,
+    ) -> SharedSurface:
+        """Create a new, uninitialized shared height map."""
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        shm = SharedMemory(create=True, size=max(nbytes, 1))
+        ref = SharedSurfaceRef(
+            name=shm.name,
+            shape=tuple(int(n) for n in shape),
+            dtype=dtype.str,
+            step_x=float(step_x),
+            step_y=float(step_y),
+            x0=float(x0),
+            y0=float(y0),
+        )
+        return cls(shm, ref, owner=True)
+
+    @classmethod
+    def from_surface(cls, surface: Surface) -> SharedSurface:
+        """Copy a surface into a new shared segment."""
+        shared = cls.empty(
+            surface.shape,
+            surface.step_x,
+            surface.step_y,
+            dtype=surface.z.dtype,
+            x0=surface.x0,
+            y0=surface.y0,
+        )
+        shared.surface.z[...] = surface.z
+        return shared
+
+    @property
+    def surface(self) -> Surface:
+        """The surface, viewing the shared heights."""
+        if self._surface is None:
+            raise ValueError(f"Shared surface {self.ref.name!r} is closed")
+        return self._surface
+
+    def close(self) -> None:
+        """Unmap the segment from this process.
+
+        Arrays viewing the shared heights (``surface.z`` and slices of it)
+        must be dropped first; ``copy()`` what should outlive the segment.
+        """
+        self._surface = None
+        try:
+            self._shm.close()
+        except BufferError:
+            raise BufferError(
+                f"Cannot close shared surface {self.ref.name!r}: arrays viewing "
+                "its heights are still alive"
+            ) from None
+
+    def unlink(self) -> None:
+        """Free the segment; processes still attached keep their mapping."""
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        try:
+            self.close()
+        finally:
+            if self.owner:
+                self.unlink()
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (SharedSurfaceRef.attach, (self.ref,))
+
+    def __repr__(self) -> str:
+        state = "closed" if self._surface is None else "open"
+        return (
+            f"SharedSurface({self.ref.name!r}, shape={self.ref.shape}, "
+            f"dtype={np.dtype(self.ref.dtype)}, {state})"
+        )
+
+
+@dataclass
+class SharedDecomposition:
+    """The layers of a ``Decomposition``, each in its own shared segment.
+
+    Pickles as the layer references plus the cutoffs and form fit; see
+    ``SharedSurface`` for the lifetime rules, which apply to every layer.
+    """
+
+    layers: dict[str, SharedSurface]
+    lambda_c: float
+    lambda_s: float | None
+    form_fit: PolynomialFit | None = None
+    _views: Decomposition | None = field(default=None, init=False, repr=False)
+
+    @classmethod
+    def from_decomposition(cls, dec: Decomposition) -> SharedDecomposition:
+        """Copy every layer of a decomposition into shared memory."""
+        layers = {}
+        try:
+            for name in _LAYERS:
+                layer = getattr(dec, name)
+                if layer is not None:
+                    layers[name] = SharedSurface.from_surface(layer)
+        except BaseException:
+            for shared in layers.values():
+                shared.close()
+                shared.unlink()
+            raise
+        return cls(
+            layers=layers,
+            lambda_c=dec.lambda_c,
+            lambda_s=dec.lambda_s,
+            form_fit=dec.form_fit,
+        )
+
+    @property
+    def decomposition(self) -> Decomposition:
+        """The decomposition, its layers viewing the shared heights."""
+        from surface_analysis.decomposition import Decomposition
+
+        if self._views is None:
+            surfaces = {name: s.surface for name, s in self.layers.items()}
+            self._views = Decomposition.from_layers(
+                form=surfaces["form"],
+                waviness=surfaces["waviness"],
+                roughness=surfaces["roughness"],
+                micro_roughness=surfaces.get("micro_roughness"),
+                primary=surfaces["primary"],
+                lambda_c=self.lambda_c,
+                lambda_s=self.lambda_s,
+                form_fit=self.form_fit,
+            )
+        return self._views
+
+    def close(self) -> None:
+        """Unmap every layer from this process."""
+        self._views = None
+        for shared in self.layers.values():
+            shared.close()
+
+    def unlink(self) -> None:
+        """Free every layer's segment."""
+        for shared in self.layers.values():
+            shared.unlink()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        try:
+            self.close()
+        finally:
+            for shared in self.layers.values():
+                if shared.owner:
+                    shared.unlink()
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_views"] = None
+        return state
@@ -1,27 +1,112 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import TYPE_CHECKING, Literal
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Literal, Self, TypeVar, overload
 
 import numpy as np
-from numpy.typing import NDArray
+from numpy.typing import DTypeLike, NDArray
 
 if TYPE_CHECKING:
     from surface_analysis.abbott_firestone import AbbottFirestone
     from surface_analysis.decomposition import Decomposition
+    from surface_analysis.io import DatxReader
+    from surface_analysis.moments import HeightMoments
+    from surface_analysis.shared import SharedSurface
     from surface_analysis.transforms._base import Transformation
+    from surface_analysis.transforms.projection import Polynomial
+
+_T = TypeVar("_T")
+
+# Attributes whose reassignment invalidates the derived-quantity cache
+_CACHE_KEYS = frozenset({"z", "step_x", "step_y"})
 
 
 @dataclass
 class Surface:
-    z: NDArray[np.float64]  # (ny, nx) height map in mm
+    z: NDArray[np.floating]  # (ny, nx) height map in mm, float64 or float32
     step_x: float  # pixel spacing in mm
     step_y: float  # pixel spacing in mm
+    x0: float = 0.0  # x of the first column in mm
+    y0: float = 0.0  # y of the first row in mm
+
+    # Derived quantities (valid mask, moments, gradients, Abbott-Firestone
+    # curve) memoized per surface. Cleared whenever z or a step is reassigned;
+    # call invalidate() after modifying z in place.
+    _cache: dict[str, Any] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in _CACHE_KEYS and "_cache" in self.__dict__:
+            self._cache.clear()
+        super().__setattr__(name, value)
+
+    # The cache belongs to this object: it is not pickled (it can be several
+    # times the size of the heights) nor shared with shallow copies.
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_cache"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.__dict__["_cache"] = {}
+
+    def __copy__(self) -> Surface:
+        clone = Surface.__new__(Surface)
+        clone.__setstate__(self.__getstate__())
+        return clone
+
+    # --- Derived-quantity cache ---
+
+    def invalidate(self) -> None:
+        """Drop cached derived quantities after an in-place change of ``z``."""
+        self._cache.clear()
+
+    def _cached(self, key: str, compute: Callable[[], _T]) -> _T:
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = compute()
+            return value
+
+    # --- Regions ---
+
+    def __getitem__(self, key: tuple[slice, slice]) -> Surface:
+        """The region ``[rows, cols]`` as a view sharing this surface's heights.
+
+        Strided slices decimate the grid and scale the steps accordingly;
+        the origin moves to the first pixel kept. Nothing is copied: writes
+        through the view change this surface (call ``invalidate()`` on it
+        afterwards), and ``copy()`` detaches a region.
+        """
+        rows, cols = _check_region(key)
+        z = self.z[rows, cols]
+        if z.size == 0:
+            raise ValueError(f"Empty region {key!r} of a surface of shape {self.shape}")
+        grid = _region_grid(
+            rows, cols, self.shape, self.step_x, self.step_y, self.x0, self.y0
+        )
+        return Surface(z=z, **grid)
+
+    def with_heights(self, z: NDArray[np.floating]) -> Surface:
+        """A surface on the same grid (steps and origin) with heights ``z``."""
+        return Surface(
+            z=z, step_x=self.step_x, step_y=self.step_y, x0=self.x0, y0=self.y0
+        )
 
     # --- Arithmetic operators ---
 
     def copy(self) -> Surface:
-        return Surface(z=self.z.copy(), step_x=self.step_x, step_y=self.step_y)
+        return self.with_heights(self.z.copy())
+
+    def share(self) -> SharedSurface:
+        """Copy the surface into shared memory for zero-copy worker access."""
+        from surface_analysis.shared import SharedSurface
+
+        return SharedSurface.from_surface(self)
 
     def _check_compatible(self, other: Surface) -> None:
         if self.shape != other.shape:
@@ -34,43 +119,118 @@ class Surface:
 
     def __add__(self, other: Surface) -> Surface:
         self._check_compatible(other)
-        return Surface(z=self.z + other.z, step_x=self.step_x, step_y=self.step_y)
+        return self.with_heights(self.z + other.z)
 
     def __sub__(self, other: Surface) -> Surface:
         self._check_compatible(other)
-        return Surface(z=self.z - other.z, step_x=self.step_x, step_y=self.step_y)
+        return self.with_heights(self.z - other.z)
 
     def __mul__(self, scalar: float) -> Surface:
-        return Surface(z=self.z * scalar, step_x=self.step_x, step_y=self.step_y)
+        return self.with_heights(self.z * scalar)
 
     def __rmul__(self, scalar: float) -> Surface:
         return self.__mul__(scalar)
 
     def __truediv__(self, scalar: float) -> Surface:
-        return Surface(z=self.z / scalar, step_x=self.step_x, step_y=self.step_y)
+        return self.with_heights(self.z / scalar)
 
     def __neg__(self) -> Surface:
-        return Surface(z=-self.z, step_x=self.step_x, step_y=self.step_y)
+        return self.with_heights(-self.z)
+
+    # In-place operators write into ``z`` instead of allocating a new array
+
+    def __iadd__(self, other: Surface) -> Self:
+        self._check_compatible(other)
+        np.add(self.z, other.z, out=self.z)
+        self.invalidate()
+        return self
+
+    def __isub__(self, other: Surface) -> Self:
+        self._check_compatible(other)
+        np.subtract(self.z, other.z, out=self.z)
+        self.invalidate()
+        return self
+
+    def __imul__(self, scalar: float) -> Self:
+        np.multiply(self.z, scalar, out=self.z)
+        self.invalidate()
+        return self
+
+    def __itruediv__(self, scalar: float) -> Self:
+        np.divide(self.z, scalar, out=self.z)
+        self.invalidate()
+        return self
 
     # --- Transforms ---
 
-    def apply(self, *transforms: Transformation) -> Surface:
-        result = self
+    def apply(self, *transforms: Transformation, inplace: bool = False) -> Surface:
+        """Apply transforms in order.
+
+        With ``inplace=True``, every result is written into this surface's
+        height array, which is returned: transforms accepting ``out=`` then
+        allocate no output array, and the result of any other transform is
+        copied back.
+        """
+        from surface_analysis.transforms._base import accepts_out
+
+        if not inplace:
+            result = self
+            for t in transforms:
+                result = t.transform(result)
+            return result
         for t in transforms:
-            result = t.transform(result)
-        return result
+            if accepts_out(t):
+                t.transform(self, out=self.z)  # type: ignore[call-arg]
+            else:
+                result = t.transform(self)
+                if result is not self:
+                    np.copyto(self.z, result.z)
+            self.invalidate()
+        return self
 
     # --- Factory methods ---
 
+    @overload
+    @classmethod
+    def from_datx(
+        cls,
+        path: str,
+        lazy: Literal[False] = False,
+        dtype: DTypeLike | None = None,
+    ) -> Surface: ...
+
+    @overload
+    @classmethod
+    def from_datx(
+        cls, path: str, lazy: Literal[True], dtype: DTypeLike | None = None
+    ) -> DatxReader: ...
+
     @classmethod
-    def from_datx(cls, path: str) -> Surface:
-        from surface_analysis.io import load_datx
+    def from_datx(
+        cls, path: str, lazy: bool = False, dtype: DTypeLike | None = None
+    ) -> Surface | DatxReader:
+        """Load a Zygo .datx measurement, in ``dtype`` (default policy).
+
+        With ``lazy=True``, return a ``DatxReader`` that keeps the file open
+        and reads regions on demand (``reader[rows, cols]``) instead of
+        loading every pixel.
+        """
+        from surface_analysis.io import DatxReader, load_datx
 
-        return load_datx(path)
+        if lazy:
+            return DatxReader(path, dtype=dtype)
+        return load_datx(path, dtype=dtype)
 
     @classmethod
-    def from_array(cls, z: NDArray, step_x: float, step_y: float) -> Surface:
-        return cls(z=np.asarray(z, dtype=np.float64), step_x=step_x, step_y=step_y)
+    def from_array(
+        cls, z: NDArray, step_x: float, step_y: float, dtype: DTypeLike | None = None
+    ) -> Surface:
+        """Wrap a height map (mm), converted to ``dtype`` (default policy)."""
+        from surface_analysis.precision import resolve_dtype
+
+        return cls(
+            z=np.asarray(z, dtype=resolve_dtype(dtype)), step_x=step_x, step_y=step_y
+        )
 
     # --- Geometry ---
 
@@ -92,99 +252,179 @@ class Surface:
 
     @property
     def x(self) -> NDArray[np.floating]:
-        return np.arange(self.z.shape[1]) * self.step_x
+        return self.x0 + np.arange(self.z.shape[1]) * self.step_x
 
     @property
     def y(self) -> NDArray[np.floating]:
-        return np.arange(self.z.shape[0]) * self.step_y
+        return self.y0 + np.arange(self.z.shape[0]) * self.step_y
 
     @property
     def nan_count(self) -> int:
-        return int(np.isnan(self.z).sum())
+        return self._cached("nan_count", lambda: int(np.isnan(self.z).sum()))
 
     @property
     def nan_ratio(self) -> float:
-        return np.isnan(self.z).sum() / self.z.size
+        return self.nan_count / self.z.size
 
     # --- ISO 25178 height parameters ---
 
     @property
-    def _valid(self) -> NDArray[np.float64]:
-        return self.z[np.isfinite(self.z)]
+    def _valid_mask(self) -> NDArray[np.bool_]:
+        return self._cached("valid_mask", lambda: _readonly(np.isfinite(self.z)))
+
+    @property
+    def _valid(self) -> NDArray[np.floating]:
+        def compute() -> NDArray[np.floating]:
+            mask = self._valid_mask
+            return _readonly(self.z.ravel() if mask.all() else self.z[mask])
+
+        return self._cached("valid", compute)
+
+    @property
+    def moments(self) -> HeightMoments:
+        """Height distribution moments over the finite pixels (single pass)."""
+        from surface_analysis.moments import HeightMoments
+
+        return self._cached("moments", lambda: HeightMoments.from_values(self._valid))
 
     @property
     def Sa(self) -> float:
-        v = self._valid
-        return float(np.mean(np.abs(v - np.mean(v))))
+        return self.moments.Sa
 
     @property
     def Sq(self) -> float:
-        v = self._valid
-        return float(np.sqrt(np.mean((v - np.mean(v)) ** 2)))
+        return self.moments.Sq
 
     @property
     def Sp(self) -> float:
-        v = self._valid
-        return float(np.max(v) - np.mean(v))
+        return self.moments.Sp
 
     @property
     def Sv(self) -> float:
-        v = self._valid
-        return float(np.mean(v) - np.min(v))
+        return self.moments.Sv
 
     @property
     def Sz(self) -> float:
-        return self.Sp + self.Sv
+        return self.moments.Sz
 
     @property
     def Ssk(self) -> float:
-        v = self._valid
-        mean = np.mean(v)
-        sq = self.Sq
-        if sq == 0:
-            return 0.0
-        return float(np.mean((v - mean) ** 3) / sq**3)
+        return self.moments.Ssk
 
     @property
     def Sku(self) -> float:
-        v = self._valid
-        mean = np.mean(v)
-        sq = self.Sq
-        if sq == 0:
-            return 0.0
-        return float(np.mean((v - mean) ** 4) / sq**4)
+        return self.moments.Sku
 
     # --- ISO 25178 hybrid parameters ---
 
+    def gradient(
+        self, dtype: DTypeLike | None = None
+    ) -> tuple[NDArray[np.floating], NDArray[np.floating]]:
+        """Height gradient (dz/dx, dz/dy), shared by the slope-based parameters.
+
+        Same values as ``np.gradient`` (central differences, one-sided at the
+        edges), written straight into one output buffer per axis. The field
+        is cached per dtype and returned read-only. It defaults to the dtype
+        of the heights; ``dtype=np.float32`` halves its memory.
+        """
+        dtype = self.z.dtype if dtype is None else np.dtype(dtype)
+
+        def compute() -> tuple[NDArray[np.floating], NDArray[np.floating]]:
+            dzdx = _gradient_into(self.z, self.step_x, 1, np.empty(self.shape, dtype))
+            dzdy = _gradient_into(self.z, self.step_y, 0, np.empty(self.shape, dtype))
+            return _readonly(dzdx), _readonly(dzdy)
+
+        return self._cached(f"gradient_{dtype.str}", compute)
+
+    def _slope_sq(self, dtype: DTypeLike | None = None) -> NDArray[np.floating]:
+        """Squared local slope |grad z|^2, cached alongside the gradient."""
+        dtype = self.z.dtype if dtype is None else np.dtype(dtype)
+
+        def compute() -> NDArray[np.floating]:
+            dzdx, dzdy = self.gradient(dtype)
+            slope_sq = np.multiply(dzdx, dzdx)
+            slope_sq += dzdy * dzdy
+            return _readonly(slope_sq)
+
+        return self._cached(f"slope_sq_{dtype.str}", compute)
+
+    @staticmethod
+    def _Sdq(slope_sq: NDArray[np.floating]) -> float:
+        return float(np.sqrt(_finite_mean(slope_sq)))
+
+    @staticmethod
+    def _Sdr(slope_sq: NDArray[np.floating]) -> float:
+        return float(_finite_mean(_area_excess(slope_sq)) * 100)
+
+    @staticmethod
+    def _Sdr_triangulated(
+        z: NDArray[np.floating], step_x: float, step_y: float
+    ) -> float:
+        # Each quad cell is split along its (0, 0)-(1, 1) diagonal. Relative
+        # to the projected cell, the triangle on the lower-right has area
+        # sqrt(1 + p_bottom^2 + q_right^2) / 2 and the upper-left one
+        # sqrt(1 + p_top^2 + q_left^2) / 2, with p, q the edge slopes.
+        p_sq = np.diff(z, axis=1)
+        p_sq *= 1.0 / step_x
+        p_sq *= p_sq
+        q_sq = np.diff(z, axis=0)
+        q_sq *= 1.0 / step_y
+        q_sq *= q_sq
+        lower = p_sq[:-1] + q_sq[:, 1:]
+        _area_excess(lower, out=lower)
+        upper = np.add(p_sq[1:], q_sq[:, :-1], out=p_sq[1:])
+        lower += _area_excess(upper, out=upper)
+        lower *= 0.5
+        return float(_finite_mean(lower) * 100)
+
     @property
     def Sdq(self) -> float:
-        z = self.z
-        dzdx = np.gradient(z, self.step_x, axis=1)
-        dzdy = np.gradient(z, self.step_y, axis=0)
-        slope_sq = dzdx**2 + dzdy**2
-        valid = slope_sq[np.isfinite(slope_sq)]
-        return float(np.sqrt(np.mean(valid)))
+        return self._Sdq(self._slope_sq())
 
     @property
     def Sdr(self) -> float:
-        z = self.z
-        dzdx = np.gradient(z, self.step_x, axis=1)
-        dzdy = np.gradient(z, self.step_y, axis=0)
-        local_area = np.sqrt(1 + dzdx**2 + dzdy**2)
-        valid = local_area[np.isfinite(local_area)]
-        return float((np.mean(valid) - 1) * 100)
+        return self._Sdr(self._slope_sq())
+
+    def developed_area_ratio(
+        self, method: Literal["gradient", "triangulation"] = "gradient"
+    ) -> float:
+        """Developed interfacial area ratio Sdr in %.
+
+        Parameters
+        ----------
+        method : {"gradient", "triangulation"}
+            ``"gradient"`` integrates sqrt(1 + |grad z|^2) over the pixels
+            (the :attr:`Sdr` property). ``"triangulation"`` sums the exact
+            areas of two triangles per grid cell (ISO 25178-2 definition of
+            the developed area); cells with a NaN corner are excluded.
+        """
+        if method == "gradient":
+            return self.Sdr
+        if method == "triangulation":
+            return self._cached(
+                "sdr_triangulated",
+                lambda: self._Sdr_triangulated(self.z, self.step_x, self.step_y),
+            )
+        raise ValueError(
+            f"Unknown method {method!r}, expected 'gradient' or 'triangulation'"
+        )
 
     def parameters(self) -> dict[str, float]:
+        return dict(self._cached("parameters", self._compute_parameters))
+
+    def _compute_parameters(self) -> dict[str, float]:
+        m = self.moments
+        slope_sq = self._slope_sq()
         return {
-            "Sa": self.Sa,
-            "Sq": self.Sq,
-            "Sp": self.Sp,
-            "Sv": self.Sv,
-            "Sz": self.Sz,
-            "Ssk": self.Ssk,
-            "Sku": self.Sku,
-            "Sdq": self.Sdq,
-            "Sdr": self.Sdr,
+            "Sa": m.Sa,
+            "Sq": m.Sq,
+            "Sp": m.Sp,
+            "Sv": m.Sv,
+            "Sz": m.Sz,
+            "Ssk": m.Ssk,
+            "Sku": m.Sku,
+            "Sdq": self._Sdq(slope_sq),
+            "Sdr": self._Sdr(slope_sq),
         }
 
     # --- ISO 13565-2 / Abbott-Firestone parameters ---
@@ -194,7 +434,9 @@ class Surface:
         """Build the Abbott-Firestone (bearing area) curve for this surface."""
         from surface_analysis.abbott_firestone import AbbottFirestone
 
-        return AbbottFirestone.from_surface(self.z)
+        return self._cached(
+            "abbott_firestone", lambda: AbbottFirestone.from_values(self._valid)
+        )
 
     @property
     def Sk(self) -> float:
@@ -228,10 +470,11 @@ class Surface:
 
     def decompose(
         self,
-        form: Literal["plane", "polynomial"] = "polynomial",
+        form: Literal["plane", "polynomial"] | Polynomial = "polynomial",
         lambda_c: float = 0.8,
         lambda_s: float | None = None,
-        interpolation: Literal["linear", "nearest"] = "linear",
+        interpolation: Literal["linear", "nearest", "laplace", "biharmonic"] = "linear",
+        workers: int = 1,
     ) -> Decomposition:
         """Decompose surface into form, waviness, roughness, and micro-roughness.
 
@@ -240,76 +483,53 @@ class Surface:
 
         Parameters
         ----------
-        form : {"plane", "polynomial"}
+        form : {"plane", "polynomial"} or Polynomial
             Form removal strategy. "plane" fits degree 1, "polynomial" degree 2.
+            A ``Polynomial`` transform sets the degree and fit subsampling,
+            e.g. ``Polynomial(degree=2, max_fit_points=100_000)`` on large
+            maps; its ``mode`` is ignored.
         lambda_c : float
             Cutoff wavelength (mm) separating waviness from roughness.
         lambda_s : float or None
             Cutoff wavelength (mm) separating roughness from micro-roughness.
             If None, roughness includes all wavelengths below lambda_c.
-        interpolation : {"linear", "nearest"}
-            Method to fill NaN values before decomposition.
+        interpolation : {"linear", "nearest", "laplace", "biharmonic"}
+            Method to fill NaN values before decomposition. "laplace" and
+            "biharmonic" solve a smooth fill over the NaN pixels, suited to
+            large irregular dropouts.
+        workers : int
+            Number of threads for the NaN fill ("linear" and "nearest"), the
+            form fit and the Gaussian filters. The result does not depend on
+            it, up to floating-point summation order in the form fit.
 
         Returns
         -------
         Decomposition
-            Dataclass with form, waviness, roughness, micro_roughness surfaces.
+            Form, waviness, roughness and micro-roughness surfaces, each
+            computed on first access. With a disk cache enabled
+            (``surface_analysis.cache.set_cache``), read from the cache
+            when this surface was already decomposed the same way.
         """
+        from surface_analysis.cache import get_cache
         from surface_analysis.decomposition import Decomposition
-        from surface_analysis.transforms.filtering import Gaussian
-        from surface_analysis.transforms.interpolation import Linear, Nearest
-        from surface_analysis.transforms.projection import Polynomial
 
-        # Resolve interpolation
-        interp_map = {"linear": Linear, "nearest": Nearest}
-        if interpolation not in interp_map:
-            raise ValueError(
-                f"Unknown interpolation {interpolation!r}, "
-                f"expected one of {list(interp_map)}"
+        cache = get_cache()
+        if cache is not None:
+            return cache.decompose(
+                self,
+                form=form,
+                lambda_c=lambda_c,
+                lambda_s=lambda_s,
+                interpolation=interpolation,
+                workers=workers,
             )
-
-        # Resolve form → polynomial degree
-        form_map: dict[str, int] = {"plane": 1, "polynomial": 2}
-        if form not in form_map:
-            raise ValueError(f"Unknown form {form!r}, expected one of {list(form_map)}")
-        degree = form_map[form]
-
-        # Preprocessing — fill NaN for filtering, but remember original mask
-        nan_mask = np.isnan(self.z)
-        filled = self.apply(interp_map[interpolation]())
-
-        # F-operator — extract form, derive primary by subtraction
-        form_surface = filled.apply(Polynomial(degree=degree, mode="form"))
-        primary = filled - form_surface
-
-        # Spectral decomposition — ISO 25178-3 F/S/L pipeline
-        waviness = primary.apply(Gaussian(cutoff=lambda_c, mode="lowpass"))
-
-        if lambda_s is not None:
-            roughness = primary.apply(
-                Gaussian(cutoff=lambda_s, mode="lowpass"),
-                Gaussian(cutoff=lambda_c, mode="highpass"),
-            )
-            micro_roughness = primary.apply(Gaussian(cutoff=lambda_s, mode="highpass"))
-        else:
-            roughness = primary.apply(Gaussian(cutoff=lambda_c, mode="highpass"))
-            micro_roughness = None
-
-        # Restore original NaN mask — interpolation is for filtering only,
-        # interpolated pixels must not influence ISO parameter computation.
-        if nan_mask.any():
-            for surf in (form_surface, primary, waviness, roughness, micro_roughness):
-                if surf is not None:
-                    surf.z[nan_mask] = np.nan
-
-        return Decomposition(
-            form=form_surface,
-            waviness=waviness,
-            roughness=roughness,
-            micro_roughness=micro_roughness,
-            primary=primary,
+        return Decomposition.from_surface(
+            self,
+            form=form,
             lambda_c=lambda_c,
             lambda_s=lambda_s,
+            interpolation=interpolation,
+            workers=workers,
         )
 
     # --- Visualization ---
@@ -355,8 +575,95 @@ class Surface:
 
     def __repr__(self) -> str:
         ny, nx = self.shape
+        origin = (
+            f"origin=({self.x0:.4f}, {self.y0:.4f}) mm, " if self.x0 or self.y0 else ""
+        )
         return (
             f"Surface({nx}x{ny}, "
             f"step=({self.step_x:.4f}, {self.step_y:.4f}) mm, "
-            f"nan={self.nan_ratio:.1%})"
+            f"{origin}nan={self.nan_ratio:.1%})"
+        )
+
+
+def _check_region(key: object) -> tuple[slice, slice]:
+    """Validate a ``[rows, cols]`` region key: two slices, positive steps."""
+    if not (
+        isinstance(key, tuple)
+        and len(key) == 2
+        and all(isinstance(k, slice) for k in key)
+    ):
+        raise ValueError(f"Expected a [rows, cols] pair of slices, got {key!r}")
+    rows, cols = key
+    if (rows.step or 1) < 1 or (cols.step or 1) < 1:
+        raise ValueError("Slice steps must be positive")
+    return rows, cols
+
+
+def _region_grid(
+    rows: slice,
+    cols: slice,
+    shape: tuple[int, ...],
+    step_x: float,
+    step_y: float,
+    x0: float = 0.0,
+    y0: float = 0.0,
+) -> dict[str, float]:
+    """Steps and origin of the region ``[rows, cols]`` of a grid."""
+    return {
+        "step_x": step_x * (cols.step or 1),
+        "step_y": step_y * (rows.step or 1),
+        "x0": x0 + cols.indices(shape[1])[0] * step_x,
+        "y0": y0 + rows.indices(shape[0])[0] * step_y,
+    }
+
+
+def _gradient_into(
+    z: NDArray[np.floating], step: float, axis: int, out: NDArray[np.floating]
+) -> NDArray[np.floating]:
+    """np.gradient(z, step, axis=axis) computed into ``out``."""
+    n = z.shape[axis]
+    if n < 2:
+        raise ValueError(
+            "Shape of array too small to calculate a numerical gradient, "
+            "at least 2 elements are required."
         )
+
+    def sl(start: int | None, stop: int | None) -> tuple[slice, ...]:
+        index = [slice(None)] * z.ndim
+        index[axis] = slice(start, stop)
+        return tuple(index)
+
+    np.subtract(z[sl(2, None)], z[sl(None, -2)], out=out[sl(1, -1)])
+    out[sl(1, -1)] /= 2.0 * step
+    np.subtract(z[sl(1, 2)], z[sl(0, 1)], out=out[sl(0, 1)])
+    np.subtract(z[sl(-1, None)], z[sl(-2, -1)], out=out[sl(-1, None)])
+    out[sl(0, 1)] /= step
+    out[sl(-1, None)] /= step
+    return out
+
+
+def _area_excess(
+    slope_sq: NDArray[np.floating], out: NDArray[np.floating] | None = None
+) -> NDArray[np.floating]:
+    """sqrt(1 + slope_sq) - 1, the relative area excess of a tilted facet.
+
+    Computed as slope_sq / (sqrt(1 + slope_sq) + 1), which avoids the
+    cancellation of subtracting 1 on nearly flat surfaces, where the excess
+    falls below float32 (or even float64) resolution around 1.
+    """
+    denominator = np.add(slope_sq, 1.0)
+    np.sqrt(denominator, out=denominator)
+    denominator += 1.0
+    return np.divide(slope_sq, denominator, out=denominator if out is None else out)
+
+
+def _finite_mean(a: NDArray[np.floating]) -> float:
+    """Mean of the finite values of ``a``, accumulated in float64."""
+    mask = np.isfinite(a)
+    return float(np.mean(a if mask.all() else a[mask], dtype=np.float64))
+
+
+def _readonly(array: NDArray[Any]) -> NDArray[Any]:
+    """Mark a cached array read-only so callers cannot corrupt the cache."""
+    array.flags.writeable = False
+    return array
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import math
+import tempfile
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
+
+import h5py
+import numpy as np
+from numpy.typing import DTypeLike
+
+from surface_analysis.precision import resolve_dtype
+from surface_analysis.surface import Surface
+
+if TYPE_CHECKING:
+    from surface_analysis.transforms.projection import Polynomial, PolynomialFit
+
+# Peak full-size arrays per window pixel while a tile is decomposed: the
+# window, its fill, form and primary, two lowpasses, the band layers and
+# the filter's padded scratch. Sets the tile size from the memory budget.
+_WINDOW_ARRAYS = 14
+
+
+@dataclass(frozen=True)
+class _Tile:
+    """A core block of the grid and the haloed window it is computed from."""
+
+    core: tuple[slice, slice]
+    window: tuple[slice, slice]
+
+    @property
+    def inner(self) -> tuple[slice, slice]:
+        """The core, in window coordinates."""
+        return tuple(  # type: ignore[return-value]
+            slice(c.start - w.start, c.stop - w.start)
+            for c, w in zip(self.core, self.window, strict=True)
+        )
+
+
+def _tiles(
+    shape: tuple[int, int], core_shape: tuple[int, int], halo: tuple[int, int]
+) -> Iterator[_Tile]:
+    """Cover the grid with core blocks, each widened by the halo where possible."""
+    ny, nx = shape
+    ty, tx = core_shape
+    hy, hx = halo
+    for r0 in range(0, ny, ty):
+        r1 = min(r0 + ty, ny)
+        for c0 in range(0, nx, tx):
+            c1 = min(c0 + tx, nx)
+            yield _Tile(
+                core=(slice(r0, r1), slice(c0, c1)),
+                window=(
+                    slice(max(r0 - hy, 0), min(r1 + hy, ny)),
+                    slice(max(c0 - hx, 0), min(c1 + hx, nx)),
+                ),
+            )
+
+
+def _halo(step_x: float, step_y: float, cutoff: float) -> tuple[int, int]:
+    """Gaussian kernel radius (pixels, y then x) of the largest cutoff."""
+    from surface_analysis.transforms.filtering import _ISO_SIGMA_FACTOR, _kernel_radius
+
+    sigma_mm = cutoff * _ISO_SIGMA_FACTOR
+    return _kernel_radius(sigma_mm / step_y), _kernel_radius(sigma_mm / step_x)
+
+
+def _core_shape(
+    shape: tuple[int, int],
+    halo: tuple[int, int],
+    memory_budget: int,
+    itemsize: int = 8,
+) -> tuple[int, int]:
+    """Largest core block whose haloed window fits the memory budget."""
+    ny, nx = shape
+    hy, hx = halo
+    bytes_per_pixel = _WINDOW_ARRAYS * itemsize
+    budget_pixels = memory_budget // bytes_per_pixel
+    if ny * nx <= budget_pixels:
+        return ny, nx
+    side = math.isqrt(budget_pixels)
+    ty = min(ny, side - 2 * hy)
+    tx = min(nx, budget_pixels // min(ny, ty + 2 * hy) - 2 * hx)
+    if ty < 1 or tx < 1:
+        needed = (2 * hy + 1) * (2 * hx + 1) * bytes_per_pixel
+        raise ValueError(
+            f"memory_budget of {memory_budget} bytes cannot hold a tile with a "
+            f"{hy}x{hx} pixel halo; need at least {needed} bytes"
+        )
+    return ty, tx
+
+
+def _sampled(
+    block: np.ndarray, core: tuple[slice, slice], stride: int
+) -> tuple[np.ndarray, int, int]:
+    """Pixels of a core block on the global fit grid, and their sampled origin."""
+    r0, c0 = core[0].start, core[1].start
+    first_r = -(-r0 // stride) * stride
+    first_c = -(-c0 // stride) * stride
+    sample = block[first_r - r0 :: stride, first_c - c0 :: stride]
+    return sample, first_r // stride, first_c // stride
+
+
+def decompose_tiled(
+    source: str | Path,
+    output: str | Path,
+    dataset: str = "z",
+    form: Literal["plane", "polynomial"] | Polynomial = "polynomial",
+    lambda_c: float = 0.8,
+    lambda_s: float | None = None,
+    interpolation: Literal["linear", "nearest", "laplace", "biharmonic"] = "linear",
+    memory_budget: int = 1 << 30,
+    dtype: DTypeLike | None = None,
+) -> PolynomialFit:
+    """Decompose an HDF5 surface tile by tile, with bounded memory.
+
+    Same pipeline as ``Surface.decompose``, for height maps that do not fit
+    in memory. The grid is split into core blocks, each processed inside a
+    window widened by a halo of one Gaussian kernel radius (4 sigma) of the
+    largest cutoff. Only the cores are written, so the layers stitch
+    without seams and match the in-memory result (up to FFT round-off with
+    the default filter backend). NaN holes are filled inside the same
+    windows and match the in-memory fill when they lie within a halo of
+    their core.
+
+    Two passes stream the surface: the first fills NaN pixels into a
+    scratch file next to ``output`` and accumulates the form's normal
+    equations; the second removes the form, filters and writes each layer.
+
+    Parameters
+    ----------
+    source : str or Path
+        HDF5 file holding the height map (mm), as written by
+        ``io.save_hdf5``.
+    output : str or Path
+        HDF5 file receiving the ``form``, ``primary``, ``waviness``,
+        ``roughness`` and (with ``lambda_s``) ``micro_roughness`` datasets,
+        each readable with ``io.load_hdf5``. Existing datasets of the same
+        names are replaced.
+    dataset : str
+        Name of the height dataset in ``source``.
+    form, lambda_c, lambda_s, interpolation
+        See ``Surface.decompose``. A window cannot see the triangulation of
+        the whole surface, so "linear" triangulates each hole's
+        neighbourhood (``Linear(local=True)``).
+    memory_budget : int
+        Approximate peak memory, in bytes, for a tile's working arrays.
+    dtype : dtype or None
+        Precision of the tiles and of the output layers; defaults to the
+        precision policy's (see ``surface_analysis.precision``). float32
+        fits tiles twice as large in the same budget.
+
+    Returns
+    -------
+    PolynomialFit
+        The form fitted over the whole surface.
+    """
+    from surface_analysis.decomposition import (
+        Decomposition,
+        _resolve_form,
+        _resolve_interpolation,
+    )
+    from surface_analysis.transforms.interpolation import Linear
+    from surface_analysis.transforms.projection import (
+        _fit_stride_for,
+        _NormalEquations,
+    )
+
+    dtype = resolve_dtype(dtype)
+    interp = (
+        Linear(local=True)
+        if interpolation == "linear"
+        else _resolve_interpolation(interpolation)
+    )
+    form_model = _resolve_form(form)
+    cutoff = max(lambda_c, lambda_s or 0.0)
+
+    with (
+        h5py.File(source, "r") as src,
+        tempfile.TemporaryDirectory(dir=Path(output).parent) as scratch_dir,
+        h5py.File(Path(scratch_dir) / "filled.h5", "w") as scratch,
+        h5py.File(output, "a") as out,
+    ):
+        heights = src[dataset]
+        shape = heights.shape
+        step_x = float(heights.attrs["step_x"])
+        step_y = float(heights.attrs["step_y"])
+        halo = _halo(step_x, step_y, cutoff)
+        core_shape = _core_shape(shape, halo, memory_budget, dtype.itemsize)
+        tiles = list(_tiles(shape, core_shape, halo))
+        x0 = float(heights.attrs.get("x0", 0.0))
+        y0 = float(heights.attrs.get("y0", 0.0))
+        x = x0 + np.arange(shape[1]) * step_x
+        y = y0 + np.arange(shape[0]) * step_y
+
+        stride = max(
+            form_model.fit_stride, _fit_stride_for(shape, form_model.max_fit_points)
+        )
+        equations = _NormalEquations(x, y, form_model.degree, stride)
+
+        # Pass 1 — fill NaN holes and accumulate the form's normal equations
+        filled = scratch.create_dataset("filled", shape=shape, dtype=dtype)
+        for tile in tiles:
+            rows, cols = tile.window
+            window = Surface(
+                z=heights[tile.window].astype(dtype, copy=False),
+                step_x=step_x,
+                step_y=step_y,
+                x0=float(x[cols.start]),
+                y0=float(y[rows.start]),
+            )
+            if window.nan_count:
+                window = interp.transform(window)
+            core = window.z[tile.inner]
+            filled[tile.core] = core
+            equations.add(*_sampled(core, tile.core, stride))
+        equations.solve()
+
+        layers = ["form", "primary", "waviness", "roughness"]
+        if lambda_s is not None:
+            layers.append("micro_roughness")
+        for name in layers:
+            if name in out:
+                del out[name]
+            ds = out.create_dataset(name, shape=shape, dtype=dtype, chunks=True)
+            ds.attrs["step_x"] = step_x
+            ds.attrs["step_y"] = step_y
+            ds.attrs["x0"] = x0
+            ds.attrs["y0"] = y0
+        out.attrs["lambda_c"] = lambda_c
+        if lambda_s is not None:
+            out.attrs["lambda_s"] = lambda_s
+        elif "lambda_s" in out.attrs:
+            del out.attrs["lambda_s"]
+
+        # Pass 2 — remove the global form from each window, decompose it and
+        # keep its core. Residuals of the fitted pixels are gathered on the
+        # way for the coefficient standard errors.
+        form_fit = equations.result()
+        for tile in tiles:
+            rows, cols = tile.window
+            primary = Surface(
+                z=filled[tile.window],
+                step_x=step_x,
+                step_y=step_y,
+                x0=float(x[cols.start]),
+                y0=float(y[rows.start]),
+            )
+            equations.add_residuals(*_sampled(primary.z[tile.inner], tile.core, stride))
+            form_fit.subtract_from(primary.z, primary.x, primary.y)
+            nan_mask = np.isnan(heights[tile.window])
+            dec = Decomposition(
+                primary,
+                lambda_c=lambda_c,
+                lambda_s=lambda_s,
+                form_fit=form_fit,
+                nan_mask=nan_mask if nan_mask.any() else None,
+            ).materialize()
+            for name in layers:
+                out[name][tile.core] = getattr(dec, name).z[tile.inner]
+
+        form_fit = equations.result()
+        out.attrs["form_degree"] = form_fit.degree
+        out.attrs["form_coefficients"] = form_fit.coefficients
+
+    return form_fit
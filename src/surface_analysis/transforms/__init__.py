@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from surface_analysis.transforms._base import Transformation
 from surface_analysis.transforms.filtering import Gaussian
-from surface_analysis.transforms.interpolation import Linear, Nearest
+from surface_analysis.transforms.interpolation import Inpaint, Linear, Nearest
 from surface_analysis.transforms.projection import Plane, Polynomial
 
 
@@ -10,6 +10,7 @@ class Transforms:
     class Interpolation:
         Linear = Linear
         Nearest = Nearest
+        Inpaint = Inpaint
 
     class Projection:
         Polynomial = Polynomial
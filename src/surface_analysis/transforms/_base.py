@@ -1,11 +1,58 @@
 from __future__ import annotations
 
+import inspect
 from typing import TYPE_CHECKING, Protocol, runtime_checkable
 
+import numpy as np
+
 if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
     from surface_analysis.surface import Surface
 
 
 @runtime_checkable
 class Transformation(Protocol):
+    """Anything with ``transform(surface) -> Surface``.
+
+    A transform may also accept ``out=``, an array of the surface's shape to
+    write its result into instead of allocating one; ``out=surface.z``
+    transforms the surface in place. ``Surface.apply(..., inplace=True)``
+    uses it when available.
+    """
+
     def transform(self, surface: Surface) -> Surface: ...
+
+
+def accepts_out(transform: Transformation) -> bool:
+    """Whether ``transform.transform`` takes an ``out`` array."""
+    return "out" in inspect.signature(transform.transform).parameters
+
+
+def _check_out(surface: Surface, out: NDArray[np.floating]) -> None:
+    if out.shape != surface.shape:
+        raise ValueError(
+            f"Output shape {out.shape} does not match surface shape {surface.shape}"
+        )
+
+
+def _output(surface: Surface, out: NDArray[np.floating] | None) -> NDArray:
+    """Array a transform computes into, starting as a copy of the heights.
+
+    A new copy when ``out`` is None; otherwise ``out``, overwritten with the
+    heights unless it is the height array itself.
+    """
+    if out is None:
+        return surface.z.copy()
+    _check_out(surface, out)
+    if out is not surface.z:
+        np.copyto(out, surface.z)
+    return out
+
+
+def _result(surface: Surface, z: NDArray[np.floating]) -> Surface:
+    """Wrap a transform's output: the surface itself when computed in place."""
+    if z is surface.z:
+        surface.invalidate()
+        return surface
+    return surface.with_heights(z)
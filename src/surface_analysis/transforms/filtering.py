@@ -1,28 +1,345 @@
 from __future__ import annotations
 
+from collections.abc import Callable, Sequence
 from typing import Literal
 
 import numpy as np
-from scipy.ndimage import gaussian_filter
+from numpy.typing import NDArray
+from scipy import fft
+from scipy.ndimage import gaussian_filter, gaussian_filter1d
+from scipy.optimize import brentq
+from scipy.signal import lfilter, lfilter_zi
 
+from surface_analysis._parallel import blocks, check_workers, run_threaded
 from surface_analysis.surface import Surface
-from surface_analysis.transforms._base import Transformation
+from surface_analysis.transforms._base import Transformation, _check_out, _result
 
 # ISO 16610-21: sigma = cutoff * sqrt(ln2 / (2 * pi^2))
 # At the cutoff wavelength, the Gaussian transmits 50% amplitude.
 _ISO_SIGMA_FACTOR = float(np.sqrt(np.log(2) / (2 * np.pi**2)))
 
+# Kernel truncation in sigmas, as in scipy.ndimage.gaussian_filter
+_TRUNCATE = 4.0
 
-def _gaussian_filter_nan(z: np.ndarray, sigma_x: float, sigma_y: float) -> np.ndarray:
+# "auto" switches from the direct convolution to the FFT backend once the
+# kernel radius (in pixels) on either axis exceeds this value.
+_FFT_MIN_RADIUS = 32
+
+# Normalization weights below this floor are treated as "no valid data" for
+# the FFT and recursive backends, whose round-off (FFT) or infinite impulse
+# response (recursive) leave tiny non-zero weights far from any valid pixel.
+_WEIGHT_FLOOR = 1e-10
+
+# Lines processed per block by the recursive backend, so that its scratch
+# memory stays a small fraction of one extra array.
+_RECURSIVE_BLOCK = 256
+
+# Pixels per slab of lines filtered at once by the FFT backend. Its padded,
+# complex and convolved scratch arrays are a few times the slab, not the map.
+_FFT_SLAB_POINTS = 1 << 20
+
+FilterMethod = Literal["auto", "spatial", "fft", "recursive"]
+_METHODS = ("auto", "spatial", "fft", "recursive")
+
+
+def _kernel_radius(sigma: float) -> int:
+    return int(_TRUNCATE * sigma + 0.5)
+
+
+def _gaussian_kernel1d(sigma: float) -> np.ndarray:
+    """Sampled, normalized Gaussian kernel matching scipy.ndimage."""
+    radius = _kernel_radius(sigma)
+    x = np.arange(-radius, radius + 1, dtype=np.float64)
+    kernel = np.exp(-0.5 * (x / sigma) ** 2)
+    return kernel / kernel.sum()
+
+
+def _fft_gaussian1d(a: np.ndarray, sigma: float, axis: int) -> np.ndarray:
+    """Gaussian filter along one axis by real FFT convolution.
+
+    The line is reflected by the kernel radius on both sides (scipy's
+    "reflect" boundary) and zero-padded to a fast FFT length, so the
+    circular convolution never wraps into the output window.
+    """
+    radius = _kernel_radius(sigma) if sigma > 0 else 0
+    if radius == 0:
+        return a.copy()
+
+    n = a.shape[axis]
+    pad = [(0, 0)] * a.ndim
+    pad[axis] = (radius, radius)
+    padded = np.pad(a, pad, mode="symmetric")
+    length = fft.next_fast_len(n + 2 * radius, real=True)
+
+    spectrum = fft.rfft(padded, n=length, axis=axis)
+    del padded
+    kernel_shape = [1] * a.ndim
+    kernel_shape[axis] = -1
+    spectrum *= fft.rfft(_gaussian_kernel1d(sigma), n=length).reshape(kernel_shape)
+    convolved = fft.irfft(spectrum, n=length, axis=axis)
+
+    window = [slice(None)] * a.ndim
+    window[axis] = slice(2 * radius, 2 * radius + n)
+    return np.ascontiguousarray(convolved[tuple(window)])
+
+
+# Poles of the third-order Young-van Vliet recursive Gaussian for sigma = 2
+# (Young, van Vliet & van Ginkel, 2002). Other sigmas rescale them as
+# d ** (1 / q), with q chosen so that the filter variance equals sigma^2.
+_YVV_POLES = np.array([1.41650 + 1.00829j, 1.41650 - 1.00829j, 1.86543 + 0j])
+
+
+def _yvv_variance(poles: np.ndarray) -> float:
+    """Impulse-response variance of the forward-backward recursive filter."""
+    return float(np.sum(2.0 * poles / (poles - 1.0) ** 2).real)
+
+
+def _young_van_vliet(sigma: float) -> tuple[np.ndarray, np.ndarray]:
+    """Recursive Gaussian coefficients (b, a) of the causal third-order pass.
+
+    The Gaussian is approximated by running the filter forward then backward.
+    """
+    q = brentq(
+        lambda q: _yvv_variance(_YVV_POLES ** (1.0 / q)) - sigma**2,
+        1e-2,
+        10.0 * sigma + 10.0,
+    )
+    denominator = np.poly(1.0 / _YVV_POLES ** (1.0 / q)).real
+    # Unit DC gain
+    return np.array([denominator.sum()]), denominator
+
+
+def _recursive_pass(
+    b: np.ndarray, a: np.ndarray, zi: np.ndarray, x: np.ndarray, axis: int
+) -> np.ndarray:
+    """Causal pass along axis, started in steady state on the first sample."""
+    first = np.take(x, [0], axis=axis)
+    zi_shape = [1] * x.ndim
+    zi_shape[axis] = -1
+    y, _ = lfilter(b, a, x, axis=axis, zi=zi.reshape(zi_shape) * first)
+    return y
+
+
+def _recursive_gaussian1d(
+    a: np.ndarray, sigma: float, axis: int, out: np.ndarray | None = None
+) -> np.ndarray:
+    """Young-van Vliet recursive Gaussian along one axis, O(1) per pixel.
+
+    Lines are filtered in blocks into ``out`` (which may be ``a`` itself).
+    Boundaries are extended with the edge value (steady-state initial
+    conditions).
+    """
+    if out is None:
+        out = np.empty_like(a, dtype=np.result_type(a.dtype, np.float32))
+    if sigma < 0.5:
+        # Outside the validity range of the recursion: the exact kernel is
+        # at most three taps wide, so convolve directly.
+        out[...] = gaussian_filter(a, sigma=sigma, axes=(axis,))
+        return out
+
+    b, coeffs = _young_van_vliet(sigma)
+    zi = lfilter_zi(b, coeffs)
+    reverse = [slice(None)] * a.ndim
+    reverse[axis] = slice(None, None, -1)
+    reverse_index = tuple(reverse)
+
+    other = 1 - axis
+    for start in range(0, a.shape[other], _RECURSIVE_BLOCK):
+        block = [slice(None)] * a.ndim
+        block[other] = slice(start, start + _RECURSIVE_BLOCK)
+        block_index = tuple(block)
+
+        forward = _recursive_pass(b, coeffs, zi, a[block_index], axis)
+        backward = _recursive_pass(b, coeffs, zi, forward[reverse_index], axis)
+        out[block_index] = backward[reverse_index]
+    return out
+
+
+def _recursive_gaussian_filter(
+    a: np.ndarray, sigma_x: float, sigma_y: float
+) -> np.ndarray:
+    out = _recursive_gaussian1d(a, sigma_x, axis=1)
+    return _recursive_gaussian1d(out, sigma_y, axis=0, out=out)
+
+
+def _resolve_method(method: str, sigma_x: float, sigma_y: float) -> str:
+    if method != "auto":
+        return method
+    radius = max(_kernel_radius(sigma_x), _kernel_radius(sigma_y))
+    return "fft" if radius > _FFT_MIN_RADIUS else "spatial"
+
+
+def _filter_axis_parallel(
+    filter1d: Callable[[np.ndarray, np.ndarray], None],
+    a: np.ndarray,
+    out: np.ndarray,
+    axis: int,
+    workers: int,
+    max_points: int | None = None,
+) -> None:
+    """Run a 1D filter along ``axis`` on slabs of lines, one per worker.
+
+    Lines along ``axis`` are independent, so slabs across the other axis
+    need no halo and reproduce the single-threaded result exactly.
+    ``out`` may be ``a`` itself. With ``max_points``, slabs are also cut
+    to at most that many pixels.
+    """
+    other = 1 - axis
+    parts = workers
+    if max_points is not None:
+        parts = max(parts, -(-a.size // max_points))
+
+    def run(lines: slice) -> None:
+        index = [slice(None)] * a.ndim
+        index[other] = lines
+        filter1d(a[tuple(index)], out[tuple(index)])
+
+    run_threaded(run, blocks(a.shape[other], parts), workers)
+
+
+def _lowpass_parallel(
+    a: np.ndarray, sigma_x: float, sigma_y: float, resolved: str, workers: int
+) -> np.ndarray:
+    """``_lowpass`` with each separable pass split across threads."""
+    out = np.empty_like(a, dtype=np.result_type(a.dtype, np.float32))
+    if resolved == "fft":
+
+        def fft_x(src: np.ndarray, dst: np.ndarray) -> None:
+            dst[...] = _fft_gaussian1d(src, sigma_x, axis=1)
+
+        def fft_y(src: np.ndarray, dst: np.ndarray) -> None:
+            dst[...] = _fft_gaussian1d(src, sigma_y, axis=0)
+
+        _filter_axis_parallel(fft_x, a, out, 1, workers, _FFT_SLAB_POINTS)
+        _filter_axis_parallel(fft_y, out, out, 0, workers, _FFT_SLAB_POINTS)
+    elif resolved == "recursive":
+
+        def recursive_x(src: np.ndarray, dst: np.ndarray) -> None:
+            _recursive_gaussian1d(src, sigma_x, axis=1, out=dst)
+
+        def recursive_y(src: np.ndarray, dst: np.ndarray) -> None:
+            _recursive_gaussian1d(src, sigma_y, axis=0, out=dst)
+
+        _filter_axis_parallel(recursive_x, a, out, 1, workers)
+        _filter_axis_parallel(recursive_y, out, out, 0, workers)
+    else:
+        # Same pass order as gaussian_filter (axis 0, then axis 1 in place)
+        def spatial_y(src: np.ndarray, dst: np.ndarray) -> None:
+            gaussian_filter1d(src, sigma_y, axis=0, output=dst)
+
+        def spatial_x(src: np.ndarray, dst: np.ndarray) -> None:
+            gaussian_filter1d(src, sigma_x, axis=1, output=dst)
+
+        _filter_axis_parallel(spatial_y, a, out, 0, workers)
+        _filter_axis_parallel(spatial_x, out, out, 1, workers)
+    return out
+
+
+def _lowpass(
+    a: np.ndarray, sigma_x: float, sigma_y: float, method: str, workers: int = 1
+) -> np.ndarray:
+    """Plain (not NaN-aware) Gaussian lowpass with the selected backend."""
+    resolved = _resolve_method(method, sigma_x, sigma_y)
+    if workers > 1 or resolved == "fft":
+        return _lowpass_parallel(a, sigma_x, sigma_y, resolved, workers)
+    if resolved == "recursive":
+        return _recursive_gaussian_filter(a, sigma_x, sigma_y)
+    return gaussian_filter(a, sigma=[sigma_y, sigma_x])
+
+
+def _gaussian_lowpass_bank(
+    z: np.ndarray,
+    sigmas: Sequence[tuple[float, float]],
+    method: FilterMethod = "auto",
+    workers: int = 1,
+) -> list[np.ndarray]:
+    """NaN-normalized Gaussian lowpass of z for each (sigma_x, sigma_y) pair.
+
+    The zero-filled heights and the validity mask are prepared once and
+    shared by every cutoff; each weight map is filtered exactly once. When z
+    has no NaN the weights are identically 1 and their filtering is skipped.
+    """
     mask = np.isfinite(z)
+    if mask.all():
+        return [
+            _lowpass(z, sigma_x, sigma_y, method, workers)
+            for sigma_x, sigma_y in sigmas
+        ]
+
     z_zero = np.where(mask, z, 0.0)
-    weights = mask.astype(np.float64)
+    weights = mask.astype(z_zero.dtype)
+
+    results = []
+    for sigma_x, sigma_y in sigmas:
+        resolved = _resolve_method(method, sigma_x, sigma_y)
+        filtered = _lowpass(z_zero, sigma_x, sigma_y, resolved, workers)
+        weight_filtered = _lowpass(weights, sigma_x, sigma_y, resolved, workers)
+        floor = 0.0 if resolved == "spatial" else _WEIGHT_FLOOR
+        results.append(
+            np.where(weight_filtered > floor, filtered / weight_filtered, np.nan)
+        )
+    return results
+
+
+def _gaussian_filter_nan(
+    z: np.ndarray,
+    sigma_x: float,
+    sigma_y: float,
+    method: FilterMethod = "auto",
+    workers: int = 1,
+) -> np.ndarray:
+    return _gaussian_lowpass_bank(z, [(sigma_x, sigma_y)], method, workers)[0]
+
+
+def _iso_sigmas(surface: Surface, cutoff: float) -> tuple[float, float]:
+    """Gaussian sigma in pixels (x, y) for an ISO 16610-21 cutoff in mm."""
+    sigma_mm = cutoff * _ISO_SIGMA_FACTOR
+    return sigma_mm / surface.step_x, sigma_mm / surface.step_y
+
+
+def _check_method(method: str) -> None:
+    if method not in _METHODS:
+        raise ValueError(f"Method must be one of {_METHODS}, got {method!r}")
 
-    filtered = gaussian_filter(z_zero, sigma=[sigma_y, sigma_x])
-    weight_filtered = gaussian_filter(weights, sigma=[sigma_y, sigma_x])
 
-    result = np.where(weight_filtered > 0, filtered / weight_filtered, np.nan)
-    return result
+def lowpass_bank(
+    surface: Surface,
+    cutoffs: Sequence[float],
+    method: FilterMethod = "auto",
+    workers: int = 1,
+) -> list[Surface]:
+    """ISO 16610-21 Gaussian lowpass of a surface at several cutoffs.
+
+    Equivalent to ``Gaussian(cutoff, mode="lowpass")`` for each cutoff, but
+    the NaN bookkeeping is shared and every lowpass is computed once, so
+    band-pass layers can be derived by subtraction.
+
+    Parameters
+    ----------
+    surface : Surface
+        Input surface.
+    cutoffs : sequence of float
+        Cutoff wavelengths in mm.
+    method : {"auto", "spatial", "fft", "recursive"}
+        Convolution backend, see ``Gaussian``.
+    workers : int
+        Number of threads, see ``Gaussian``.
+
+    Returns
+    -------
+    list of Surface
+        One lowpass surface per cutoff, in the same order.
+    """
+    for cutoff in cutoffs:
+        if cutoff <= 0:
+            raise ValueError(f"Cutoff must be positive, got {cutoff}")
+    _check_method(method)
+    check_workers(workers)
+    sigmas = [_iso_sigmas(surface, cutoff) for cutoff in cutoffs]
+    return [
+        surface.with_heights(z)
+        for z in _gaussian_lowpass_bank(surface.z, sigmas, method, workers)
+    ]
 
 
 class Gaussian(Transformation):
@@ -35,31 +352,61 @@ class Gaussian(Transformation):
     mode : {"highpass", "lowpass"}
         "highpass" keeps wavelengths shorter than cutoff (roughness).
         "lowpass" keeps wavelengths longer than cutoff (waviness).
+    method : {"auto", "spatial", "fft", "recursive"}
+        Convolution backend. "spatial" convolves directly
+        (scipy.ndimage.gaussian_filter), with a cost growing linearly with the
+        cutoff. "fft" convolves with real FFTs over reflect-padded lines, with a
+        cost independent of the kernel size; it matches "spatial" to within
+        1e-10 of the height range, except that pixels whose valid neighbourhood
+        carries less than 1e-10 of the kernel weight are left NaN. "recursive" runs
+        the Young-van Vliet third-order recursive approximation forward and
+        backward, at a constant cost per pixel and with one extra array of
+        memory; it extends the edges with their value rather than reflecting,
+        and transmits 50 +/- 1 % at the cutoff. "auto" picks "spatial" or
+        "fft" (never the approximate "recursive"), switching to "fft" once the
+        kernel radius exceeds 32 pixels on either axis.
+    workers : int
+        Number of threads. Each separable pass is split into slabs of
+        independent lines, so the result does not depend on ``workers``.
     """
 
     def __init__(
-        self, cutoff: float, mode: Literal["highpass", "lowpass"] = "highpass"
+        self,
+        cutoff: float,
+        mode: Literal["highpass", "lowpass"] = "highpass",
+        method: FilterMethod = "auto",
+        workers: int = 1,
     ) -> None:
         if cutoff <= 0:
             raise ValueError(f"Cutoff must be positive, got {cutoff}")
         valid_modes = ("highpass", "lowpass")
         if mode not in valid_modes:
             raise ValueError(f"Mode must be one of {valid_modes}, got {mode!r}")
+        _check_method(method)
+        check_workers(workers)
         self.cutoff = cutoff
         self.mode = mode
+        self.method = method
+        self.workers = workers
 
-    def transform(self, surface: Surface) -> Surface:
-        sigma_mm = self.cutoff * _ISO_SIGMA_FACTOR
-        sigma_x_px = sigma_mm / surface.step_x
-        sigma_y_px = sigma_mm / surface.step_y
-
-        lowpass = _gaussian_filter_nan(surface.z, sigma_x_px, sigma_y_px)
+    def transform(
+        self, surface: Surface, out: NDArray[np.floating] | None = None
+    ) -> Surface:
+        if out is not None:
+            _check_out(surface, out)
+        sigma_x_px, sigma_y_px = _iso_sigmas(surface, self.cutoff)
+        lowpass = _gaussian_filter_nan(
+            surface.z, sigma_x_px, sigma_y_px, self.method, self.workers
+        )
 
         if self.mode == "lowpass":
             z_out = lowpass
+            if out is not None:
+                np.copyto(out, lowpass)
+                z_out = out
         elif self.mode == "highpass":
-            z_out = surface.z - lowpass
+            z_out = np.subtract(surface.z, lowpass, out=out)
         else:
             raise ValueError(f"Unknown mode {self.mode!r}")
 
-        return Surface(z=z_out, step_x=surface.step_x, step_y=surface.step_y)
+        return _result(surface, z_out)
@@ -1,62 +1,374 @@
 from __future__ import annotations
 
+from typing import Literal
+
 import numpy as np
+from numpy.typing import NDArray
+from scipy import sparse
 from scipy.interpolate import griddata
+from scipy.ndimage import binary_dilation, distance_transform_edt, find_objects, label
+from scipy.sparse.linalg import spsolve
+from scipy.spatial import QhullError
 
+from surface_analysis._parallel import blocks, check_workers, run_threaded
 from surface_analysis.surface import Surface
-from surface_analysis.transforms._base import Transformation
+from surface_analysis.transforms._base import Transformation, _output, _result
+
+# Width (pixels) of the ring of valid pixels triangulated around each hole
+_RING_WIDTH = 1
+
+# Holes whose neighbourhood fits in a tile of this size are batched into one
+# triangulation per tile, bounding the number of griddata calls.
+_HOLE_TILE = 128
+
+_EIGHT_CONNECTED = np.ones((3, 3), dtype=bool)
+
+
+def _hole_groups(
+    labels: np.ndarray, holes: np.ndarray
+) -> list[tuple[tuple[slice, slice], np.ndarray]]:
+    """Group NaN regions into windows, each with the labels it must fill.
+
+    Small holes are bucketed by tile; a hole larger than a tile is its own
+    group. Each window is the union of its holes' bounding boxes grown by
+    the ring width.
+    """
+    if holes.size == 0:
+        return []
+    ny, nx = labels.shape
+    objects = find_objects(labels)
+    boxes = np.array(
+        [
+            (o[0].start, o[0].stop, o[1].start, o[1].stop)
+            for o in (objects[i - 1] for i in holes)
+        ]
+    ).reshape(-1, 4)
+    y0 = np.maximum(boxes[:, 0] - _RING_WIDTH, 0)
+    y1 = np.minimum(boxes[:, 1] + _RING_WIDTH, ny)
+    x0 = np.maximum(boxes[:, 2] - _RING_WIDTH, 0)
+    x1 = np.minimum(boxes[:, 3] + _RING_WIDTH, nx)
+
+    n_tiles_x = nx // _HOLE_TILE + 1
+    keys = (boxes[:, 0] // _HOLE_TILE) * n_tiles_x + boxes[:, 2] // _HOLE_TILE
+    large = np.maximum(y1 - y0, x1 - x0) > _HOLE_TILE
+    keys[large] = -1 - np.arange(large.sum())  # large holes: own group
+
+    order = np.argsort(keys, kind="stable")
+    _, starts = np.unique(keys[order], return_index=True)
+    groups = []
+    for members in np.split(order, starts[1:]):
+        window = (
+            slice(int(y0[members].min()), int(y1[members].max())),
+            slice(int(x0[members].min()), int(x1[members].max())),
+        )
+        groups.append((window, holes[members]))
+    return groups
+
+
+def _fill_holes_linear(
+    z: np.ndarray,
+    z_filled: np.ndarray,
+    labels: np.ndarray,
+    window: tuple[slice, slice],
+    members: np.ndarray,
+) -> None:
+    """Linearly interpolate the given holes from the valid ring around them."""
+    sub = z[window]
+    holes = np.isin(labels[window], members)
+    ring = binary_dilation(holes, _EIGHT_CONNECTED, iterations=_RING_WIDTH)
+    # Valid pixels are label 0; z may be z_filled, with other holes filled
+    ring &= labels[window] == 0
+
+    ry, rx = np.nonzero(ring)
+    hy, hx = np.nonzero(holes)
+    points = np.column_stack([rx, ry])
+    values = sub[ring]
+    xi = np.column_stack([hx, hy])
+
+    try:
+        filled = griddata(points, values, xi, method="linear")
+    except QhullError:
+        # Degenerate ring (e.g. collinear points): nearest only
+        filled = np.full(len(xi), np.nan)
+
+    still_nan = np.isnan(filled)
+    if still_nan.any():
+        filled[still_nan] = griddata(points, values, xi[still_nan], method="nearest")
+
+    z_filled[window][holes] = filled
 
 
 class Linear(Transformation):
     """Fill NaN values using linear interpolation.
 
-    Uses scipy griddata with nearest-neighbor fallback for points
-    outside the convex hull of valid data.
+    By default the NaN pixels are interpolated on the Delaunay triangulation
+    of every valid pixel (scipy griddata), evaluated at the NaN pixels only.
+    Points outside the convex hull of the valid pixels fall back to the
+    nearest valid pixel.
+
+    With ``local=True``, each connected NaN region is instead triangulated
+    from the ring of valid pixels around it, which is much faster and uses
+    far less memory on large maps. A plane is still reproduced exactly, but
+    where the ring's pixels are cocircular (on a regular grid, most holes)
+    the Delaunay split is a tie. The global triangulation settles each tie
+    from the whole point set, so the local fill can differ from the default
+    there, by up to the height variation across the tied triangles.
+
+    Parameters
+    ----------
+    workers : int
+        Number of threads filling independent holes concurrently, with
+        ``local=True``; the global triangulation is single-threaded.
+    local : bool
+        Triangulate each hole's neighbourhood instead of the whole surface.
     """
 
-    def transform(self, surface: Surface) -> Surface:
-        z = surface.z
-        if not np.any(np.isnan(z)):
-            return surface
+    def __init__(self, workers: int = 1, local: bool = False) -> None:
+        check_workers(workers)
+        self.workers = workers
+        self.local = local
 
-        mask = np.isfinite(z)
-        if not np.any(mask):
+    def transform(
+        self, surface: Surface, out: NDArray[np.floating] | None = None
+    ) -> Surface:
+        z = surface.z
+        invalid = ~np.isfinite(z)
+        if not invalid.any():
+            return surface if out is None else _result(surface, _output(surface, out))
+        if invalid.all():
             raise ValueError("Cannot interpolate: surface has no valid points")
-        ny, nx = z.shape
-        yy, xx = np.mgrid[0:ny, 0:nx]
 
-        points = np.column_stack([xx[mask], yy[mask]])
-        values = z[mask]
-        xi = np.column_stack([xx.ravel(), yy.ravel()])
+        if not self.local:
+            points = np.column_stack(np.nonzero(~invalid)[::-1])
+            values = z[~invalid]
+            xi = np.column_stack(np.nonzero(invalid)[::-1])
+            z_filled = _output(surface, out)
+            filled = griddata(points, values, xi, method="linear")
+            still_nan = np.isnan(filled)
+            if still_nan.any():
+                filled[still_nan] = griddata(
+                    points, values, xi[still_nan], method="nearest"
+                )
+            z_filled[invalid] = filled
+            return _result(surface, z_filled)
+
+        labels, n_holes = label(invalid, structure=_EIGHT_CONNECTED)
+        z_filled = _output(surface, out)
+        groups = _hole_groups(labels, np.arange(1, n_holes + 1))
 
-        z_filled = griddata(points, values, xi, method="linear").reshape(z.shape)
+        def fill(group: tuple[tuple[slice, slice], np.ndarray]) -> None:
+            _fill_holes_linear(z, z_filled, labels, *group)
 
-        still_nan = np.isnan(z_filled)
-        if still_nan.any():
-            z_nearest = griddata(points, values, xi, method="nearest").reshape(z.shape)
-            z_filled[still_nan] = z_nearest[still_nan]
+        run_threaded(fill, groups, self.workers)
 
-        return Surface(z=z_filled, step_x=surface.step_x, step_y=surface.step_y)
+        return _result(surface, z_filled)
 
 
 class Nearest(Transformation):
-    """Fill NaN values using nearest-neighbor interpolation."""
+    """Fill NaN values using nearest-neighbor interpolation.
+
+    Uses an exact Euclidean distance transform of the NaN mask, which yields
+    the nearest valid pixel for every pixel in linear time. Distances honour
+    anisotropic ``step_x`` / ``step_y``.
+
+    Parameters
+    ----------
+    workers : int
+        Number of threads. The map is split into row strips, each solved
+        with a halo of extra rows that doubles until every NaN pixel's
+        nearest valid pixel is provably inside it. The fill therefore
+        matches the single-threaded one, up to the choice between valid
+        pixels at exactly the same distance.
+    """
 
-    def transform(self, surface: Surface) -> Surface:
+    def __init__(self, workers: int = 1) -> None:
+        check_workers(workers)
+        self.workers = workers
+
+    def transform(
+        self, surface: Surface, out: NDArray[np.floating] | None = None
+    ) -> Surface:
         z = surface.z
-        if not np.any(np.isnan(z)):
-            return surface
+        invalid = ~np.isfinite(z)
+        if not invalid.any():
+            return surface if out is None else _result(surface, _output(surface, out))
+        if invalid.all():
+            raise ValueError("Cannot interpolate: surface has no valid points")
+
+        z_filled = _output(surface, out)
+        sampling = (surface.step_y, surface.step_x)
+        if self.workers > 1:
+            run_threaded(
+                lambda rows: _fill_nearest(z, z_filled, invalid, rows, sampling),
+                blocks(z.shape[0], self.workers),
+                self.workers,
+            )
+        else:
+            iy, ix = distance_transform_edt(
+                invalid, sampling=sampling, return_distances=False, return_indices=True
+            )
+            z_filled[invalid] = z[iy[invalid], ix[invalid]]
+        return _result(surface, z_filled)
+
+
+def _fill_nearest(
+    z: np.ndarray,
+    z_filled: np.ndarray,
+    invalid: np.ndarray,
+    rows: slice,
+    sampling: tuple[float, float],
+) -> None:
+    """Fill the NaN pixels of a strip of rows with their nearest valid pixel.
+
+    The distance transform runs on the strip widened by a halo of rows. A
+    result is accepted once no NaN pixel is farther from its nearest valid
+    pixel than from the rows cut off by the halo. Otherwise the halo grows
+    to the largest distance found, which is then guaranteed to suffice.
+    """
+    ny = z.shape[0]
+    core_invalid = invalid[rows]
+    if not core_invalid.any():
+        return
+    step_y = sampling[0]
+    halo = 16
+    while True:
+        top, bottom = max(rows.start - halo, 0), min(rows.stop + halo, ny)
+        window = invalid[top:bottom]
+        if window.all():
+            halo *= 2
+            continue
+        distances, (iy, ix) = distance_transform_edt(
+            window, sampling=sampling, return_indices=True
+        )
+        inner = slice(rows.start - top, rows.stop - top)
+        local = np.arange(rows.start, rows.stop)[:, None]
+        margin = np.full((rows.stop - rows.start, 1), np.inf)
+        if top > 0:
+            margin = np.minimum(margin, (local - top + 1) * step_y)
+        if bottom < ny:
+            margin = np.minimum(margin, (bottom - local) * step_y)
+        core_distances = distances[inner]
+        if np.all(core_distances <= margin):
+            iy_core, ix_core = iy[inner][core_invalid], ix[inner][core_invalid]
+            z_filled[rows][core_invalid] = z[top + iy_core, ix_core]
+            return
+        halo = max(2 * halo, int(np.ceil(core_distances.max() / step_y)) + 1)
+
+
+def _neighbours(
+    flat: np.ndarray, shape: tuple[int, int], step_x: float, step_y: float
+) -> list[tuple[np.ndarray, np.ndarray, float]]:
+    """In-grid 4-neighbours of flat pixel indices, per direction.
+
+    Returns (source position, neighbour flat index, weight) triples where the
+    weight is the 1/step^2 coupling of the 5-point Laplacian.
+    """
+    ny, nx = shape
+    py, px = np.divmod(flat, nx)
+    result = []
+    for dy, dx, weight in (
+        (0, -1, 1.0 / step_x**2),
+        (0, 1, 1.0 / step_x**2),
+        (-1, 0, 1.0 / step_y**2),
+        (1, 0, 1.0 / step_y**2),
+    ):
+        ok = (py + dy >= 0) & (py + dy < ny) & (px + dx >= 0) & (px + dx < nx)
+        source = np.flatnonzero(ok)
+        result.append((source, flat[source] + dy * nx + dx, weight))
+    return result
+
 
-        mask = np.isfinite(z)
-        if not np.any(mask):
+def _laplacian_system(
+    rows: np.ndarray,
+    unknown: np.ndarray,
+    z_flat: np.ndarray,
+    shape: tuple[int, int],
+    step_x: float,
+    step_y: float,
+) -> tuple[sparse.csr_matrix, np.ndarray]:
+    """Discrete Laplacian at ``rows``, split into unknown and known parts.
+
+    Returns (A, b) such that the Laplacian at each row equals A @ u - b, where
+    u are the heights at the (sorted) ``unknown`` flat indices. Only pixels
+    touching the rows are visited, never the whole grid. Grid borders are
+    treated as reflecting (Neumann).
+    """
+    n_rows = len(rows)
+    entries_row, entries_col, entries_w = [], [], []
+    diagonal = np.zeros(n_rows)
+    for source, neighbour, weight in _neighbours(rows, shape, step_x, step_y):
+        entries_row.append(source)
+        entries_col.append(neighbour)
+        entries_w.append(np.full(len(source), weight))
+        diagonal[source] -= weight
+    entries_row.append(np.arange(n_rows))
+    entries_col.append(rows)
+    entries_w.append(diagonal)
+
+    r = np.concatenate(entries_row)
+    c = np.concatenate(entries_col)
+    w = np.concatenate(entries_w)
+
+    pos = np.minimum(np.searchsorted(unknown, c), len(unknown) - 1)
+    is_unknown = unknown[pos] == c
+    A = sparse.csr_matrix(
+        (w[is_unknown], (r[is_unknown], pos[is_unknown])),
+        shape=(n_rows, len(unknown)),
+    )
+    known = ~is_unknown
+    b = -np.bincount(r[known], weights=w[known] * z_flat[c[known]], minlength=n_rows)
+    return A, b
+
+
+class Inpaint(Transformation):
+    """Fill NaN values with a smooth harmonic or biharmonic surface.
+
+    Solves a sparse linear system over the NaN pixels only, with the valid
+    pixels as boundary conditions: "laplace" makes the filled heights
+    harmonic (each one the weighted mean of its 4 neighbours), "biharmonic"
+    minimizes the squared Laplacian, which also continues the slopes across
+    the hole edge. Unlike triangulation or nearest-neighbour filling, large
+    irregular dropouts get neither long facets nor terraces. The cost
+    scales with the number of missing pixels, not with the grid size.
+
+    Parameters
+    ----------
+    method : {"laplace", "biharmonic"}
+        Smoothness criterion of the fill.
+    """
+
+    def __init__(self, method: Literal["laplace", "biharmonic"] = "laplace") -> None:
+        valid_methods = ("laplace", "biharmonic")
+        if method not in valid_methods:
+            raise ValueError(f"Method must be one of {valid_methods}, got {method!r}")
+        self.method = method
+
+    def transform(
+        self, surface: Surface, out: NDArray[np.floating] | None = None
+    ) -> Surface:
+        z = surface.z
+        invalid = ~np.isfinite(z)
+        if not invalid.any():
+            return surface if out is None else _result(surface, _output(surface, out))
+        if invalid.all():
             raise ValueError("Cannot interpolate: surface has no valid points")
-        ny, nx = z.shape
-        yy, xx = np.mgrid[0:ny, 0:nx]
 
-        points = np.column_stack([xx[mask], yy[mask]])
-        values = z[mask]
-        xi = np.column_stack([xx.ravel(), yy.ravel()])
+        z_flat = z.reshape(-1)
+        unknown = np.flatnonzero(invalid)
+        args = (z_flat, z.shape, surface.step_x, surface.step_y)
 
-        z_filled = griddata(points, values, xi, method="nearest").reshape(z.shape)
+        if self.method == "laplace":
+            A, b = _laplacian_system(unknown, unknown, *args)
+            u = spsolve(A.tocsc(), b)
+        else:
+            # Laplacian evaluated on the holes and the ring around them
+            ring = [n for _, n, _ in _neighbours(unknown, z.shape, *args[2:])]
+            rows = np.unique(np.concatenate([unknown, *ring]))
+            A, b = _laplacian_system(rows, unknown, *args)
+            At = A.T.tocsr()
+            u = spsolve((At @ A).tocsc(), At @ b)
 
-        return Surface(z=z_filled, step_x=surface.step_x, step_y=surface.step_y)
+        z_filled = _output(surface, out)
+        # unknown lists the NaN pixels in row-major order, as boolean indexing
+        z_filled[invalid] = u
+        return _result(surface, z_filled)
@@ -1,24 +1,326 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
+from dataclasses import dataclass
 from typing import Literal
 
 import numpy as np
+from numpy.polynomial import legendre
+from numpy.typing import DTypeLike, NDArray
 
+from surface_analysis._parallel import blocks, check_workers, run_threaded
 from surface_analysis.surface import Surface
-from surface_analysis.transforms._base import Transformation
+from surface_analysis.transforms._base import (
+    Transformation,
+    _check_out,
+    _output,
+    _result,
+)
 
+# Valid pixels per accumulation chunk when building the normal equations;
+# bounds the (points x terms) design-matrix temporaries.
+_FIT_CHUNK_POINTS = 1 << 16
 
-def _vandermonde(x: np.ndarray, y: np.ndarray, degree: int) -> np.ndarray:
-    columns = []
-    for i in range(degree + 1):
-        for j in range(degree + 1 - i):
-            columns.append(x**i * y**j)
-    return np.column_stack(columns)
+
+def _terms(degree: int) -> tuple[np.ndarray, np.ndarray]:
+    """x and y degrees of each term P_i(x) P_j(y) with i + j <= degree."""
+    pairs = [(i, j) for i in range(degree + 1) for j in range(degree + 1 - i)]
+    ix, iy = zip(*pairs, strict=True)
+    return np.array(ix), np.array(iy)
+
+
+def _legendre_basis(
+    coords: np.ndarray, domain: tuple[float, float], degree: int
+) -> np.ndarray:
+    """Legendre polynomials P_0..P_degree of coords mapped from domain to [-1, 1]."""
+    lo, hi = domain
+    t = np.zeros_like(coords) if hi == lo else (2.0 * coords - (lo + hi)) / (hi - lo)
+    return legendre.legvander(t, degree)
+
+
+@dataclass
+class PolynomialFit:
+    """Least-squares 2D polynomial form in a tensor Legendre basis.
+
+    The form is sum c_k P_i(x) P_j(y) over i + j <= degree, with x and y
+    mapped from their domain to [-1, 1]. It spans the same polynomials as
+    the monomial basis but keeps the fit well-conditioned at high degree.
+
+    Since |P_i| <= 1 on the domain, each coefficient's standard error (in
+    height units) bounds its contribution to the form's uncertainty at any
+    pixel. The errors assume independent residuals; spatially correlated
+    roughness makes them optimistic.
+
+    Parameters
+    ----------
+    coefficients : NDArray
+        Legendre coefficients, one per term.
+    degree : int
+        Polynomial degree.
+    x_domain, y_domain : tuple of float
+        Coordinate ranges (mm) mapped to [-1, 1].
+    standard_error : NDArray
+        Standard error of each coefficient.
+    residual_rms : float
+        RMS of the fit residuals over the fitted points.
+    n_points : int
+        Number of valid pixels used in the fit.
+    fit_stride : int
+        Subsampling stride used along both axes.
+    """
+
+    coefficients: NDArray[np.float64]
+    degree: int
+    x_domain: tuple[float, float]
+    y_domain: tuple[float, float]
+    standard_error: NDArray[np.float64]
+    residual_rms: float
+    n_points: int
+    fit_stride: int = 1
+
+    def evaluate(
+        self,
+        x: NDArray,
+        y: NDArray,
+        dtype: DTypeLike = np.float64,
+        out: NDArray[np.floating] | None = None,
+    ) -> NDArray[np.floating]:
+        """Evaluate the form on the grid spanned by 1D coordinates x and y.
+
+        Uses separable products, so the only full-size allocation is the
+        returned (len(y), len(x)) array, of the given ``dtype``, or none
+        when written into ``out`` (whose dtype then wins). The small basis
+        factors are computed in float64.
+        """
+        if out is not None:
+            dtype = out.dtype
+        px = _legendre_basis(x, self.x_domain, self.degree)
+        py = _legendre_basis(y, self.y_domain, self.degree)
+        ix, iy = _terms(self.degree)
+        c = np.zeros((self.degree + 1, self.degree + 1))
+        c[iy, ix] = self.coefficients
+        return np.matmul(
+            (py @ c).astype(dtype, copy=False),
+            px.T.astype(dtype, copy=False),
+            out=out,
+        )
+
+    def subtract_from(self, z: NDArray[np.floating], x: NDArray, y: NDArray) -> None:
+        """Remove the form from heights ``z`` (on the grid of x and y) in place.
+
+        The form is evaluated in blocks of rows, so no full-size array is
+        allocated.
+        """
+        rows_per_block = max(1, _FIT_CHUNK_POINTS // z.shape[1])
+        for start in range(0, z.shape[0], rows_per_block):
+            block = slice(start, start + rows_per_block)
+            z[block] -= self.evaluate(x, y[block], dtype=z.dtype)
+
+
+def _design_chunks(
+    z: NDArray, px: NDArray, py: NDArray, ix: NDArray, iy: NDArray
+) -> Iterator[tuple[NDArray, NDArray]]:
+    """Yield (design matrix, heights) over row chunks of the valid pixels."""
+    rows_per_chunk = max(1, _FIT_CHUNK_POINTS // z.shape[1])
+    for start in range(0, z.shape[0], rows_per_chunk):
+        block = z[start : start + rows_per_chunk]
+        mask = np.isfinite(block)
+        rows, cols = np.nonzero(mask)
+        yield px[cols][:, ix] * py[start + rows][:, iy], block[mask]
+
+
+def _fit_stride_for(shape: tuple[int, int], max_fit_points: int | None) -> int:
+    """Smallest stride keeping a strided sample of ``shape`` under a budget."""
+    if max_fit_points is None:
+        return 1
+    if max_fit_points < 1:
+        raise ValueError(f"max_fit_points must be >= 1, got {max_fit_points}")
+    ny, nx = shape
+
+    def sampled(stride: int) -> int:
+        return -(-ny // stride) * -(-nx // stride)
+
+    # The sample size only shrinks as the stride grows: bisect for the
+    # smallest stride within budget (a stride of max(ny, nx) keeps 1 pixel)
+    lo, hi = 1, max(ny, nx, 1)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if sampled(mid) <= max_fit_points:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+class _NormalEquations:
+    """Polynomial least-squares normal equations, accumulated block by block.
+
+    The fit samples every ``fit_stride``-th pixel of the full grid along
+    both axes. Blocks are given in sampled-grid coordinates, so a surface
+    can be fed in any tiling (e.g. streamed from disk) and yields the same
+    fit as a single pass.
+
+    Parameters
+    ----------
+    x, y : NDArray
+        1D pixel coordinates (mm) of the full grid.
+    degree : int
+        Polynomial degree.
+    fit_stride : int
+        Sampling stride along both axes.
+    """
+
+    def __init__(self, x: NDArray, y: NDArray, degree: int, fit_stride: int = 1):
+        if fit_stride < 1:
+            raise ValueError(f"fit_stride must be >= 1, got {fit_stride}")
+        self.degree = degree
+        self.fit_stride = fit_stride
+        self.x_domain = (float(x[0]), float(x[-1]))
+        self.y_domain = (float(y[0]), float(y[-1]))
+        self._px = _legendre_basis(x[::fit_stride], self.x_domain, degree)
+        self._py = _legendre_basis(y[::fit_stride], self.y_domain, degree)
+        self._ix, self._iy = _terms(degree)
+        n_terms = len(self._ix)
+        self.gram = np.zeros((n_terms, n_terms))
+        self.moment = np.zeros(n_terms)
+        self.n_points = 0
+        self.rss = 0.0
+        self.coefficients: NDArray[np.float64] | None = None
+
+    def _chunks(
+        self, block: NDArray, row: int, col: int
+    ) -> Iterator[tuple[NDArray, NDArray]]:
+        px = self._px[col : col + block.shape[1]]
+        py = self._py[row : row + block.shape[0]]
+        return _design_chunks(block, px, py, self._ix, self._iy)
+
+    def _slabs(
+        self, block: NDArray, row: int, workers: int
+    ) -> list[tuple[NDArray, int]]:
+        """Row slabs of a block, one per worker, with their first row."""
+        return [(block[rows], row + rows.start) for rows in blocks(len(block), workers)]
+
+    def add(self, block: NDArray, row: int = 0, col: int = 0, workers: int = 1) -> None:
+        """Add a block of the sampled grid whose first pixel is (row, col).
+
+        With ``workers > 1`` row slabs are accumulated on separate threads
+        and summed, which changes only the floating-point summation order.
+        """
+
+        def accumulate(slab: tuple[NDArray, int]) -> tuple[NDArray, NDArray, int]:
+            gram, moment, n_points = (
+                np.zeros_like(self.gram),
+                np.zeros_like(self.moment),
+                0,
+            )
+            for design, values in self._chunks(slab[0], slab[1], col):
+                gram += design.T @ design
+                moment += design.T @ values
+                n_points += len(values)
+            return gram, moment, n_points
+
+        for gram, moment, n_points in run_threaded(
+            accumulate, self._slabs(block, row, workers), workers
+        ):
+            self.gram += gram
+            self.moment += moment
+            self.n_points += n_points
+
+    def solve(self) -> NDArray[np.float64]:
+        """Solve for the Legendre coefficients from the accumulated blocks."""
+        n_terms = len(self._ix)
+        if self.n_points < n_terms:
+            raise ValueError(
+                f"Cannot fit degree {self.degree} polynomial: "
+                f"need at least {n_terms} valid points, got {self.n_points}"
+            )
+        coefficients, _, _, _ = np.linalg.lstsq(self.gram, self.moment, rcond=None)
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        return self.coefficients
+
+    def add_residuals(
+        self, block: NDArray, row: int = 0, col: int = 0, workers: int = 1
+    ) -> None:
+        """Accumulate squared residuals of a block after :meth:`solve`."""
+        coefficients = self.coefficients
+        if coefficients is None:
+            raise ValueError("Call solve() before add_residuals()")
+
+        def accumulate(slab: tuple[NDArray, int]) -> float:
+            rss = 0.0
+            for design, values in self._chunks(slab[0], slab[1], col):
+                residual = values - design @ coefficients
+                rss += float(residual @ residual)
+            return rss
+
+        self.rss += sum(
+            run_threaded(accumulate, self._slabs(block, row, workers), workers)
+        )
+
+    def result(self) -> PolynomialFit:
+        """The fit, with standard errors from the accumulated residuals."""
+        coefficients = self.solve() if self.coefficients is None else self.coefficients
+        dof = self.n_points - len(self._ix)
+        variance = self.rss / dof if dof > 0 else 0.0
+        diag = np.abs(np.diag(np.linalg.pinv(self.gram)))
+        return PolynomialFit(
+            coefficients=coefficients,
+            degree=self.degree,
+            x_domain=self.x_domain,
+            y_domain=self.y_domain,
+            standard_error=np.sqrt(variance * diag),
+            residual_rms=float(np.sqrt(self.rss / self.n_points)),
+            n_points=self.n_points,
+            fit_stride=self.fit_stride,
+        )
+
+
+def fit_polynomial(
+    surface: Surface,
+    degree: int,
+    fit_stride: int = 1,
+    max_fit_points: int | None = None,
+    workers: int = 1,
+) -> PolynomialFit:
+    """Least-squares fit of a degree-``degree`` polynomial to the valid pixels.
+
+    The normal equations are accumulated over row chunks from the 1D x / y
+    Legendre bases, so no coordinate grids or full design matrix are built.
+
+    Parameters
+    ----------
+    surface : Surface
+        Surface to fit. NaN pixels are ignored.
+    degree : int
+        Polynomial degree.
+    fit_stride : int
+        Fit on every ``fit_stride``-th pixel along both axes.
+    max_fit_points : int or None
+        If set, increase the stride so that at most this many pixels are
+        sampled.
+    workers : int
+        Number of threads accumulating the normal equations.
+    """
+    check_workers(workers)
+    if fit_stride < 1:
+        raise ValueError(f"fit_stride must be >= 1, got {fit_stride}")
+    fit_stride = max(fit_stride, _fit_stride_for(surface.shape, max_fit_points))
+
+    equations = _NormalEquations(surface.x, surface.y, degree, fit_stride)
+    z = surface.z[::fit_stride, ::fit_stride]
+    equations.add(z, workers=workers)
+    equations.solve()
+    # Second pass over the (sub)sample for the residual variance
+    equations.add_residuals(z, workers=workers)
+    return equations.result()
 
 
 class Polynomial(Transformation):
     """Fit and remove a 2D polynomial form via least-squares.
 
+    The fit uses an orthogonal (Legendre) basis and chunked normal
+    equations; peak memory stays within about twice the input array.
+
     Parameters
     ----------
     degree : int
@@ -26,47 +328,84 @@ class Polynomial(Transformation):
     mode : {"residual", "form"}
         "residual" returns surface minus the fitted form.
         "form" returns the fitted polynomial surface itself.
+    fit_stride : int
+        Fit on every ``fit_stride``-th pixel along both axes; the form is
+        still evaluated on the full grid. The sample aliases the waviness,
+        so the residual moves with the stride: on ``generate_synthetic``
+        maps of 400 x 300 pixels, a stride of 5 shifts Sa and Sq by up to
+        1 %. Larger grids with the same stride are closer.
+    max_fit_points : int or None
+        If set, subsample the fit to at most this many pixels. Use ``fit()``
+        to inspect the coefficient standard errors of the subsampled fit.
+    workers : int
+        Number of threads accumulating the normal equations.
     """
 
     def __init__(
-        self, degree: int = 2, mode: Literal["residual", "form"] = "residual"
+        self,
+        degree: int = 2,
+        mode: Literal["residual", "form"] = "residual",
+        fit_stride: int = 1,
+        max_fit_points: int | None = None,
+        workers: int = 1,
     ) -> None:
+        check_workers(workers)
         self.degree = degree
         self.mode = mode
+        self.fit_stride = fit_stride
+        self.max_fit_points = max_fit_points
+        self.workers = workers
 
-    def transform(self, surface: Surface) -> Surface:
-        z = surface.z
-        ny, nx = z.shape
+    def fit(self, surface: Surface, workers: int | None = None) -> PolynomialFit:
+        """Fit the form without evaluating it.
 
-        x = np.arange(nx) * surface.step_x
-        y = np.arange(ny) * surface.step_y
-        X, Y = np.meshgrid(x, y)
-
-        mask = np.isfinite(z)
-        n_terms = (self.degree + 1) * (self.degree + 2) // 2
-        n_valid = int(mask.sum())
-        if n_valid < n_terms:
-            raise ValueError(
-                f"Cannot fit degree {self.degree} polynomial: "
-                f"need at least {n_terms} valid points, got {n_valid}"
-            )
-
-        coeffs, _, _, _ = np.linalg.lstsq(
-            _vandermonde(X[mask], Y[mask], self.degree), z[mask], rcond=None
-        )
-        form = (_vandermonde(X.ravel(), Y.ravel(), self.degree) @ coeffs).reshape(
-            z.shape
+        ``workers`` overrides the transform's own thread count.
+        """
+        return fit_polynomial(
+            surface,
+            self.degree,
+            fit_stride=self.fit_stride,
+            max_fit_points=self.max_fit_points,
+            workers=self.workers if workers is None else workers,
         )
 
-        z_out = form if self.mode == "form" else z - form
-        return Surface(z=z_out, step_x=surface.step_x, step_y=surface.step_y)
+    def transform(
+        self, surface: Surface, out: NDArray[np.floating] | None = None
+    ) -> Surface:
+        fit = self.fit(surface)
+        if self.mode == "form":
+            if out is not None:
+                _check_out(surface, out)
+            z_out = fit.evaluate(surface.x, surface.y, dtype=surface.z.dtype, out=out)
+        else:
+            z_out = _output(surface, out)
+            fit.subtract_from(z_out, surface.x, surface.y)
+        return _result(surface, z_out)
 
 
 class Plane(Transformation):
     """Shorthand for Polynomial(degree=1). Fits and removes a plane."""
 
-    def __init__(self, mode: Literal["residual", "form"] = "residual") -> None:
+    def __init__(
+        self,
+        mode: Literal["residual", "form"] = "residual",
+        fit_stride: int = 1,
+        max_fit_points: int | None = None,
+        workers: int = 1,
+    ) -> None:
+        check_workers(workers)
         self.mode = mode
+        self.fit_stride = fit_stride
+        self.max_fit_points = max_fit_points
+        self.workers = workers
 
-    def transform(self, surface: Surface) -> Surface:
-        return Polynomial(degree=1, mode=self.mode).transform(surface)
+    def transform(
+        self, surface: Surface, out: NDArray[np.floating] | None = None
+    ) -> Surface:
+        return Polynomial(
+            degree=1,
+            mode=self.mode,
+            fit_stride=self.fit_stride,
+            max_fit_points=self.max_fit_points,
+            workers=self.workers,
+        ).transform(surface, out=out)
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import h5py
+import numpy as np
+import pytest
+
+_CONVERTER = np.dtype(
+    [("Category", "S16"), ("BaseUnit", "S16"), ("Parameters", "f8", (4,))]
+)
+
+
+def _write_datx(
+    path: Path,
+    z_nm: np.ndarray,
+    step_m: float = 2e-6,
+    nodata: float = np.inf,
+    chunks: tuple[int, int] | None = None,
+) -> Path:
+    """Minimal .datx layout read by ``load_datx``."""
+    converter = np.array([(b"LateralCat", b"Meters", [0, step_m, 0, 0])], _CONVERTER)
+    with h5py.File(path, "w") as f:
+        ds = f.create_dataset("Data/Surface/{00000000}", data=z_nm, chunks=chunks)
+        ds.attrs["X Converter"] = converter
+        ds.attrs["Y Converter"] = converter
+        ds.attrs["No Data"] = np.array([nodata])
+    return path
+
+
+@pytest.fixture
+def write_datx():
+    return _write_datx
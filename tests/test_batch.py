@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pytest
+
+from surface_analysis.batch import (
+    Batch,
+    BatchProgress,
+    DecompositionSpec,
+    analyze_file,
+    run_batch,
+)
+from surface_analysis.io import expand_files, generate_synthetic, load_datx
+
+
+@pytest.fixture
+def tubes(tmp_path, write_datx):
+    paths = []
+    for seed in range(3):
+        s = generate_synthetic(nx=120, ny=100, step=0.002, seed=seed)
+        paths.append(write_datx(tmp_path / f"tube_{seed}.datx", s.z * 1e6))
+    (tmp_path / "broken.datx").write_bytes(b"not an hdf5 file")
+    return paths, tmp_path / "broken.datx"
+
+
+SPEC = DecompositionSpec(lambda_c=0.08, lambda_s=0.008)
+
+
+@dataclass(frozen=True)
+class CrashingSpec(DecompositionSpec):
+    """Kills its worker process on the first tube, as an OOM kill would."""
+
+    crash_on: float = 0.0
+
+    def run(self, surface):
+        if surface.z[0, 0] == self.crash_on:
+            os._exit(1)
+        return super().run(surface)
+
+
+class TestDatxFixture:
+    def test_round_trip(self, tmp_path, write_datx):
+        s = generate_synthetic(nx=30, ny=20, step=0.002)
+        loaded = load_datx(str(write_datx(tmp_path / "a.datx", s.z * 1e6)))
+        assert loaded.step_x == pytest.approx(0.002)
+        np.testing.assert_allclose(loaded.z, s.z)
+
+
+class TestExpandFiles:
+    def test_directory_glob_and_list(self, tubes, tmp_path):
+        good, broken = tubes
+        assert expand_files(tmp_path) == sorted([*good, broken])
+        assert expand_files(str(tmp_path / "tube_*.datx")) == good
+        assert expand_files([str(p) for p in good]) == good
+
+
+class TestAnalyzeFile:
+    def test_matches_direct_decomposition(self, tubes):
+        path = tubes[0][0]
+        result = analyze_file(path, SPEC)
+        assert result.ok
+        assert set(result.parameters) == {"waviness", "roughness", "micro_roughness"}
+        dec = load_datx(str(path)).decompose(lambda_c=0.08, lambda_s=0.008)
+        assert result.parameters["roughness"] == dec.roughness.parameters()
+
+    def test_failure_is_captured(self, tubes):
+        result = analyze_file(tubes[1], SPEC)
+        assert not result.ok
+        assert "Traceback" in result.error
+        assert result.parameters == {}
+
+    def test_skips_micro_roughness_without_lambda_s(self, tubes):
+        result = analyze_file(tubes[0][0], DecompositionSpec(lambda_c=0.08))
+        assert set(result.parameters) == {"waviness", "roughness"}
+
+
+class TestBatch:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_failures_are_isolated(self, tubes, workers):
+        good, broken = tubes
+        files = [good[0], broken, *good[1:]]
+        results = run_batch(files, SPEC, workers=workers)
+        assert [r.path for r in results] == files
+        assert [r.ok for r in results] == [True, False, True, True]
+
+    def test_pool_matches_inline(self, tubes):
+        good, _ = tubes
+        inline = run_batch(good, SPEC, workers=1)
+        pooled = run_batch(good, SPEC, workers=2, max_in_flight=1)
+        for a, b in zip(inline, pooled, strict=True):
+            assert a.parameters == b.parameters
+
+    def test_survives_worker_crash(self, tubes):
+        good, _ = tubes
+        first = load_datx(str(good[0])).z[0, 0]
+        spec = CrashingSpec(lambda_c=0.08, crash_on=first)
+        results = run_batch(good, spec, workers=2, max_in_flight=1)
+        assert [r.ok for r in results] == [False, True, True]
+        assert "terminated" in results[0].error
+
+    def test_crash_fails_only_its_file(self, tubes):
+        good, _ = tubes
+        first = load_datx(str(good[0])).z[0, 0]
+        spec = CrashingSpec(lambda_c=0.08, crash_on=first)
+        # good[1] is in flight on the other worker when good[0] crashes
+        results = run_batch(good, spec, workers=2, max_in_flight=2)
+        assert [r.ok for r in results] == [False, True, True]
+        assert "terminated" in results[0].error
+
+    def test_progress(self, tubes):
+        good, broken = tubes
+        batch = Batch([*good, broken], SPEC, workers=2)
+        seen = [batch.progress.done for _ in batch]
+        assert seen == [1, 2, 3, 4]
+        assert batch.progress.total == 4
+        assert batch.progress.failed == 1
+        assert batch.progress.throughput > 0
+        assert "4/4 files (1 failed)" in str(batch.progress)
+
+    def test_invalid_arguments(self, tubes):
+        with pytest.raises(ValueError, match="workers"):
+            Batch(tubes[0], workers=0)
+        with pytest.raises(ValueError, match="max_in_flight"):
+            Batch(tubes[0], workers=2, max_in_flight=0)
+
+
+class TestBatchProgress:
+    def test_remaining_before_any_file(self):
+        assert BatchProgress(total=5).remaining == float("inf")
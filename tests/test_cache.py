@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pytest
+
+from surface_analysis import Surface
+from surface_analysis import cache as cache_module
+from surface_analysis.cache import DiskCache, get_cache, set_cache, use_cache
+from surface_analysis.io import generate_synthetic
+
+_LAYERS = ("form", "primary", "waviness", "roughness", "micro_roughness")
+
+
+@pytest.fixture
+def measurement(tmp_path, write_datx):
+    rng = np.random.default_rng(0)
+    z_nm = rng.normal(0, 300, (90, 120)) + np.linspace(0, 5000, 120)
+    z_nm[20:25, 40:60] = np.inf
+    return str(write_datx(tmp_path / "m.datx", z_nm))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(tmp_path / "cache")
+
+
+class TestDecompose:
+    def test_second_run_is_a_hit(self, measurement, cache):
+        with use_cache(cache):
+            first = Surface.from_datx(measurement).decompose(
+                lambda_c=0.08, lambda_s=0.008
+            )
+            second = Surface.from_datx(measurement).decompose(
+                lambda_c=0.08, lambda_s=0.008
+            )
+        assert (cache.hits, cache.misses) == (1, 1)
+        for name in _LAYERS:
+            np.testing.assert_array_equal(
+                getattr(second, name).z, getattr(first, name).z, err_msg=name
+            )
+            assert getattr(second, name).parameters() == pytest.approx(
+                getattr(first, name).parameters(), nan_ok=True
+            )
+        assert second.roughness.nan_count == 100
+        assert second.lambda_s == 0.008
+        np.testing.assert_array_equal(
+            second.form_fit.coefficients, first.form_fit.coefficients
+        )
+        assert second.form_fit.x_domain == first.form_fit.x_domain
+
+    def test_hit_has_parameters_precomputed(self, measurement, cache, monkeypatch):
+        surface = Surface.from_datx(measurement)
+        cache.decompose(surface, lambda_c=0.08)
+        hit = cache.decompose(surface, lambda_c=0.08)
+
+        def fail(self):
+            raise AssertionError("parameters recomputed")
+
+        monkeypatch.setattr(Surface, "_compute_parameters", fail)
+        assert set(hit.roughness.parameters()) >= {"Sa", "Sq", "Sdr"}
+        assert hit.micro_roughness is None
+
+    def test_misses_on_other_arguments_data_or_version(
+        self, measurement, cache, monkeypatch
+    ):
+        surface = Surface.from_datx(measurement)
+        cache.decompose(surface, lambda_c=0.08)
+        cache.decompose(surface, lambda_c=0.25)
+        cache.decompose(surface, form="plane", lambda_c=0.08)
+        cache.decompose(surface, lambda_c=0.08, interpolation="nearest")
+        cache.decompose(surface, lambda_c=0.08, workers=2)
+        assert (cache.hits, cache.misses) == (1, 4)
+
+        changed = surface.copy()
+        changed.z[0, 0] += 1e-6
+        cache.decompose(changed, lambda_c=0.08)
+        monkeypatch.setattr(cache_module, "_package_version", lambda: "99.0")
+        cache.decompose(surface, lambda_c=0.08)
+        assert (cache.hits, cache.misses) == (1, 6)
+        assert cache.stats.entries == 6
+
+    def test_regions_keep_their_origin(self, cache):
+        s = generate_synthetic(nx=120, ny=90, step=0.002)
+        left, right = s[:, :60], s[:, 60:]
+        right.z[...] = left.z  # same heights, different place
+        with use_cache(cache):
+            left.decompose(lambda_c=0.08)
+            right.decompose(lambda_c=0.08)
+            hit = right.decompose(lambda_c=0.08)
+        assert (cache.hits, cache.misses) == (1, 2)
+        assert (hit.roughness.x0, hit.roughness.y0) == (right.x0, 0.0)
+
+    def test_disabled_by_default(self):
+        assert get_cache() is None
+
+    def test_use_cache_restores(self, cache):
+        with use_cache(cache):
+            assert get_cache() is cache
+        assert get_cache() is None
+        try:
+            set_cache(cache)
+            generate_synthetic(nx=40, ny=30).decompose(lambda_c=0.02)
+        finally:
+            set_cache(None)
+        assert cache.misses == 1
+
+
+class TestStorage:
+    def test_entries_are_compressed_and_chunked(self, measurement, cache):
+        import h5py
+
+        cache.decompose(Surface.from_datx(measurement), lambda_c=0.08)
+        (path,) = cache.directory.glob("*.h5")
+        with h5py.File(path) as f:
+            assert f["roughness"].compression == "gzip"
+            assert f["roughness"].chunks is not None
+
+    def test_unreadable_entry_is_a_miss(self, measurement, cache):
+        surface = Surface.from_datx(measurement)
+        cache.decompose(surface, lambda_c=0.08)
+        (path,) = cache.directory.glob("*.h5")
+        path.write_bytes(b"not hdf5")
+        cache.decompose(surface, lambda_c=0.08)
+        assert (cache.hits, cache.misses) == (0, 2)
+        assert cache.decompose(surface, lambda_c=0.08) is not None
+        assert cache.hits == 1
+
+    def test_corrupt_parameters_are_a_miss(self, measurement, cache):
+        import h5py
+
+        surface = Surface.from_datx(measurement)
+        cache.decompose(surface, lambda_c=0.08)
+        (path,) = cache.directory.glob("*.h5")
+        with h5py.File(path, "a") as f:
+            f["roughness"].attrs["parameters"] = '{"Sa": 0.1'
+        cache.decompose(surface, lambda_c=0.08)
+        assert (cache.hits, cache.misses) == (0, 2)
+        cache.decompose(surface, lambda_c=0.08)
+        assert cache.hits == 1
+
+    def test_concurrent_stores_of_one_key(self, cache):
+        from concurrent.futures import ThreadPoolExecutor
+
+        surface = generate_synthetic(nx=120, ny=100, seed=1)
+        key = cache.key(surface, lambda_c=0.02)
+
+        def store(_):
+            cache.store(key, surface.decompose(lambda_c=0.02))
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(store, range(8)))
+        assert [p.name for p in cache.directory.iterdir()] == [f"{key}.h5"]
+        assert cache.load(key) is not None
+
+    def test_least_recently_used_is_evicted(self, cache):
+        surfaces = [generate_synthetic(nx=60, ny=50, seed=seed) for seed in range(3)]
+        cache.decompose(surfaces[0], lambda_c=0.02)
+        (first,) = cache.directory.glob("*.h5")
+        cache.max_bytes = 2 * first.stat().st_size + 1000
+        cache.decompose(surfaces[1], lambda_c=0.02)
+        # Distinct timestamps whatever the file system resolution
+        for age, path in enumerate(sorted(cache.directory.glob("*.h5"))):
+            os.utime(path, (age, age))
+        cache.decompose(surfaces[0], lambda_c=0.02)  # hit, now most recent
+        cache.decompose(surfaces[2], lambda_c=0.02)
+        assert cache.stats.entries == 2
+        assert cache.stats.nbytes <= cache.max_bytes
+        cache.decompose(surfaces[0], lambda_c=0.02)
+        assert cache.hits == 2
+
+    def test_stats_and_clear(self, cache):
+        cache.decompose(generate_synthetic(nx=40, ny=30), lambda_c=0.02)
+        stats = cache.stats
+        assert stats.entries == 1
+        assert stats.nbytes > 0
+        assert str(stats).startswith("0 hits, 1 misses (0%), 1 entries")
+        cache.clear()
+        assert cache.stats.entries == 0
+
+    def test_negative_size_raises(self, tmp_path):
+        with pytest.raises(ValueError, match="non-negative"):
+            DiskCache(tmp_path, max_bytes=-1)
+
+    @pytest.mark.parametrize("compression", ["lzf", None])
+    def test_other_compression(self, tmp_path, compression):
+        cache = DiskCache(tmp_path, compression=compression)
+        surface = generate_synthetic(nx=40, ny=30)
+        miss = cache.decompose(surface, lambda_c=0.02)
+        hit = cache.decompose(surface, lambda_c=0.02)
+        np.testing.assert_array_equal(hit.roughness.z, miss.roughness.z)
+
+    def test_unknown_compression_raises(self, tmp_path):
+        with pytest.raises(ValueError, match="Compression"):
+            DiskCache(tmp_path, compression="zstd")
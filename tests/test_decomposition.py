@@ -37,6 +37,11 @@ class TestDecompose:
         # Cascaded Gaussian filters introduce small numerical errors (~1e-6)
         np.testing.assert_allclose(reconstructed.z, synthetic.z, atol=1e-5, rtol=1e-4)
 
+    def test_bands_sum_to_primary(self, synthetic):
+        dec = synthetic.decompose(lambda_c=0.08, lambda_s=0.005)
+        bands = dec.waviness + dec.roughness + dec.micro_roughness
+        np.testing.assert_allclose(bands.z, dec.primary.z, atol=1e-12)
+
     def test_cutoffs_stored(self, synthetic):
         dec = synthetic.decompose(lambda_c=0.08, lambda_s=0.005)
         assert dec.lambda_c == pytest.approx(0.08)
@@ -61,6 +66,15 @@ class TestDecompose:
         # NaN mask is restored after filtering — original NaN stays NaN
         assert dec.roughness.nan_count == 1
 
+    @pytest.mark.parametrize("interpolation", ["laplace", "biharmonic"])
+    def test_interpolation_inpaint(self, interpolation):
+        z = np.random.default_rng(0).standard_normal((50, 50))
+        z[10:30, 15:35] = np.nan
+        s = Surface.from_array(z, step_x=0.001, step_y=0.001)
+        dec = s.decompose(form="plane", lambda_c=0.01, interpolation=interpolation)
+        assert dec.roughness.nan_count == 400
+        assert np.isfinite(dec.roughness.Sa)
+
     def test_nan_mask_preserved(self):
         z = np.random.default_rng(42).standard_normal((50, 50))
         z[0, :5] = np.nan
@@ -72,6 +86,26 @@ class TestDecompose:
         assert dec.form.nan_count == 5
         assert dec.primary.nan_count == 5
 
+    def test_parameters_reflect_restored_nan_mask(self):
+        z = np.random.default_rng(1).standard_normal((50, 50))
+        z[:10, :] = np.nan
+        s = Surface.from_array(z, step_x=0.001, step_y=0.001)
+        dec = s.decompose(form="plane", lambda_c=0.01)
+        assert dec.roughness.moments.n == 2000
+        valid = dec.roughness.z[np.isfinite(dec.roughness.z)]
+        assert dec.roughness.Sq == pytest.approx(np.std(valid))
+
+    def test_form_accepts_polynomial_transform(self, synthetic):
+        from surface_analysis.transforms.projection import Polynomial
+
+        dec = synthetic.decompose(
+            form=Polynomial(degree=2, max_fit_points=2_000), lambda_c=0.08
+        )
+        full = synthetic.decompose(form="polynomial", lambda_c=0.08)
+        assert dec.form_fit.fit_stride == 5
+        assert dec.form_fit.standard_error.shape == (6,)
+        assert dec.roughness.Sq == pytest.approx(full.roughness.Sq, rel=1e-3)
+
     def test_unknown_form_raises(self, synthetic):
         with pytest.raises(ValueError, match="Unknown form"):
             synthetic.decompose(form="cylinder")
@@ -79,3 +113,131 @@ class TestDecompose:
     def test_unknown_interpolation_raises(self, synthetic):
         with pytest.raises(ValueError, match="Unknown interpolation"):
             synthetic.decompose(interpolation="cubic")
+
+    @pytest.mark.parametrize("interpolation", ["linear", "nearest"])
+    def test_workers_give_same_layers(self, synthetic, interpolation):
+        synthetic.z[50:60, 70:90] = np.nan
+        serial = synthetic.decompose(
+            lambda_c=0.08, lambda_s=0.005, interpolation=interpolation
+        )
+        threaded = synthetic.decompose(
+            lambda_c=0.08, lambda_s=0.005, interpolation=interpolation, workers=4
+        )
+        for name in ("form", "waviness", "roughness", "micro_roughness"):
+            np.testing.assert_allclose(
+                getattr(threaded, name).z, getattr(serial, name).z, atol=1e-12
+            )
+
+
+class TestLazyLayers:
+    @pytest.fixture()
+    def holed(self):
+        from surface_analysis.io import generate_synthetic
+
+        s = generate_synthetic(nx=160, ny=120, seed=3)
+        s.z[40:50, 30:60] = np.nan
+        return s
+
+    @pytest.fixture()
+    def filter_calls(self, monkeypatch):
+        from surface_analysis.transforms import filtering
+
+        calls = []
+        bank = filtering.lowpass_bank
+
+        def counting(surface, cutoffs, *args, **kwargs):
+            calls.extend(cutoffs)
+            return bank(surface, cutoffs, *args, **kwargs)
+
+        monkeypatch.setattr(filtering, "lowpass_bank", counting)
+        return calls
+
+    def test_nothing_computed_up_front(self, holed, filter_calls):
+        dec = holed.decompose(lambda_c=0.08, lambda_s=0.005)
+        assert dec.computed == ()
+        assert filter_calls == []
+        assert dec.form_fit is not None
+
+    def test_roughness_skips_other_layers(self, holed, filter_calls):
+        dec = holed.decompose(lambda_c=0.08, lambda_s=0.005)
+        _ = dec.roughness
+        assert dec.computed == ("waviness", "roughness")
+        assert sorted(filter_calls) == [0.005, 0.08]
+
+    def test_micro_roughness_skips_lambda_c_filter(self, holed, filter_calls):
+        dec = holed.decompose(lambda_c=0.08, lambda_s=0.005)
+        _ = dec.micro_roughness
+        assert filter_calls == [0.005]
+        _ = dec.roughness
+        assert filter_calls == [0.005, 0.08]
+
+    def test_layers_are_cached(self, holed, filter_calls):
+        dec = holed.decompose(lambda_c=0.08)
+        assert dec.roughness is dec.roughness
+        assert filter_calls == [0.08]
+
+    @pytest.mark.parametrize("lambda_s", [None, 0.005])
+    def test_matches_eager_pipeline(self, holed, lambda_s):
+        from surface_analysis.transforms.filtering import lowpass_bank
+        from surface_analysis.transforms.interpolation import Linear
+        from surface_analysis.transforms.projection import Polynomial
+
+        filled = holed.apply(Linear())
+        form_z = Polynomial(degree=2).fit(filled).evaluate(filled.x, filled.y)
+        form = Surface(z=form_z, step_x=holed.step_x, step_y=holed.step_y)
+        primary = filled - form
+        if lambda_s is None:
+            (waviness,) = lowpass_bank(primary, [0.08])
+            roughness, micro = primary - waviness, None
+        else:
+            waviness, lowpass_s = lowpass_bank(primary, [0.08, lambda_s])
+            roughness, micro = lowpass_s - waviness, primary - lowpass_s
+        mask = np.isnan(holed.z)
+
+        dec = holed.decompose(lambda_c=0.08, lambda_s=lambda_s)
+        for name, expected in [
+            ("form", form),
+            ("primary", primary),
+            ("waviness", waviness),
+            ("roughness", roughness),
+            ("micro_roughness", micro),
+        ]:
+            layer = getattr(dec, name)
+            if expected is None:
+                assert layer is None
+                continue
+            expected.z[mask] = np.nan
+            np.testing.assert_array_equal(layer.z, expected.z, err_msg=name)
+
+    def test_materialize_computes_all_and_drops_intermediates(self, holed):
+        dec = holed.decompose(lambda_c=0.08, lambda_s=0.005)
+        assert dec.materialize() is dec
+        assert dec.computed == (
+            "form",
+            "primary",
+            "waviness",
+            "roughness",
+            "micro_roughness",
+        )
+        assert dec._primary_filled is None
+        assert dec.roughness.nan_count == 300
+
+    def test_released_layer_is_recomputed(self, holed):
+        dec = holed.decompose(lambda_c=0.08, lambda_s=0.005)
+        before = dec.roughness.z.copy()
+        dec.release("roughness", "waviness")
+        assert dec.computed == ()
+        np.testing.assert_array_equal(dec.roughness.z, before)
+
+    def test_release_intermediates(self, holed):
+        dec = holed.decompose(lambda_c=0.08)
+        roughness = dec.roughness
+        dec.release()
+        assert dec.roughness is roughness
+        with pytest.raises(ValueError, match="released"):
+            _ = dec.primary
+
+    def test_release_unknown_layer_raises(self, holed):
+        dec = holed.decompose(lambda_c=0.08)
+        with pytest.raises(ValueError, match="Unknown layer"):
+            dec.release("texture")
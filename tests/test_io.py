@@ -3,7 +3,7 @@ from __future__ import annotations
 import numpy as np
 import pytest
 
-from surface_analysis.io import generate_synthetic
+from surface_analysis.io import generate_synthetic, with_holes
 
 
 class TestGenerateSynthetic:
@@ -46,3 +46,133 @@ class TestGenerateSynthetic:
             waviness_amplitude=0,
         )
         assert s_curved.Sz > s_flat.Sz * 10
+
+
+class TestWithHoles:
+    def test_adds_holes_to_a_copy(self):
+        s = generate_synthetic(nx=100, ny=50)
+        holed = with_holes(s, n_holes=10)
+        assert 0 < holed.nan_count <= 10 * 7 * 39
+        assert s.nan_count == 0
+        assert (holed.step_x, holed.x0) == (s.step_x, s.x0)
+
+    def test_reproducible_with_seed(self):
+        s = generate_synthetic(nx=100, ny=50)
+        np.testing.assert_array_equal(
+            with_holes(s, 10, seed=1).z, with_holes(s, 10, seed=1).z
+        )
+
+
+class TestHDF5:
+    def test_roundtrip(self, tmp_path):
+        from surface_analysis.io import load_hdf5, save_hdf5
+
+        s = generate_synthetic(nx=40, ny=30, step=0.002)
+        s.z[3, 4] = np.nan
+        save_hdf5(s, str(tmp_path / "s.h5"))
+        loaded = load_hdf5(str(tmp_path / "s.h5"))
+        np.testing.assert_array_equal(loaded.z, s.z)
+        assert (loaded.step_x, loaded.step_y) == (s.step_x, s.step_y)
+
+        region = s[2::2, 5:]
+        save_hdf5(region, str(tmp_path / "s.h5"))
+        loaded = load_hdf5(str(tmp_path / "s.h5"))
+        np.testing.assert_array_equal(loaded.z, region.z)
+        assert (loaded.x0, loaded.y0) == (region.x0, region.y0)
+
+
+class TestDatx:
+    @pytest.fixture
+    def raw(self):
+        rng = np.random.default_rng(0)
+        z = rng.normal(0, 500, (90, 70)).astype(np.float32)
+        z[5, 6] = -1e9  # "No Data" sentinel
+        z[7, 8] = 1e30  # out-of-range invalid value
+        return z
+
+    @staticmethod
+    def reference(raw):
+        z = raw.astype(np.float64)
+        z[np.isclose(z, -1e9) | (z > 1e20)] = np.nan
+        return z * 1e-6
+
+    @pytest.mark.parametrize("chunks", [None, (16, 70)])
+    def test_load_in_blocks(self, tmp_path, write_datx, raw, chunks, monkeypatch):
+        from surface_analysis import io
+
+        monkeypatch.setattr(io, "_BLOCK_BYTES", 20 * 70 * 8)  # several blocks
+        path = write_datx(tmp_path / "m.datx", raw, nodata=-1e9, chunks=chunks)
+        s = io.load_datx(str(path))
+        np.testing.assert_array_equal(s.z, self.reference(raw))
+        assert s.z.dtype == np.float64
+        assert s.step_x == pytest.approx(0.002)
+
+    def test_peak_memory_is_one_array(self, tmp_path, write_datx, monkeypatch):
+        import tracemalloc
+
+        from surface_analysis import io
+
+        monkeypatch.setattr(io, "_BLOCK_BYTES", 1 << 20)
+        raw = np.zeros((1000, 1000), dtype=np.float32)
+        path = write_datx(tmp_path / "m.datx", raw)
+        tracemalloc.start()
+        s = io.load_datx(str(path))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert peak < 1.3 * s.z.nbytes
+
+    def test_lazy_regions(self, tmp_path, write_datx, raw):
+        from surface_analysis import Surface
+        from surface_analysis.io import DatxReader
+
+        path = write_datx(tmp_path / "m.datx", raw, nodata=-1e9)
+        expected = self.reference(raw)
+        with Surface.from_datx(str(path), lazy=True) as datx:
+            assert isinstance(datx, DatxReader)
+            assert datx.shape == (90, 70)
+            assert datx.dtype == np.float32
+            np.testing.assert_array_equal(datx[3:40, 5:9].z, expected[3:40, 5:9])
+            strided = datx[::3, 1::2]
+            np.testing.assert_array_equal(strided.z, expected[::3, 1::2])
+            assert strided.step_y == pytest.approx(3 * datx.step_y)
+            assert strided.step_x == pytest.approx(2 * datx.step_x)
+            assert (strided.x0, strided.y0) == (datx.step_x, 0.0)
+            np.testing.assert_array_equal(datx.read().z, expected)
+            with pytest.raises(ValueError, match="pair of slices"):
+                datx[3]
+            with pytest.raises(ValueError, match="positive"):
+                datx[::-1, :]
+
+
+class TestScanDatx:
+    def test_headers_match_load(self, tmp_path, write_datx):
+        from surface_analysis.io import load_datx, scan_datx
+
+        write_datx(tmp_path / "a.datx", np.zeros((30, 40), np.float32), nodata=-1e9)
+        write_datx(tmp_path / "b.datx", np.zeros((20, 10)), step_m=5e-6)
+        (tmp_path / "c.datx").write_bytes(b"truncated")
+
+        a, b, c = scan_datx(tmp_path, workers=2)
+        loaded = load_datx(str(tmp_path / "a.datx"))
+        assert a.ok
+        assert a.shape == loaded.shape
+        assert (a.step_x, a.step_y) == (loaded.step_x, loaded.step_y)
+        assert a.nodata == -1e9
+        assert a.dtype == "<f4"
+        assert a.nbytes == loaded.z.nbytes
+        assert b.step_x == pytest.approx(0.005)
+        assert b.dtype == "<f8"
+        assert not c.ok
+        assert c.path == tmp_path / "c.datx"
+        assert "OSError" in c.error
+
+    def test_missing_surface_group(self, tmp_path):
+        import h5py
+
+        from surface_analysis.io import scan_datx
+
+        with h5py.File(tmp_path / "empty.datx", "w") as f:
+            f.create_group("Data")
+        (info,) = scan_datx([tmp_path / "empty.datx"])
+        assert not info.ok
+        assert "Surface" in info.error
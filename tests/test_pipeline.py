@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from surface_analysis import Pipeline, Surface
+from surface_analysis.io import generate_synthetic
+from surface_analysis.pipeline import fingerprint, transform_key
+from surface_analysis.transforms.filtering import Gaussian
+from surface_analysis.transforms.interpolation import Linear
+from surface_analysis.transforms.projection import Polynomial
+
+
+@pytest.fixture
+def holed():
+    s = generate_synthetic(nx=160, ny=120, seed=5)
+    s.z[30:40, 50:70] = np.nan
+    return s
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    counts = {"fill": 0, "fit": 0}
+    fill, fit = Linear.transform, Polynomial.fit
+
+    def counting_fill(self, surface):
+        counts["fill"] += 1
+        return fill(self, surface)
+
+    def counting_fit(self, surface, workers=None):
+        counts["fit"] += 1
+        return fit(self, surface, workers)
+
+    monkeypatch.setattr(Linear, "transform", counting_fill)
+    monkeypatch.setattr(Polynomial, "fit", counting_fit)
+    return counts
+
+
+class TestKeys:
+    def test_fingerprint_follows_content(self, holed):
+        copy = holed.copy()
+        assert fingerprint(copy) == fingerprint(holed)
+        copy.z[0, 0] += 1e-9
+        assert fingerprint(copy) != fingerprint(holed)
+        resampled = Surface(z=holed.z, step_x=holed.step_x * 2, step_y=holed.step_y)
+        assert fingerprint(resampled) != fingerprint(holed)
+
+    def test_transform_key_ignores_workers(self):
+        assert transform_key(Linear()) == transform_key(Linear(workers=4))
+        assert transform_key(Gaussian(0.8)) == transform_key(Gaussian(0.8))
+        assert transform_key(Gaussian(0.8)) != transform_key(Gaussian(0.25))
+        assert transform_key(Polynomial(degree=1)) != transform_key(
+            Polynomial(degree=2)
+        )
+
+    def test_array_parameters_are_keyed_by_content(self):
+        class Offset:
+            def __init__(self, values):
+                self.values = values
+
+            def transform(self, surface):
+                return surface.with_heights(surface.z + self.values.mean())
+
+        a = np.zeros(1001)
+        b = a.copy()
+        b[500] = 1.0
+        assert repr(a) == repr(b)  # numpy elides the middle elements
+        assert transform_key(Offset(a)) != transform_key(Offset(b))
+        assert transform_key(Offset(a)) == transform_key(Offset(a.copy()))
+
+    def test_unstable_parameters_bypass_the_cache(self, holed):
+        class Apply:
+            def __init__(self, function):
+                self.function = function
+
+            def transform(self, surface):
+                return surface.with_heights(self.function(surface.z))
+
+        negate = Apply(np.negative)
+        with pytest.raises(TypeError, match="cache key"):
+            transform_key(Apply(object()))
+        pipeline = Pipeline()
+        result = pipeline.apply(holed, Linear(), negate, Gaussian(0.25))
+        expected = holed.apply(Linear(), negate, Gaussian(0.25))
+        np.testing.assert_array_equal(result.z, expected.z)
+        assert len(pipeline) == 1  # only the fill
+
+
+class TestDecompose:
+    def test_cutoff_sweep_fills_and_fits_once(self, holed, calls):
+        pipeline = Pipeline()
+        for lambda_c in np.linspace(0.05, 0.3, 10):
+            dec = pipeline.decompose(holed, lambda_c=lambda_c, lambda_s=0.005)
+            assert dec.roughness.nan_count == 200
+        assert calls == {"fill": 1, "fit": 1}
+        assert pipeline.misses == 2
+        assert pipeline.hits == 18
+
+    def test_matches_surface_decompose(self, holed):
+        pipeline = Pipeline()
+        pipeline.decompose(holed, lambda_c=0.25)
+        cached = pipeline.decompose(holed, lambda_c=0.08, lambda_s=0.005)
+        expected = holed.decompose(lambda_c=0.08, lambda_s=0.005)
+        for name in ("form", "primary", "waviness", "roughness", "micro_roughness"):
+            np.testing.assert_array_equal(
+                getattr(cached, name).z, getattr(expected, name).z, err_msg=name
+            )
+        # Layers are the caller's to modify, the cached primary is not
+        cached.materialize()
+        assert cached.primary.z.flags.writeable
+
+    def test_other_form_or_content_misses(self, holed, calls):
+        pipeline = Pipeline()
+        pipeline.decompose(holed, lambda_c=0.08)
+        pipeline.decompose(holed, form="plane", lambda_c=0.08)
+        assert calls == {"fill": 1, "fit": 2}
+        holed.z[0, 0] += 1e-3
+        pipeline.decompose(holed, lambda_c=0.08)
+        assert calls == {"fill": 2, "fit": 3}
+
+
+class TestApply:
+    def test_prefix_is_reused(self, holed, calls):
+        pipeline = Pipeline()
+        form_removed = pipeline.apply(holed, Linear(), Polynomial())
+        smoothed = pipeline.apply(holed, Linear(), Polynomial(), Gaussian(0.08))
+        assert calls == {"fill": 1, "fit": 1}
+        assert pipeline.apply(holed, Linear(), Polynomial()) is form_removed
+        np.testing.assert_array_equal(
+            smoothed.z,
+            holed.apply(Linear(), Polynomial(), Gaussian(0.08)).z,
+        )
+
+    def test_is_a_transformation(self, holed, calls):
+        pipeline = Pipeline(Linear(), Polynomial())
+        first = holed.apply(pipeline)
+        assert holed.apply(pipeline) is first
+        assert calls == {"fill": 1, "fit": 1}
+
+    def test_cached_surfaces_are_read_only(self, holed):
+        filled = Pipeline().apply(holed, Linear())
+        with pytest.raises(ValueError, match="read-only"):
+            filled.z[0, 0] = 0.0
+        filled.copy().z[0, 0] = 0.0
+
+    def test_no_op_transform_keeps_input_writable(self):
+        s = generate_synthetic(nx=40, ny=30)
+        pipeline = Pipeline()
+        assert pipeline.apply(s, Linear()) is s
+        assert s.z.flags.writeable
+        assert len(pipeline) == 0
+
+
+class TestMemoryBudget:
+    def test_least_recently_used_is_evicted(self, holed):
+        nbytes = holed.z.nbytes
+        pipeline = Pipeline(memory_budget=2 * nbytes)
+        a = pipeline.apply(holed, Linear(), Gaussian(0.25))
+        pipeline.apply(holed, Linear(), Gaussian(0.08))
+        # The fill was used more recently than Gaussian(0.25), which is evicted
+        assert len(pipeline) == 2
+        assert pipeline.nbytes == 2 * nbytes
+        assert pipeline.apply(holed, Linear(), Gaussian(0.25)) is not a
+
+    def test_entry_over_budget_is_not_cached(self, holed):
+        pipeline = Pipeline(memory_budget=holed.z.nbytes - 1)
+        result = pipeline.apply(holed, Linear())
+        assert len(pipeline) == 0
+        assert pipeline.nbytes == 0
+        result.z -= result.z  # stays writable when not cached
+
+    def test_clear(self, holed):
+        pipeline = Pipeline()
+        pipeline.apply(holed, Linear())
+        pipeline.clear()
+        assert len(pipeline) == 0
+        assert pipeline.nbytes == 0
+
+    def test_negative_budget_raises(self):
+        with pytest.raises(ValueError, match="non-negative"):
+            Pipeline(memory_budget=-1)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from surface_analysis import Surface
+from surface_analysis.io import generate_synthetic, load_datx, load_hdf5, save_hdf5
+from surface_analysis.moments import HeightMoments
+from surface_analysis.precision import (
+    default_dtype,
+    get_default_dtype,
+    resolve_dtype,
+    set_default_dtype,
+)
+
+
+@pytest.fixture
+def holed():
+    s = generate_synthetic(nx=300, ny=240, step=0.002)
+    z = s.z.copy()
+    rng = np.random.default_rng(1)
+    for _ in range(30):
+        r, c = rng.integers(0, 230), rng.integers(0, 270)
+        z[r : r + rng.integers(1, 8), c : c + rng.integers(1, 30)] = np.nan
+    return z
+
+
+class TestPolicy:
+    def test_default_is_float64(self):
+        assert get_default_dtype() == np.float64
+        assert resolve_dtype(None) == np.float64
+        assert resolve_dtype("float32") == np.float32
+
+    def test_context_restores(self):
+        with default_dtype(np.float32):
+            assert get_default_dtype() == np.float32
+            assert generate_synthetic(nx=20, ny=10).z.dtype == np.float32
+            assert Surface.from_array(np.zeros((3, 3)), 1, 1).z.dtype == np.float32
+            # Per-call dtype wins over the default
+            assert generate_synthetic(nx=20, ny=10, dtype=np.float64).z.dtype == (
+                np.float64
+            )
+        assert get_default_dtype() == np.float64
+
+    def test_set_global(self):
+        try:
+            set_default_dtype(np.float32)
+            assert get_default_dtype() == np.float32
+        finally:
+            set_default_dtype(np.float64)
+
+    @pytest.mark.parametrize("dtype", [np.float16, np.int32, "complex64"])
+    def test_rejects_other_dtypes(self, dtype):
+        with pytest.raises(ValueError, match="float32 or float64"):
+            set_default_dtype(dtype)
+        assert get_default_dtype() == np.float64
+
+
+class TestLoaders:
+    def test_datx(self, tmp_path, write_datx):
+        raw = np.random.default_rng(0).normal(0, 500, (40, 30)).astype(np.float32)
+        path = str(write_datx(tmp_path / "m.datx", raw))
+        s32 = load_datx(path, dtype=np.float32)
+        s64 = load_datx(path)
+        assert s32.z.dtype == np.float32
+        np.testing.assert_allclose(s32.z, s64.z, rtol=1e-6)
+        with default_dtype(np.float32), Surface.from_datx(path, lazy=True) as datx:
+            assert datx[:5, :5].z.dtype == np.float32
+        assert Surface.from_datx(path, dtype=np.float32).z.dtype == np.float32
+        with Surface.from_datx(path, lazy=True, dtype="float32") as datx:
+            assert datx[:5, :5].z.dtype == np.float32
+
+    def test_hdf5(self, tmp_path):
+        s = generate_synthetic(nx=40, ny=30)
+        save_hdf5(s, str(tmp_path / "s.h5"))
+        loaded = load_hdf5(str(tmp_path / "s.h5"), dtype=np.float32)
+        assert loaded.z.dtype == np.float32
+        np.testing.assert_allclose(loaded.z, s.z, rtol=1e-6)
+
+
+class TestFloat32Pipeline:
+    @pytest.mark.parametrize("interpolation", ["linear", "nearest", "laplace"])
+    def test_parameters_within_0_1_percent(self, holed, interpolation):
+        s64 = Surface.from_array(holed, 0.002, 0.002)
+        s32 = Surface.from_array(holed, 0.002, 0.002, dtype=np.float32)
+        d64 = s64.decompose(lambda_c=0.25, lambda_s=0.008, interpolation=interpolation)
+        d32 = s32.decompose(lambda_c=0.25, lambda_s=0.008, interpolation=interpolation)
+        for layer in ("form", "primary", "waviness", "roughness", "micro_roughness"):
+            a, b = getattr(d64, layer), getattr(d32, layer)
+            assert b.z.dtype == np.float32
+            np.testing.assert_array_equal(np.isnan(a.z), np.isnan(b.z))
+            expected = {**a.parameters(), "Sk": a.Sk, "Vmc": a.Vmc}
+            actual = {**b.parameters(), "Sk": b.Sk, "Vmc": b.Vmc}
+            for name, value in expected.items():
+                assert actual[name] == pytest.approx(value, rel=1e-3), (layer, name)
+
+    def test_transforms_keep_dtype(self, holed):
+        from surface_analysis import Transforms
+
+        s = Surface.from_array(holed, 0.002, 0.002, dtype=np.float32)
+        filled = s.apply(Transforms.Interpolation.Linear())
+        assert filled.z.dtype == np.float32
+        for t in (
+            Transforms.Projection.Polynomial(degree=2),
+            Transforms.Filtering.Gaussian(cutoff=0.1, method="fft"),
+            Transforms.Filtering.Gaussian(cutoff=0.01, method="spatial"),
+            Transforms.Filtering.Gaussian(cutoff=0.05, method="recursive"),
+        ):
+            assert t.transform(filled).z.dtype == np.float32
+            assert t.transform(s).z.dtype == np.float32
+
+    def test_moments_accumulate_in_float64(self):
+        rng = np.random.default_rng(0)
+        values = (5.0 + rng.normal(0, 1e-3, 300_000)).astype(np.float32)
+        m32 = HeightMoments.from_values(values)
+        m64 = HeightMoments.from_values(values.astype(np.float64))
+        for name in ("mean", "mad", "m2", "m3", "m4"):
+            assert getattr(m32, name) == pytest.approx(getattr(m64, name), rel=1e-9)
+
+    def test_sdr_of_nearly_flat_surface(self):
+        # Slopes of ~1e-4: 1 + slope^2 rounds to 1 in float32
+        s64 = generate_synthetic(
+            nx=200,
+            ny=200,
+            radius=1e6,
+            waviness_amplitude=0,
+            roughness_rms=1e-6,
+            noise_rms=0,
+        )
+        s32 = Surface.from_array(s64.z, s64.step_x, s64.step_y, dtype=np.float32)
+        assert s64.Sdr > 0
+        assert s32.Sdr == pytest.approx(s64.Sdr, rel=1e-3)
+        assert s32.developed_area_ratio("triangulation") == pytest.approx(
+            s64.developed_area_ratio("triangulation"), rel=1e-3
+        )
+
+    def test_tiled(self, tmp_path):
+        import h5py
+
+        from surface_analysis.tiled import decompose_tiled
+
+        s = generate_synthetic(nx=120, ny=100, step=0.002)
+        save_hdf5(s, str(tmp_path / "s.h5"))
+        decompose_tiled(
+            tmp_path / "s.h5", tmp_path / "out.h5", lambda_c=0.08, dtype=np.float32
+        )
+        with h5py.File(tmp_path / "out.h5") as f:
+            assert f["roughness"].dtype == np.float32
+        roughness = load_hdf5(str(tmp_path / "out.h5"), "roughness")
+        expected = s.decompose(lambda_c=0.08).roughness
+        assert roughness.Sa == pytest.approx(expected.Sa, rel=1e-3)
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pytest
+
+from surface_analysis.io import generate_synthetic
+from surface_analysis.shared import SharedDecomposition, SharedSurface
+
+
+def _double_in_place(shared: SharedSurface) -> float:
+    with shared:
+        shared.surface.z *= 2
+        return shared.surface.parameters()["Sa"]
+
+
+def _roughness_sa(shared: SharedDecomposition) -> float:
+    with shared:
+        return shared.decomposition.roughness.parameters()["Sa"]
+
+
+@pytest.fixture
+def surface():
+    return generate_synthetic(nx=200, ny=150, step=0.002)
+
+
+class TestSharedSurface:
+    def test_round_trip(self, surface):
+        with surface.share() as shared:
+            np.testing.assert_array_equal(shared.surface.z, surface.z)
+            assert shared.surface.step_x == surface.step_x
+            assert shared.owner
+        region = surface[10:, 20:]
+        with region.share() as shared:
+            attached = pickle.loads(pickle.dumps(shared))
+            assert (attached.surface.x0, attached.surface.y0) == (
+                region.x0,
+                region.y0,
+            )
+            attached.close()
+
+    def test_pickles_as_reference(self, surface):
+        with surface.share() as shared:
+            payload = pickle.dumps(shared)
+            assert len(payload) < 500
+            attached = pickle.loads(payload)
+            assert not attached.owner
+            attached.surface.z[0, 0] = 42.0
+            assert shared.surface.z[0, 0] == 42.0
+            attached.close()
+
+    def test_worker_writes_are_visible(self, surface):
+        with surface.share() as shared, ProcessPoolExecutor(max_workers=1) as pool:
+            sa = pool.submit(_double_in_place, shared).result()
+            np.testing.assert_array_equal(shared.surface.z, 2 * surface.z)
+            assert sa == pytest.approx(2 * surface.parameters()["Sa"])
+
+    def test_exit_unlinks_segment(self, surface):
+        with surface.share() as shared:
+            name = shared.ref.name
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=name)
+        with pytest.raises(ValueError, match="closed"):
+            _ = shared.surface
+
+    def test_close_with_live_view_raises(self, surface):
+        shared = surface.share()
+        z = shared.surface.z
+        with pytest.raises(BufferError, match="still alive"):
+            shared.close()
+        del z
+        shared.close()
+        shared.unlink()
+
+    def test_empty_float32(self):
+        with SharedSurface.empty((4, 5), 0.1, 0.2, dtype=np.float32) as shared:
+            assert shared.surface.z.dtype == np.float32
+            assert shared.surface.shape == (4, 5)
+
+
+class TestSharedDecomposition:
+    def test_worker_reads_layers(self, surface):
+        dec = surface.decompose(lambda_c=0.08, lambda_s=0.008)
+        expected = dec.roughness.parameters()["Sa"]
+        with dec.share() as shared, ProcessPoolExecutor(max_workers=1) as pool:
+            assert len(pickle.dumps(shared)) < 2000
+            assert pool.submit(_roughness_sa, shared).result() == expected
+            np.testing.assert_array_equal(
+                shared.decomposition.micro_roughness.z, dec.micro_roughness.z
+            )
+            assert shared.decomposition.form_fit == dec.form_fit
+
+    def test_without_micro_roughness(self, surface):
+        dec = surface.decompose(lambda_c=0.08)
+        with dec.share() as shared:
+            assert "micro_roughness" not in shared.layers
+            assert shared.decomposition.micro_roughness is None
@@ -144,6 +144,35 @@ class TestISOParameters:
         s = Surface.from_array(np.zeros((10, 10)), step_x=0.01, step_y=0.01)
         assert s.Sdr == pytest.approx(0.0, abs=1e-10)
 
+    def test_gradient_matches_numpy(self):
+        z = np.random.default_rng(4).standard_normal((30, 40))
+        s = Surface.from_array(z, step_x=0.01, step_y=0.02)
+        dzdx, dzdy = s.gradient()
+        np.testing.assert_array_equal(dzdx, np.gradient(z, 0.01, axis=1))
+        np.testing.assert_array_equal(dzdy, np.gradient(z, 0.02, axis=0))
+        dzdx32, _ = s.gradient(np.float32)
+        assert dzdx32.dtype == np.float32
+        np.testing.assert_allclose(dzdx32, dzdx, rtol=1e-6)
+
+    def test_sdr_triangulated_tilted_plane(self):
+        # z = 0.5 x + 0.2 y → every triangle has area sqrt(1 + 0.29) / 2
+        y, x = np.mgrid[0:20, 0:30] * 0.01
+        s = Surface.from_array(0.5 * x + 0.2 * y, step_x=0.01, step_y=0.01)
+        expected = (np.sqrt(1.29) - 1) * 100
+        assert s.developed_area_ratio("triangulation") == pytest.approx(expected)
+        assert s.Sdr == pytest.approx(expected)
+
+    def test_sdr_triangulated_skips_nan_cells(self):
+        z = np.zeros((10, 10))
+        z[4, 4] = np.nan
+        s = Surface.from_array(z, step_x=0.01, step_y=0.01)
+        assert s.developed_area_ratio("triangulation") == pytest.approx(0.0)
+
+    def test_developed_area_ratio_unknown_method(self):
+        s = Surface.from_array(np.zeros((5, 5)), step_x=0.01, step_y=0.01)
+        with pytest.raises(ValueError, match="Unknown method"):
+            s.developed_area_ratio("mesh")
+
     def test_parameters_keys(self):
         s = Surface.from_array(np.random.randn(10, 10), step_x=0.01, step_y=0.01)
         params = s.parameters()
@@ -151,6 +180,194 @@ class TestISOParameters:
         assert set(params.keys()) == expected
 
 
+class TestMoments:
+    def test_matches_numpy_reference(self):
+        z = np.random.default_rng(7).standard_normal((40, 30)) + 5.0
+        z[3, :4] = np.nan
+        s = Surface.from_array(z, step_x=0.01, step_y=0.01)
+        v = z[np.isfinite(z)]
+        d = v - v.mean()
+        sq = np.sqrt(np.mean(d**2))
+        assert s.Sa == pytest.approx(np.mean(np.abs(d)))
+        assert s.Sq == pytest.approx(sq)
+        assert s.Sp == pytest.approx(v.max() - v.mean())
+        assert s.Sv == pytest.approx(v.mean() - v.min())
+        assert s.Ssk == pytest.approx(np.mean(d**3) / sq**3)
+        assert s.Sku == pytest.approx(np.mean(d**4) / sq**4)
+
+    def test_parameters_match_properties(self):
+        z = np.random.default_rng(3).standard_normal((20, 20))
+        s = Surface.from_array(z, step_x=0.01, step_y=0.02)
+        params = s.parameters()
+        for name, value in params.items():
+            assert value == pytest.approx(getattr(s, name))
+
+    def test_counts_finite_points(self):
+        z = np.ones((4, 5))
+        z[0, 0] = np.nan
+        s = Surface.from_array(z, step_x=0.01, step_y=0.01)
+        assert s.moments.n == 19
+
+
+class TestAbbottFirestone:
+    @pytest.fixture()
+    def curve(self):
+        from surface_analysis.abbott_firestone import AbbottFirestone
+
+        z = np.random.default_rng(8).gamma(2.0, size=(120, 100))
+        return AbbottFirestone.from_surface(z, n_bins=2_000)
+
+    def test_equivalent_line_matches_secant_scan(self, curve):
+        mr, h = curve.material_ratio, curve.height
+        best, start, end = -np.inf, 0, 0
+        for i in range(len(mr)):
+            if mr[i] > 60.0:
+                break
+            slope = (curve.Smc(mr[i] + 40.0) - h[i]) / 40.0
+            if slope > best:
+                best, start = slope, i
+                end = int(np.argmin(np.abs(mr - (mr[i] + 40.0))))
+        expected = np.polyfit(mr[start : end + 1], h[start : end + 1], 1)
+        assert curve._compute_equivalent_line() == pytest.approx(tuple(expected))
+
+    def test_volumes_match_direct_integration(self, curve):
+        mr, h = curve.material_ratio, curve.height
+        for p in (10.0, 50.0, 80.0):
+            idx = int(np.argmin(np.abs(h - curve.Smc(p))))
+            vm = abs(np.trapezoid(mr[: idx + 1], x=h[: idx + 1])) / 100.0
+            vv = abs(np.trapezoid(100.0 - mr[idx:], x=h[idx:])) / 100.0
+            assert curve._Vm(p) == pytest.approx(vm, rel=1e-9)
+            assert curve._Vv(p) == pytest.approx(vv, rel=1e-9)
+
+    def test_smr_inverts_smc(self, curve):
+        for p in (5.0, 40.0, 90.0):
+            assert curve.Smr(curve.Smc(p)) == pytest.approx(p, abs=0.1)
+
+
+class TestMaterialRatioModes:
+    @pytest.fixture()
+    def z(self):
+        return np.random.default_rng(9).gamma(2.0, size=(200, 150))
+
+    def test_exact_curve_is_sorted_heights(self, z):
+        from surface_analysis.abbott_firestone import AbbottFirestone
+
+        curve = AbbottFirestone.from_surface(z, n_bins=z.size, method="exact")
+        np.testing.assert_array_equal(curve.height, np.sort(z.ravel())[::-1])
+        assert curve.material_ratio[-1] == pytest.approx(100.0)
+
+    def test_exact_core_ignores_spike(self, z):
+        from surface_analysis.abbott_firestone import AbbottFirestone
+
+        spiked = z.copy()
+        spiked[3, 3] = 1e3
+        base = AbbottFirestone.from_surface(z, method="exact")
+        curve = AbbottFirestone.from_surface(spiked, method="exact")
+        assert curve.height[0] == 1e3
+        assert curve.Sk == pytest.approx(base.Sk, rel=1e-3)
+        assert curve.Vmc == pytest.approx(base.Vmc, rel=1e-3)
+
+    def test_tiles_match_exact_curve(self, z):
+        from surface_analysis.abbott_firestone import AbbottFirestone
+
+        exact = AbbottFirestone.from_surface(z, method="exact")
+        streamed = AbbottFirestone.from_tiles(
+            (z[i : i + 25] for i in range(0, z.shape[0], 25)), capacity=1_000
+        )
+        for name in ("Sk", "Spk", "Smr1", "Vmc", "Vvc"):
+            assert getattr(streamed, name) == pytest.approx(
+                getattr(exact, name), rel=2e-2
+            )
+
+    def test_small_sketch_is_exact(self, z):
+        from surface_analysis.abbott_firestone import AbbottFirestone
+
+        exact = AbbottFirestone.from_surface(z[:10], n_bins=z.size, method="exact")
+        streamed = AbbottFirestone.from_tiles([z[:5], z[5:10]])
+        np.testing.assert_allclose(streamed.height, exact.height)
+        np.testing.assert_allclose(streamed.material_ratio, exact.material_ratio)
+
+    def test_merged_sketches_bounded(self, z):
+        from surface_analysis.abbott_firestone import HeightSketch
+
+        a = HeightSketch(capacity=500).update(z[:100])
+        b = HeightSketch(capacity=500).update(z[100:])
+        merged = a.merge(b)
+        assert merged.count == z.size
+        assert merged.values.size <= 1_000
+        assert (merged.min, merged.max) == (z.min(), z.max())
+
+    def test_unknown_method(self, z):
+        from surface_analysis.abbott_firestone import AbbottFirestone
+
+        with pytest.raises(ValueError, match="Unknown method"):
+            AbbottFirestone.from_surface(z, method="kde")
+
+
+class TestCache:
+    @pytest.fixture()
+    def surface(self):
+        z = np.random.default_rng(5).standard_normal((30, 30))
+        return Surface.from_array(z, step_x=0.01, step_y=0.01)
+
+    def test_abbott_firestone_built_once(self, surface):
+        assert surface.abbott_firestone is surface.abbott_firestone
+
+    def test_gradient_shared_by_hybrid_parameters(self, surface):
+        surface.parameters()
+        gradient = surface.gradient()
+        _ = surface.Sdq, surface.Sdr
+        assert surface.gradient() is gradient
+
+    def test_reassigning_z_invalidates(self, surface):
+        sa = surface.Sa
+        surface.z = surface.z * 2.0
+        assert surface.Sa == pytest.approx(2.0 * sa)
+
+    def test_invalidate_after_in_place_change(self, surface):
+        _ = surface.Sq, surface.nan_count, surface.Sk
+        surface.z[:5, :] = np.nan
+        surface.invalidate()
+        assert surface.nan_count == 150
+        assert surface.moments.n == 750
+
+    def test_cached_arrays_are_read_only(self, surface):
+        with pytest.raises(ValueError):
+            surface._valid[0] = 1.0
+
+    def test_copy_does_not_share_cache(self, surface):
+        _ = surface.Sa
+        c = surface.copy()
+        c.z[:] = 0.0
+        assert c.Sa == pytest.approx(0.0)
+        assert surface.Sa > 0
+
+    def test_pickle_drops_cache(self, surface):
+        import pickle
+
+        size = len(pickle.dumps(surface))
+        surface.parameters()
+        _ = surface.Sk, surface.gradient()
+        payload = pickle.dumps(surface)
+        assert len(payload) == size
+        assert len(payload) < 1.1 * surface.z.nbytes
+        restored = pickle.loads(payload)
+        np.testing.assert_array_equal(restored.z, surface.z)
+        assert restored.parameters() == surface.parameters()
+
+    def test_shallow_copy_has_its_own_cache(self, surface):
+        import copy
+
+        sa = surface.Sa
+        clone = copy.copy(surface)
+        assert clone.z is surface.z
+        assert clone._cache is not surface._cache
+        clone.z = clone.z * 2.0
+        assert surface._cache
+        assert surface.Sa == sa
+        assert clone.Sa == pytest.approx(2.0 * sa)
+
+
 class TestCopy:
     def test_returns_equal_surface(self):
         s = Surface.from_array(
@@ -239,6 +456,136 @@ class TestOperators:
         np.testing.assert_array_equal(b.z, z_b)
 
 
+class TestInPlaceOperators:
+    @pytest.fixture()
+    def a(self):
+        return Surface.from_array(
+            np.array([[1.0, 2.0], [3.0, 4.0]]), step_x=0.01, step_y=0.02
+        )
+
+    @pytest.fixture()
+    def b(self):
+        return Surface.from_array(
+            np.array([[10.0, 20.0], [30.0, 40.0]]), step_x=0.01, step_y=0.02
+        )
+
+    def test_reuse_the_height_array(self, a, b):
+        z = a.z
+        a += b
+        a -= b
+        a *= 3.0
+        a /= 2.0
+        assert a.z is z
+        np.testing.assert_array_equal(z, [[1.5, 3.0], [4.5, 6.0]])
+
+    def test_invalidate_cached_parameters(self, a, b):
+        sa = a.Sa
+        a += b
+        assert a.Sa == pytest.approx(sa * 11)
+
+    def test_incompatible_shape_raises(self, a):
+        other = Surface.from_array(np.ones((5, 5)), step_x=0.01, step_y=0.02)
+        with pytest.raises(ValueError, match="Incompatible shapes"):
+            a -= other
+
+
+class TestRegions:
+    @pytest.fixture()
+    def surface(self):
+        from surface_analysis.io import generate_synthetic
+
+        s = generate_synthetic(nx=300, ny=240, step=0.002)
+        s.z[50:55, 60:90] = np.nan
+        s.z[100:103, 10:200] = np.nan
+        return s
+
+    @pytest.mark.parametrize(
+        "key",
+        [
+            (slice(20, 200), slice(30, 280)),
+            (slice(10, 230, 2), slice(5, 290, 3)),
+            (slice(None), slice(None, None, 4)),
+        ],
+    )
+    def test_view_shares_heights(self, surface, key):
+        region = surface[key]
+        assert np.shares_memory(region.z, surface.z)
+        np.testing.assert_array_equal(region.z, surface.z[key])
+        rows, cols = key
+        np.testing.assert_allclose(region.x, surface.x[cols])
+        np.testing.assert_allclose(region.y, surface.y[rows])
+        assert region.step_x == pytest.approx(surface.step_x * (cols.step or 1))
+        assert region.step_y == pytest.approx(surface.step_y * (rows.step or 1))
+
+    def test_nested_regions_keep_absolute_origin(self, surface):
+        region = surface[20:200, 30:280][5::2, 10::3]
+        assert region.x0 == pytest.approx(surface.x[40])
+        assert region.y0 == pytest.approx(surface.y[25])
+        np.testing.assert_array_equal(region.z, surface.z[25:200:2, 40:280:3])
+
+    def test_writes_go_through(self, surface):
+        region = surface[:10, :10]
+        region.z[0, 0] = 1.0
+        assert surface.z[0, 0] == 1.0
+
+    def test_parameters_match_a_copy(self, surface):
+        for region in (surface[20:200, 30:280], surface[10:230:2, 5:290:3]):
+            expected = region.copy()
+            assert not np.shares_memory(expected.z, surface.z)
+            assert region.parameters() == pytest.approx(expected.parameters())
+            assert region.Sk == pytest.approx(expected.Sk)
+
+    def test_transforms_match_a_copy(self, surface):
+        from surface_analysis import Transforms
+
+        region = surface[10:230:2, 5:290:3]
+        expected = region.copy()
+        for t in (
+            Transforms.Interpolation.Linear(),
+            Transforms.Interpolation.Nearest(),
+            Transforms.Projection.Polynomial(degree=2),
+            Transforms.Filtering.Gaussian(cutoff=0.05, method="fft"),
+        ):
+            result = t.transform(region)
+            assert (result.x0, result.y0) == (region.x0, region.y0)
+            np.testing.assert_allclose(
+                result.z, t.transform(expected).z, atol=1e-12, equal_nan=True
+            )
+        dec = region.decompose(lambda_c=0.08, lambda_s=0.01)
+        assert dec.roughness.x0 == region.x0
+        assert dec.roughness.Sa == pytest.approx(
+            expected.decompose(lambda_c=0.08, lambda_s=0.01).roughness.Sa
+        )
+
+    def test_in_place_transform_of_a_region(self, surface):
+        from surface_analysis import Transforms
+
+        untouched = surface.z[:, 150:].copy()
+        region = surface[:, :150]
+        region.apply(Transforms.Interpolation.Linear(), inplace=True)
+        surface.invalidate()
+        assert not np.isnan(surface.z[:, :150]).any()
+        np.testing.assert_array_equal(surface.z[:, 150:], untouched)
+
+    def test_operators_keep_origin(self, surface):
+        region = surface[10:20, 30:40]
+        for result in (region + region, region * 2.0, -region, region.copy()):
+            assert (result.x0, result.y0) == (region.x0, region.y0)
+
+    @pytest.mark.parametrize(
+        ("key", "match"),
+        [
+            (3, "pair of slices"),
+            ((slice(None), 3), "pair of slices"),
+            ((slice(None, None, -1), slice(None)), "positive"),
+            ((slice(5, 5), slice(None)), "Empty region"),
+        ],
+    )
+    def test_invalid_keys_raise(self, surface, key, match):
+        with pytest.raises(ValueError, match=match):
+            surface[key]
+
+
 class TestApply:
     def test_chains_transforms(self):
         from surface_analysis.transforms._base import Transformation
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from surface_analysis.io import generate_synthetic, load_hdf5, save_hdf5
+from surface_analysis.tiled import _core_shape, _halo, decompose_tiled
+
+LAYERS = ("form", "primary", "waviness", "roughness", "micro_roughness")
+
+
+@pytest.fixture()
+def synthetic():
+    s = generate_synthetic(nx=260, ny=300, seed=7)
+    s.z[100:104, 50:56] = np.nan
+    s.z[210:213, 180:182] = np.nan
+    return s
+
+
+def _tiled(surface, tmp_path, **kwargs):
+    source = str(tmp_path / "surface.h5")
+    output = str(tmp_path / "decomposition.h5")
+    save_hdf5(surface, source)
+    fit = decompose_tiled(source, output, **kwargs)
+    names = LAYERS if kwargs.get("lambda_s") else LAYERS[:-1]
+    return fit, {name: load_hdf5(output, name).z for name in names}
+
+
+class TestDecomposeTiled:
+    @pytest.mark.parametrize("lambda_c", [0.04, 0.1])  # spatial and FFT backends
+    def test_matches_in_memory(self, synthetic, tmp_path, lambda_c):
+        kwargs = {"lambda_c": lambda_c, "lambda_s": 0.01, "interpolation": "laplace"}
+        fit, layers = _tiled(synthetic, tmp_path, memory_budget=3_000_000, **kwargs)
+        dec = synthetic.decompose(**kwargs)
+        for name in LAYERS:
+            np.testing.assert_allclose(
+                layers[name], getattr(dec, name).z, rtol=0, atol=1e-12
+            )
+        np.testing.assert_allclose(
+            fit.coefficients, dec.form_fit.coefficients, rtol=1e-10
+        )
+        assert fit.residual_rms == pytest.approx(dec.form_fit.residual_rms)
+
+    def test_budget_splits_into_tiles(self):
+        halo = _halo(0.001, 0.001, 0.04)
+        core = _core_shape((300, 260), halo, 3_000_000)
+        assert core[0] < 300 and core[1] < 260
+
+    def test_small_surface_is_single_tile(self):
+        assert _core_shape((30, 20), (5, 5), 1 << 30) == (30, 20)
+
+    def test_budget_too_small_for_halo(self):
+        with pytest.raises(ValueError, match="memory_budget"):
+            _core_shape((3000, 3000), (300, 300), 1_000_000)
+
+    def test_subsampled_form(self, synthetic, tmp_path):
+        from surface_analysis import Transforms
+
+        form = Transforms.Projection.Polynomial(degree=2, fit_stride=3)
+        fit, _ = _tiled(
+            synthetic, tmp_path, form=form, lambda_c=0.04, memory_budget=3_000_000
+        )
+        assert fit.coefficients == pytest.approx(
+            form.fit(
+                synthetic.apply(Transforms.Interpolation.Linear(local=True))
+            ).coefficients
+        )
+
+    def test_region_keeps_origin(self, synthetic, tmp_path):
+        region = synthetic[40:, 30:]
+        kwargs = {"lambda_c": 0.04, "interpolation": "laplace"}
+        fit, layers = _tiled(region, tmp_path, memory_budget=3_000_000, **kwargs)
+        dec = region.decompose(**kwargs)
+        assert fit.x_domain == pytest.approx(dec.form_fit.x_domain)
+        assert fit.y_domain == pytest.approx(dec.form_fit.y_domain)
+        np.testing.assert_allclose(
+            fit.coefficients, dec.form_fit.coefficients, rtol=1e-10
+        )
+        np.testing.assert_allclose(layers["form"], dec.form.z, rtol=0, atol=1e-12)
+        form = load_hdf5(str(tmp_path / "decomposition.h5"), "form")
+        assert (form.x0, form.y0) == (region.x0, region.y0)
+
+    def test_writes_steps_and_cutoffs(self, synthetic, tmp_path):
+        import h5py
+
+        _tiled(synthetic, tmp_path, lambda_c=0.04)
+        with h5py.File(tmp_path / "decomposition.h5", "r") as f:
+            assert "micro_roughness" not in f
+            assert f.attrs["lambda_c"] == 0.04
+            assert f["roughness"].attrs["step_x"] == synthetic.step_x
@@ -5,13 +5,15 @@ import pytest
 
 from surface_analysis import Surface
 from surface_analysis.transforms._base import Transformation
-from surface_analysis.transforms.filtering import Gaussian
-from surface_analysis.transforms.interpolation import Linear, Nearest
+from surface_analysis.transforms.filtering import Gaussian, lowpass_bank
+from surface_analysis.transforms.interpolation import Inpaint, Linear, Nearest
 from surface_analysis.transforms.projection import Plane, Polynomial
 
 
 class TestProtocol:
-    @pytest.mark.parametrize("cls", [Linear, Nearest, Polynomial, Plane, Gaussian])
+    @pytest.mark.parametrize(
+        "cls", [Linear, Nearest, Inpaint, Polynomial, Plane, Gaussian]
+    )
     def test_implements_transformation(self, cls):
         assert issubclass(cls, Transformation)
 
@@ -57,6 +59,80 @@ class TestLinear:
         Linear().transform(s)
         np.testing.assert_array_equal(s.z, z_before)
 
+    @pytest.fixture()
+    def plane_with_holes(self):
+        rng = np.random.default_rng(0)
+        yy, xx = np.mgrid[0:120, 0:150]
+        plane = 0.3 * xx - 0.2 * yy + 1.0
+        z = plane.copy()
+        z[rng.random(z.shape) < 0.05] = np.nan
+        z[40:70, 20:90] = np.nan
+        z[100:103, 5:8] = np.nan
+        return plane, Surface.from_array(z, step_x=0.01, step_y=0.01)
+
+    @pytest.mark.parametrize("local", [False, True])
+    def test_recovers_plane_inside_holes(self, plane_with_holes, local):
+        plane, s = plane_with_holes
+        result = Linear(local=local).transform(s)
+        interior = (slice(1, -1), slice(1, -1))
+        np.testing.assert_allclose(result.z[interior], plane[interior], atol=1e-9)
+
+    @staticmethod
+    def _global_griddata(z):
+        # The fill Linear has always produced: griddata over every pixel
+        from scipy.interpolate import griddata
+
+        ny, nx = z.shape
+        yy, xx = np.mgrid[0:ny, 0:nx]
+        mask = np.isfinite(z)
+        points = np.column_stack([xx[mask], yy[mask]])
+        xi = np.column_stack([xx.ravel(), yy.ravel()])
+        expected = griddata(points, z[mask], xi, method="linear").reshape(z.shape)
+        outside = np.isnan(expected)
+        nearest = griddata(points, z[mask], xi, method="nearest").reshape(z.shape)
+        expected[outside] = nearest[outside]
+        return expected
+
+    @pytest.mark.parametrize(
+        "hole", ["rectangle", "c_shape", "disk", "dropouts", "edge"]
+    )
+    def test_matches_global_triangulation(self, hole):
+        z = np.random.default_rng(1).normal(size=(100, 120))
+        yy, xx = np.mgrid[0:100, 0:120]
+        if hole == "rectangle":
+            z[30:50, 40:70] = np.nan
+        elif hole == "c_shape":
+            z[20:60, 30:40] = np.nan
+            z[20:30, 30:80] = np.nan
+            z[50:60, 30:80] = np.nan
+        elif hole == "disk":
+            z[(yy - 50) ** 2 + (xx - 60) ** 2 < 15**2] = np.nan
+        elif hole == "dropouts":
+            z[np.random.default_rng(3).random(z.shape) < 0.03] = np.nan
+        else:
+            z[:10, :25] = np.nan
+            z[90:, 100:] = np.nan
+        s = Surface.from_array(z, step_x=0.01, step_y=0.01)
+        expected = self._global_griddata(z)
+        result = Linear().transform(s).z
+        np.testing.assert_allclose(result, expected, rtol=0, atol=1e-12)
+
+    def test_in_place_matches_global_triangulation(self, plane_with_holes):
+        _, s = plane_with_holes
+        expected = self._global_griddata(s.z)
+        s.apply(Linear(), inplace=True)
+        np.testing.assert_allclose(s.z, expected, rtol=0, atol=1e-12)
+
+    def test_workers_give_same_result(self, plane_with_holes):
+        _, s = plane_with_holes
+        serial = Linear(local=True).transform(s)
+        threaded = Linear(workers=4, local=True).transform(s)
+        np.testing.assert_array_equal(threaded.z, serial.z)
+
+    def test_invalid_workers_raises(self):
+        with pytest.raises(ValueError, match="workers"):
+            Linear(workers=0)
+
 
 class TestNearest:
     def test_no_nan_returns_same(self):
@@ -78,6 +154,97 @@ class TestNearest:
         with pytest.raises(ValueError, match="no valid points"):
             Nearest().transform(s)
 
+    def test_anisotropic_steps(self):
+        # Row neighbour is 1 px away but 5x the spacing of columns:
+        # the valid pixel 2 columns away is nearer in mm.
+        z = np.full((5, 5), np.nan)
+        z[1, 2] = 1.0
+        z[2, 4] = 2.0
+        s = Surface(z=z, step_x=0.001, step_y=0.005)
+        result = Nearest().transform(s)
+        assert result.z[2, 2] == pytest.approx(2.0)
+
+    def test_picks_a_nearest_valid_pixel(self):
+        rng = np.random.default_rng(0)
+        z = rng.standard_normal((30, 30))
+        z[rng.random(z.shape) < 0.3] = np.nan
+        s = Surface.from_array(z, step_x=0.01, step_y=0.02)
+        result = Nearest().transform(s).z
+
+        vy, vx = np.nonzero(np.isfinite(z))
+        for y, x in zip(*np.nonzero(np.isnan(z)), strict=True):
+            dist = np.hypot((vx - x) * 0.01, (vy - y) * 0.02)
+            nearest = np.isclose(dist, dist.min())
+            assert result[y, x] in z[vy[nearest], vx[nearest]]
+
+    def test_does_not_mutate_input(self):
+        z = np.ones((10, 10))
+        z[5, 5] = np.nan
+        s = Surface.from_array(z, step_x=0.01, step_y=0.01)
+        Nearest().transform(s)
+        assert np.isnan(s.z[5, 5])
+
+    def test_workers_give_same_result(self):
+        rng = np.random.default_rng(4)
+        z = rng.standard_normal((200, 90))
+        z[rng.random(z.shape) < 0.05] = np.nan
+        z[60:150, 10:40] = np.nan  # taller than a strip: forces a wider halo
+        s = Surface.from_array(z, step_x=0.01, step_y=0.02)
+        serial = Nearest().transform(s)
+        threaded = Nearest(workers=4).transform(s)
+        np.testing.assert_array_equal(threaded.z, serial.z)
+
+    def test_invalid_workers_raises(self):
+        with pytest.raises(ValueError, match="workers"):
+            Nearest(workers=0)
+
+
+class TestInpaint:
+    @pytest.fixture()
+    def grid(self):
+        yy, xx = np.mgrid[0:60, 0:80].astype(float)
+        return xx, yy
+
+    def test_no_nan_returns_same(self):
+        s = Surface.from_array(np.ones((5, 5)), step_x=0.01, step_y=0.01)
+        assert Inpaint().transform(s) is s
+
+    @pytest.mark.parametrize("method", ["laplace", "biharmonic"])
+    def test_recovers_plane(self, grid, method):
+        xx, yy = grid
+        plane = 0.3 * xx - 0.2 * yy + 1.0
+        z = plane.copy()
+        z[20:45, 10:60] = np.nan
+        z[5:7, 70:72] = np.nan
+        s = Surface.from_array(z, step_x=0.01, step_y=0.02)
+        result = Inpaint(method=method).transform(s)
+        np.testing.assert_allclose(result.z, plane, atol=1e-8)
+
+    def test_biharmonic_recovers_quadratic(self, grid):
+        xx, yy = grid
+        quad = 0.01 * xx**2 + 0.02 * yy**2 - 0.005 * xx * yy
+        z = quad.copy()
+        z[20:45, 10:60] = np.nan
+        s = Surface.from_array(z, step_x=0.01, step_y=0.02)
+        result = Inpaint(method="biharmonic").transform(s)
+        np.testing.assert_allclose(result.z, quad, atol=1e-8)
+
+    def test_laplace_is_mean_of_neighbours(self):
+        z = np.zeros((5, 5))
+        z[2, 1], z[2, 3], z[1, 2], z[3, 2] = 1.0, 2.0, 3.0, 6.0
+        z[2, 2] = np.nan
+        s = Surface.from_array(z, step_x=0.01, step_y=0.01)
+        assert Inpaint().transform(s).z[2, 2] == pytest.approx(3.0)
+
+    def test_all_nan_raises(self):
+        s = Surface(z=np.full((5, 5), np.nan), step_x=0.01, step_y=0.01)
+        with pytest.raises(ValueError, match="no valid points"):
+            Inpaint().transform(s)
+
+    def test_unknown_method_raises(self):
+        with pytest.raises(ValueError, match="Method"):
+            Inpaint(method="cubic")
+
 
 # --- Projection ---
 
@@ -161,6 +328,125 @@ class TestPolynomial:
         reconstructed = form + residual
         np.testing.assert_allclose(reconstructed.z, s.z, atol=1e-10)
 
+    @pytest.mark.parametrize("degree", [1, 3, 5])
+    def test_matches_monomial_least_squares(self, degree):
+        rng = np.random.default_rng(degree)
+        z = rng.standard_normal((40, 50))
+        z[5:15, 10:30] = np.nan
+        s = Surface.from_array(z, step_x=0.01, step_y=0.02)
+
+        yy, xx = np.mgrid[0:40, 0:50]
+        x, y = xx * 0.01, yy * 0.02
+        mask = np.isfinite(z)
+        powers = [(i, j) for i in range(degree + 1) for j in range(degree + 1 - i)]
+        design = np.column_stack([x[mask] ** i * y[mask] ** j for i, j in powers])
+        coeffs, *_ = np.linalg.lstsq(design, z[mask], rcond=None)
+        expected = sum(c * x**i * y**j for c, (i, j) in zip(coeffs, powers))
+
+        form = Polynomial(degree=degree, mode="form").transform(s)
+        np.testing.assert_allclose(form.z, expected, atol=1e-10)
+
+    def test_high_degree_is_well_conditioned(self):
+        nx, ny = 200, 150
+        x = np.linspace(-1, 1, nx)
+        y = np.linspace(-1, 1, ny)
+        X, Y = np.meshgrid(x, y)
+        z = X**8 - 3 * X**3 * Y**4 + Y**7
+        s = Surface.from_array(z, step_x=2 / (nx - 1), step_y=2 / (ny - 1))
+        result = Polynomial(degree=8).transform(s)
+        assert result.Sq < 1e-10
+
+    def test_peak_memory_bounded(self):
+        import tracemalloc
+
+        z = np.random.default_rng(0).standard_normal((2048, 2048))
+        z[100:200, 50:400] = np.nan
+        s = Surface.from_array(z, step_x=0.001, step_y=0.001)
+        tracemalloc.start()
+        try:
+            Polynomial(degree=2).transform(s)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert peak < 2 * z.nbytes
+
+
+class TestPolynomialSubsampling:
+    @pytest.fixture()
+    def surface(self):
+        from surface_analysis.io import generate_synthetic
+
+        return generate_synthetic(nx=400, ny=300, seed=3)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_stride_fit_close_to_full_fit(self, seed):
+        from surface_analysis.io import generate_synthetic
+
+        # The accuracy stated in the Polynomial docstring
+        surface = generate_synthetic(nx=400, ny=300, seed=seed)
+        full = Polynomial(degree=2).transform(surface)
+        sub = Polynomial(degree=2, fit_stride=5).transform(surface)
+        assert sub.Sa == pytest.approx(full.Sa, rel=1e-2)
+        assert sub.Sq == pytest.approx(full.Sq, rel=1e-2)
+        assert sub.shape == surface.shape
+
+    def test_stride_fit_within_standard_error(self, surface):
+        full = Polynomial(degree=2).fit(surface)
+        sub = Polynomial(degree=2, fit_stride=5).fit(surface)
+        deviation = np.abs(sub.coefficients - full.coefficients)
+        assert np.all(deviation < 4 * sub.standard_error)
+
+    def test_max_fit_points_sets_stride(self, surface):
+        fit = Polynomial(degree=2, max_fit_points=5_000).fit(surface)
+        assert fit.n_points <= 5_000
+        assert fit.fit_stride == 5
+
+    @pytest.mark.parametrize(
+        ("shape", "max_fit_points", "stride"),
+        [((1000, 1), 10, 100), ((1, 999), 10, 100), ((5000, 20), 100, 50)],
+    )
+    def test_max_fit_points_on_elongated_grids(self, shape, max_fit_points, stride):
+        from surface_analysis.transforms.projection import _fit_stride_for
+
+        assert _fit_stride_for(shape, max_fit_points) == stride
+        z = np.random.default_rng(0).standard_normal(shape)
+        s = Surface.from_array(z, step_x=0.01, step_y=0.01)
+        fit = Polynomial(degree=1, max_fit_points=max_fit_points).fit(s)
+        assert fit.n_points <= max_fit_points
+
+    def test_standard_error_grows_with_subsampling(self, surface):
+        full = Polynomial(degree=2).fit(surface)
+        sub = Polynomial(degree=2, fit_stride=8).fit(surface)
+        assert full.standard_error.shape == (6,)
+        assert np.all(sub.standard_error > full.standard_error)
+
+    def test_exact_form_has_zero_standard_error(self):
+        x = np.arange(30) * 0.01
+        z = np.tile(2.0 * x + 1.0, (20, 1))
+        s = Surface.from_array(z, step_x=0.01, step_y=0.01)
+        fit = Polynomial(degree=1, fit_stride=3).fit(s)
+        np.testing.assert_allclose(fit.standard_error, 0.0, atol=1e-12)
+        assert fit.residual_rms == pytest.approx(0.0, abs=1e-12)
+
+    @pytest.mark.parametrize("kwargs", [{"fit_stride": 0}, {"max_fit_points": 0}])
+    def test_invalid_subsampling_raises(self, surface, kwargs):
+        with pytest.raises(ValueError, match="must be >= 1"):
+            Polynomial(degree=2, **kwargs).transform(surface)
+
+
+class TestPolynomialWorkers:
+    def test_close_to_serial_fit(self):
+        z = np.random.default_rng(5).standard_normal((120, 80))
+        z[30:40, 20:50] = np.nan
+        s = Surface.from_array(z, step_x=0.01, step_y=0.01)
+        serial = Polynomial(degree=3).fit(s)
+        threaded = Polynomial(degree=3, workers=4).fit(s)
+        np.testing.assert_allclose(
+            threaded.coefficients, serial.coefficients, rtol=1e-10, atol=1e-14
+        )
+        assert threaded.residual_rms == pytest.approx(serial.residual_rms)
+        assert threaded.n_points == serial.n_points
+
 
 class TestPlane:
     def test_delegates_to_polynomial_degree_1(self):
@@ -231,6 +517,112 @@ class TestGaussian:
         assert result.step_y == pytest.approx(0.03)
 
 
+class TestGaussianFFT:
+    @pytest.mark.parametrize("cutoff", [0.02, 0.2, 2.0])
+    def test_matches_spatial(self, cutoff):
+        z = np.random.default_rng(2).standard_normal((80, 120))
+        s = Surface.from_array(z, step_x=0.001, step_y=0.002)
+        spatial = Gaussian(cutoff=cutoff, mode="lowpass", method="spatial")
+        fft = Gaussian(cutoff=cutoff, mode="lowpass", method="fft")
+        np.testing.assert_allclose(
+            fft.transform(s).z, spatial.transform(s).z, atol=1e-10
+        )
+
+    def test_matches_spatial_with_nan(self):
+        z = np.random.default_rng(3).standard_normal((80, 80))
+        z[20:40, 10:50] = np.nan
+        s = Surface.from_array(z, step_x=0.001, step_y=0.001)
+        spatial = Gaussian(cutoff=0.05, mode="lowpass", method="spatial")
+        fft = Gaussian(cutoff=0.05, mode="lowpass", method="fft")
+        expected = spatial.transform(s).z
+        result = fft.transform(s).z
+        np.testing.assert_array_equal(np.isnan(result), np.isnan(expected))
+        np.testing.assert_allclose(result, expected, atol=1e-10)
+
+    def test_auto_selects_fft_for_large_kernels(self):
+        from surface_analysis.transforms.filtering import _resolve_method
+
+        assert _resolve_method("auto", 2.0, 2.0) == "spatial"
+        assert _resolve_method("auto", 150.0, 2.0) == "fft"
+
+    def test_unknown_method_raises(self):
+        with pytest.raises(ValueError, match="Method"):
+            Gaussian(cutoff=0.1, method="wavelet")
+
+
+class TestGaussianRecursive:
+    @pytest.mark.parametrize("wavelength_px", [8, 50, 800])
+    def test_iso_transmission_at_cutoff(self, wavelength_px):
+        # ISO 16610-21: the Gaussian transmits 50 % amplitude at the cutoff
+        step = 0.001
+        cutoff = wavelength_px * step
+        nx = wavelength_px * 40
+        x = np.arange(nx) * step
+        z = np.tile(np.sin(2 * np.pi * x / cutoff), (4, 1))
+        s = Surface.from_array(z, step_x=step, step_y=step)
+
+        result = Gaussian(cutoff=cutoff, mode="lowpass", method="recursive")
+        core = slice(nx // 4, 3 * nx // 4)
+        out = result.transform(s).z[2, core]
+        ref = z[2, core]
+        transmission = np.dot(out, ref) / np.dot(ref, ref)
+        assert transmission == pytest.approx(0.5, abs=0.01)
+
+    def test_close_to_spatial_in_interior(self):
+        z = np.random.default_rng(4).standard_normal((200, 200))
+        s = Surface.from_array(z, step_x=0.001, step_y=0.001)
+        cutoff = 0.05
+        spatial = Gaussian(cutoff=cutoff, mode="lowpass", method="spatial")
+        recursive = Gaussian(cutoff=cutoff, mode="lowpass", method="recursive")
+        diff = recursive.transform(s).z - spatial.transform(s).z
+        assert np.abs(diff[50:-50, 50:-50]).max() < 0.1 * z.std()
+
+    def test_preserves_constant_and_nan_weighting(self):
+        z = np.full((40, 40), 3.0)
+        z[10:20, 10:20] = np.nan
+        s = Surface.from_array(z, step_x=0.001, step_y=0.001)
+        result = Gaussian(cutoff=0.02, mode="lowpass", method="recursive")
+        np.testing.assert_allclose(result.transform(s).z, 3.0, atol=1e-9)
+
+
+class TestGaussianWorkers:
+    @pytest.mark.parametrize("method", ["spatial", "fft", "recursive"])
+    def test_same_result(self, method):
+        z = np.random.default_rng(6).standard_normal((90, 70))
+        z[20:30, 10:15] = np.nan
+        s = Surface.from_array(z, step_x=0.001, step_y=0.002)
+        serial = Gaussian(cutoff=0.05, method=method).transform(s)
+        threaded = Gaussian(cutoff=0.05, method=method, workers=3).transform(s)
+        np.testing.assert_array_equal(threaded.z, serial.z)
+
+    def test_invalid_workers_raises(self):
+        with pytest.raises(ValueError, match="workers"):
+            Gaussian(cutoff=0.1, workers=0)
+
+
+class TestLowpassBank:
+    def test_matches_individual_gaussians(self):
+        z = np.random.default_rng(0).standard_normal((60, 60))
+        z[10:14, 20:30] = np.nan
+        s = Surface.from_array(z, step_x=0.01, step_y=0.02)
+        bank = lowpass_bank(s, [0.3, 0.05])
+        for cutoff, lowpass in zip([0.3, 0.05], bank, strict=True):
+            expected = Gaussian(cutoff=cutoff, mode="lowpass").transform(s)
+            np.testing.assert_allclose(lowpass.z, expected.z, atol=1e-12)
+
+    def test_no_nan_skips_weights(self):
+        z = np.random.default_rng(1).standard_normal((40, 40))
+        s = Surface.from_array(z, step_x=0.01, step_y=0.01)
+        (lowpass,) = lowpass_bank(s, [0.1])
+        expected = Gaussian(cutoff=0.1, mode="lowpass").transform(s)
+        np.testing.assert_allclose(lowpass.z, expected.z, atol=1e-12)
+
+    def test_non_positive_cutoff_raises(self):
+        s = Surface.from_array(np.zeros((5, 5)), step_x=0.01, step_y=0.01)
+        with pytest.raises(ValueError, match="positive"):
+            lowpass_bank(s, [0.1, 0.0])
+
+
 # --- Composition ---
 
 
@@ -247,3 +639,77 @@ class TestComposition:
         # Roughness should be much smaller than original (form removed)
         assert result.Sq < s.Sq
         assert result.nan_count == 0
+
+
+class TestInPlace:
+    @pytest.fixture()
+    def holed(self):
+        from surface_analysis.io import generate_synthetic
+
+        s = generate_synthetic(nx=120, ny=90, seed=7)
+        s.z[20:30, 40:55] = np.nan
+        s.z[60, 60] = np.nan
+        return s
+
+    @pytest.mark.parametrize(
+        "transform",
+        [
+            Linear(),
+            Linear(workers=2),
+            Nearest(),
+            Nearest(workers=2),
+            Inpaint(),
+            Inpaint(method="biharmonic"),
+        ],
+    )
+    def test_fill_in_place_matches_copy(self, holed, transform):
+        expected = transform.transform(holed)
+        z = holed.z
+        result = transform.transform(holed, out=holed.z)
+        assert result is holed
+        assert holed.z is z
+        np.testing.assert_array_equal(holed.z, expected.z)
+
+    @pytest.mark.parametrize(
+        "transform",
+        [
+            Polynomial(degree=2),
+            Polynomial(degree=3, mode="form"),
+            Plane(),
+            Gaussian(cutoff=0.05),
+            Gaussian(cutoff=0.05, mode="lowpass"),
+        ],
+    )
+    def test_out_matches_new_array(self, holed, transform):
+        expected = transform.transform(holed)
+        out = np.empty_like(holed.z)
+        result = transform.transform(holed, out=out)
+        assert result.z is out
+        np.testing.assert_array_equal(out, expected.z)
+        result = transform.transform(holed, out=holed.z)
+        assert result is holed
+        np.testing.assert_array_equal(holed.z, expected.z)
+
+    def test_out_shape_mismatch_raises(self, holed):
+        with pytest.raises(ValueError, match="Output shape"):
+            Linear().transform(holed, out=np.empty((3, 3)))
+
+    def test_nothing_to_fill_still_writes_out(self):
+        s = Surface.from_array(np.ones((4, 5)), step_x=0.1, step_y=0.1)
+        out = np.zeros((4, 5))
+        assert Linear().transform(s, out=out).z is out
+        np.testing.assert_array_equal(out, 1.0)
+
+    def test_apply_in_place(self, holed):
+        class Negate:
+            def transform(self, surface):
+                return -surface
+
+        chain = (Linear(), Polynomial(degree=2), Negate(), Gaussian(cutoff=0.05))
+        expected = holed.apply(*chain)
+        z = holed.z
+        _ = holed.Sa
+        assert holed.apply(*chain, inplace=True) is holed
+        assert holed.z is z
+        np.testing.assert_array_equal(holed.z, expected.z)
+        assert holed.Sa == pytest.approx(expected.Sa)